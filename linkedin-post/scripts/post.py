@@ -9,6 +9,7 @@ import os
 import sys
 import json
 import time
+import asyncio
 import argparse
 import requests
 from typing import Optional, Dict, Any
@@ -25,18 +26,15 @@ MYSQL_USER = os.environ.get("MYSQL_USER")
 MYSQL_PASSWORD = os.environ.get("MYSQL_PASSWORD")
 MYSQL_DATABASE = os.environ.get("MYSQL_DATABASE")
 
+# mysql 技能的共用連線池模組
+MYSQL_SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "mysql", "scripts")
+
 
 def get_channel_info(channel_id: int) -> Optional[Dict[str, Any]]:
     """從資料庫取得頻道資訊"""
     try:
-        import mysql.connector
-        conn = mysql.connector.connect(
-            host=MYSQL_HOST,
-            user=MYSQL_USER,
-            password=MYSQL_PASSWORD,
-            database=MYSQL_DATABASE
-        )
-        cursor = conn.cursor(dictionary=True)
+        sys.path.insert(0, MYSQL_SCRIPTS_DIR)
+        from db_pool import connection
 
         query = """
         SELECT channal_id, channal_name, page_id, access_token
@@ -44,11 +42,12 @@ def get_channel_info(channel_id: int) -> Optional[Dict[str, Any]]:
         WHERE channal_id = %s AND channal_source = 'linkedin'
         """
 
-        cursor.execute(query, (channel_id,))
-        result = cursor.fetchone()
-
-        cursor.close()
-        conn.close()
+        with connection(host=MYSQL_HOST, user=MYSQL_USER,
+                        password=MYSQL_PASSWORD, database=MYSQL_DATABASE) as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(query, (channel_id,))
+            result = cursor.fetchone()
+            cursor.close()
 
         return result
     except Exception as e:
@@ -56,6 +55,40 @@ def get_channel_info(channel_id: int) -> Optional[Dict[str, Any]]:
         return None
 
 
+async def get_channel_info_async(channel_id: int) -> Optional[Dict[str, Any]]:
+    """以 mysql 技能的 async_db 取得頻道資訊（沒有 aiomysql 時在執行緒中同步查詢）"""
+    try:
+        sys.path.insert(0, MYSQL_SCRIPTS_DIR)
+        from async_db import AsyncDatabase, aiomysql
+    except ImportError:
+        aiomysql = None
+
+    if aiomysql is None:
+        return await asyncio.to_thread(get_channel_info, channel_id)
+
+    try:
+        async with AsyncDatabase(host=MYSQL_HOST, user=MYSQL_USER,
+                                 password=MYSQL_PASSWORD, database=MYSQL_DATABASE) as db:
+            return await db.get_channel_info(channel_id, "linkedin")
+    except Exception as e:
+        print(f"❌ 資料庫查詢失敗: {e}")
+        return None
+
+
+async def load_channel_and_image(channel_id: int, image_url: Optional[str] = None):
+    """
+    同時讀取頻道設定與下載圖片（圖片下載不需要 access_token，不必等資料庫查詢）
+
+    Returns:
+        (頻道資訊, 圖片內容或 None)
+    """
+    tasks = [get_channel_info_async(channel_id)]
+    if image_url:
+        tasks.append(asyncio.to_thread(download_image, image_url))
+    results = await asyncio.gather(*tasks)
+    return results[0], (results[1] if image_url else None)
+
+
 def get_linkedin_profile(access_token: str) -> Optional[Dict[str, Any]]:
     """取得 LinkedIn 使用者資訊"""
     headers = {
@@ -157,16 +190,27 @@ def register_image_upload(access_token: str) -> Optional[Dict[str, str]]:
         return None
 
 
-def upload_image_to_url(upload_url: str, image_url: str) -> bool:
-    """上傳圖片到指定的 URL"""
+def download_image(image_url: str) -> Optional[bytes]:
+    """下載圖片，失敗時回傳 None"""
     try:
         print(f"📥 正在下載圖片: {image_url}")
-        # 先下載圖片
         img_response = requests.get(image_url, timeout=30)
         img_response.raise_for_status()
+        print(f"✅ 圖片已下載，大小: {len(img_response.content)} bytes")
+        return img_response.content
+    except requests.exceptions.RequestException as e:
+        print(f"❌ 圖片下載失敗: {e}")
+        return None
+
 
-        image_data = img_response.content
-        print(f"✅ 圖片已下載，大小: {len(image_data)} bytes")
+def upload_image_to_url(upload_url: str, image_url: str, image_data: Optional[bytes] = None) -> bool:
+    """上傳圖片到指定的 URL（image_data 為已下載的圖片，未提供時先下載）"""
+    try:
+        # 先下載圖片
+        if image_data is None:
+            image_data = download_image(image_url)
+            if image_data is None:
+                return False
 
         # 上傳到 LinkedIn
         print("📤 正在上傳圖片到 LinkedIn...")
@@ -262,7 +306,8 @@ def post_text(access_token: str, person_urn: str, text: str) -> bool:
         return False
 
 
-def post_image(access_token: str, person_urn: str, text: str, image_url: str) -> bool:
+def post_image(access_token: str, person_urn: str, text: str, image_url: str,
+               image_data: Optional[bytes] = None) -> bool:
     """發布圖片貼文"""
     try:
         # 1. 註冊上傳（先不指定 owner，稍後在貼文中指定）
@@ -276,7 +321,7 @@ def post_image(access_token: str, person_urn: str, text: str, image_url: str) ->
 
         # 2. 上傳圖片
         print("\n📋 步驟 2/3: 上傳圖片檔案")
-        if not upload_image_to_url(upload_url, image_url):
+        if not upload_image_to_url(upload_url, image_url, image_data):
             return False
 
         # 3. 發布貼文（包含圖片）
@@ -451,6 +496,7 @@ def main():
     # 取得 access_token 和 person_urn
     access_token = None
     person_urn = None
+    image_data = None
 
     if args.from_db:
         # 從資料庫讀取
@@ -458,7 +504,9 @@ def main():
             print("❌ 使用 --from-db 時必須指定 --channel-id")
             sys.exit(1)
 
-        channel_info = get_channel_info(args.channel_id)
+        # 圖片貼文的圖片下載與資料庫查詢同時進行
+        prefetch = args.image_url if args.action == "image" else None
+        channel_info, image_data = asyncio.run(load_channel_and_image(args.channel_id, prefetch))
         if not channel_info:
             print(f"❌ 找不到頻道 ID {args.channel_id}")
             sys.exit(1)
@@ -527,7 +575,7 @@ def main():
         if not args.image_url:
             print("❌ action=image 需要指定 --image-url")
             sys.exit(1)
-        success = post_image(access_token, person_urn, args.text, args.image_url)
+        success = post_image(access_token, person_urn, args.text, args.image_url, image_data)
 
     elif args.action == "link":
         if not args.text:
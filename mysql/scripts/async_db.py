@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+MySQL Async Access - Python 模組
+以 aiomysql 連線池提供 asyncio 原生的資料存取，讓流程能在等待 Facebook / Threads / Suno 等
+HTTP 呼叫的同時進行資料庫讀寫
+
+涵蓋 content_history 與 channal_info 兩張資料表的常用操作，其他語句可用 fetch_all / execute。
+連線設定與 db_pool.py 相同（MYSQL_* 環境變數），連線池大小沿用 MYSQL_POOL_SIZE。
+
+範例:
+    async with AsyncDatabase() as db:
+        channel, history = await asyncio.gather(
+            db.get_channel_info(3, 'facebook'),
+            db.find_content_history('AI 工具'),
+        )
+"""
+
+import os
+import json
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    import aiomysql
+except ImportError:
+    aiomysql = None
+
+from db_pool import get_config
+from query_cache import invalidate_tables
+
+
+class AsyncDatabase:
+    """
+    asyncio 資料存取層
+
+    Args:
+        minsize: 連線池最少連線數
+        maxsize: 連線池最多連線數（預設 MYSQL_POOL_SIZE 或 5）
+        **overrides: 覆寫連線設定（host / port / user / password / database）
+    """
+
+    def __init__(self, minsize: int = 1, maxsize: Optional[int] = None, **overrides):
+        self.config = get_config(**overrides)
+        self.minsize = minsize
+        self.maxsize = maxsize or int(os.environ.get('MYSQL_POOL_SIZE', 5))
+        self._pool = None
+
+    async def open(self):
+        """建立連線池"""
+        if aiomysql is None:
+            raise RuntimeError("需要安裝 aiomysql: pip install aiomysql")
+        if self._pool is None:
+            self._pool = await aiomysql.create_pool(
+                host=self.config['host'],
+                port=self.config['port'],
+                user=self.config['user'],
+                password=self.config['password'],
+                db=self.config['database'],
+                charset='utf8mb4',
+                # 讀取不留下未結束的交易；aiomysql 會關閉交易中歸還的連線，使連線池失效
+                autocommit=True,
+                minsize=self.minsize,
+                maxsize=self.maxsize,
+                pool_recycle=int(float(os.environ.get('MYSQL_POOL_IDLE_TIMEOUT', 300)))
+            )
+        return self
+
+    async def close(self):
+        """關閉連線池"""
+        if self._pool is not None:
+            self._pool.close()
+            await self._pool.wait_closed()
+            self._pool = None
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    # 通用操作
+
+    async def fetch_all(self, sql: str, params: Optional[Sequence] = None) -> List[Dict[str, Any]]:
+        """執行查詢並回傳所有結果"""
+        async with self._pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(sql, params)
+                return list(await cursor.fetchall())
+
+    async def fetch_one(self, sql: str, params: Optional[Sequence] = None) -> Optional[Dict[str, Any]]:
+        """執行查詢並回傳第一筆結果"""
+        async with self._pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(sql, params)
+                return await cursor.fetchone()
+
+    async def execute(self, sql: str, params: Optional[Sequence] = None, many: bool = False,
+                      table: Optional[str] = None) -> Dict[str, Any]:
+        """
+        以明確交易執行寫入語句並 commit（executemany 全部成功或全部 rollback）
+
+        Args:
+            table: 寫入的資料表名稱，指定時會清除 query.py 的查詢快取
+
+        Returns:
+            {'rowcount': 受影響行數, 'lastrowid': 最後插入 ID}
+        """
+        async with self._pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await conn.begin()
+                try:
+                    if many:
+                        await cursor.executemany(sql, params or [])
+                    else:
+                        await cursor.execute(sql, params)
+                    await conn.commit()
+                except Exception:
+                    await conn.rollback()
+                    raise
+                result = {'rowcount': cursor.rowcount, 'lastrowid': cursor.lastrowid}
+
+        if table:
+            invalidate_tables(table)
+        return result
+
+    # channal_info
+
+    async def get_channel_info(self, channel_id: int, source: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """取得頻道設定，可限定 channal_source（facebook / linkedin / threads ...）"""
+        sql = "SELECT * FROM channal_info WHERE channal_id = %s"
+        params = [channel_id]
+        if source:
+            sql += " AND channal_source = %s"
+            params.append(source)
+        return await self.fetch_one(sql, params)
+
+    # content_history
+
+    async def find_content_history(self, topic: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """依主題關鍵字查詢最近的發布歷史"""
+        sql = """
+        SELECT id, topic, content, platform, status, created_at
+        FROM content_history
+        WHERE topic LIKE %s
+        ORDER BY created_at DESC
+        LIMIT %s
+        """
+        return await self.fetch_all(sql, (f"%{topic}%", limit))
+
+    async def insert_content_history(self, record: Dict[str, Any]) -> int:
+        """
+        新增一筆發布歷史
+
+        hashtags / metadata 若為 list / dict 會自動轉為 JSON 字串。
+
+        Returns:
+            新記錄 ID
+        """
+        data = {k: json.dumps(v, ensure_ascii=False) if isinstance(v, (list, dict)) else v
+                for k, v in record.items()}
+        columns = ', '.join(data.keys())
+        placeholders = ', '.join(['%s'] * len(data))
+        sql = f"INSERT INTO content_history ({columns}) VALUES ({placeholders})"
+        result = await self.execute(sql, tuple(data.values()), table='content_history')
+        return result['lastrowid']
+
+    async def update_content_status(self, ids: Sequence[int], status: str) -> int:
+        """
+        批次更新發布狀態，status 為 published 時同時寫入 published_at
+
+        Returns:
+            受影響行數
+        """
+        if not ids:
+            return 0
+        placeholders = ', '.join(['%s'] * len(ids))
+        published = ", published_at = NOW()" if status == 'published' else ""
+        sql = f"UPDATE content_history SET status = %s{published} WHERE id IN ({placeholders})"
+        result = await self.execute(sql, (status, *ids), table='content_history')
+        return result['rowcount']
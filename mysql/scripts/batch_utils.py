@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+MySQL Batch Utilities - Python 模組
+update.py / delete.py 批次模式共用的 ID 讀取與分段工具
+"""
+
+import os
+import sys
+import json
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+def read_ids(source):
+    """
+    讀取 ID 列表
+
+    Args:
+        source: 逗號分隔的 ID 字串、檔案路徑，或 '-' 表示 stdin
+                檔案內容可用逗號、空白或換行分隔
+
+    Returns:
+        去除重複後的整數 ID 列表（保留原順序）
+    """
+    if source == '-':
+        text = sys.stdin.read()
+    elif os.path.isfile(source):
+        with open(source, 'r', encoding='utf-8') as f:
+            text = f.read()
+    else:
+        text = source
+
+    ids = []
+    seen = set()
+    for token in text.replace(',', ' ').split():
+        try:
+            record_id = int(token)
+        except ValueError:
+            raise ValueError(f"無效的 ID: {token}")
+        if record_id not in seen:
+            seen.add(record_id)
+            ids.append(record_id)
+    return ids
+
+
+def read_id_rows(source):
+    """
+    讀取 `id,data` 格式的更新資料，每行一筆，data 為 JSON 物件
+
+    範例:
+        12,{"status":"published"}
+        13,{"status":"failed","error":"timeout"}
+
+    Returns:
+        [(id, dict), ...]
+    """
+    if source == '-':
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(source, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+
+    rows = []
+    for line_no, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        id_part, _, data_part = line.partition(',')
+        try:
+            record_id = int(id_part)
+            data = json.loads(data_part)
+        except (ValueError, json.JSONDecodeError) as e:
+            raise ValueError(f"第 {line_no} 行格式錯誤: {e}")
+        if not isinstance(data, dict) or not data:
+            raise ValueError(f"第 {line_no} 行的 data 必須是非空 JSON 物件")
+        rows.append((record_id, data))
+    return rows
+
+
+def chunked(items, size):
+    """將列表切成每段 size 筆"""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def pop_option(args, flag, default, cast=int):
+    """從參數列表取出 `flag value`，回傳值並移除這兩個參數"""
+    if flag in args:
+        index = args.index(flag)
+        if index + 1 >= len(args):
+            raise ValueError(f"{flag} 需要指定值")
+        value = cast(args[index + 1])
+        del args[index:index + 2]
+        return value
+    return default
+
+
+def format_summary(action, summary):
+    """格式化批次結果輸出"""
+    return (f"{action}完成: 影響 {summary['affected']} 行，共 {summary['ids']} 個 ID、"
+            f"{summary['statements']} 條語句，耗時 {summary['elapsed']} 秒"
+            f"（{summary['ids_per_sec']} 筆/秒）")
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+MySQL Call Benchmark - Python 腳本
+比較以 subprocess 執行 query.py 與程式內呼叫 mysql_api.query 的每次呼叫延遲
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def report(name, samples):
+    """印出首次呼叫（含建立連線）、之後呼叫的中位數與總耗時，回傳總耗時（秒）"""
+    warm = samples[1:] or samples
+    total = sum(samples)
+    print(f"{name}")
+    print(f"  首次呼叫:     {samples[0] * 1000:8.1f} ms")
+    print(f"  之後中位數:   {statistics.median(warm) * 1000:8.1f} ms")
+    print(f"  總耗時:       {total * 1000:8.1f} ms\n")
+    return total
+
+
+def bench_subprocess(sql, iterations, env):
+    """每次呼叫都啟動新的直譯器執行 query.py（舊做法）"""
+    script = os.path.join(SCRIPT_DIR, 'query.py')
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, script, sql], capture_output=True, text=True, env=env)
+        samples.append(time.perf_counter() - started)
+        if result.returncode != 0:
+            raise RuntimeError(f"query.py 執行失敗: {result.stderr.strip()}")
+    return samples
+
+
+def bench_in_process(sql, iterations):
+    """程式內呼叫 mysql_api.query，共用連線池（第一次呼叫含建立連線）"""
+    sys.path.insert(0, SCRIPT_DIR)
+    import mysql_api
+
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        mysql_api.query(sql)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="比較 subprocess 與程式內呼叫的查詢延遲")
+    parser.add_argument("--iterations", "-n", type=int, default=20, help="每種方式的呼叫次數（預設 20）")
+    parser.add_argument("--sql", default="SELECT 1 AS ok", help="測試用 SQL（預設 SELECT 1）")
+    args = parser.parse_args()
+
+    # 兩種方式都不經由 pool daemon，避免影響比較
+    os.environ['MYSQL_POOL_DAEMON'] = '0'
+    env = dict(os.environ)
+
+    print(f"測試 SQL: {args.sql}")
+    print(f"呼叫次數: {args.iterations}\n")
+
+    before = report('subprocess query.py', bench_subprocess(args.sql, args.iterations, env))
+    after = report('mysql_api.query', bench_in_process(args.sql, args.iterations))
+    if after > 0:
+        print(f"總耗時加速: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+MySQL Connection Pool - Python 模組
+所有 mysql 腳本共用的連線池，支援閒置逾時、健康檢查與常駐 daemon 模式
+
+環境變數:
+  MYSQL_HOST / MYSQL_PORT / MYSQL_USER / MYSQL_PASSWORD / MYSQL_DATABASE  連線設定
+  MYSQL_POOL_SIZE              連線池大小（預設 5）
+  MYSQL_POOL_IDLE_TIMEOUT      閒置超過此秒數的連線會被重建（預設 300）
+  MYSQL_POOL_HEALTH_CHECK      閒置超過此秒數時先 ping 再使用，0 表示每次都檢查（預設 30）
+  MYSQL_POOL_SOCKET            daemon 的 Unix socket 路徑（預設 /tmp/mysql-pool-<uid>.sock）
+  MYSQL_POOL_DAEMON            設為 0 時不嘗試連線 daemon
+  MYSQL_STATEMENT_CACHE_SIZE   每條連線保留的 prepared statement 數（預設 64）
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+import mysql.connector
+
+DEFAULT_HOST = '192.168.1.159'
+DEFAULT_PORT = 3306
+DEFAULT_USER = 'n8n'
+DEFAULT_PASSWORD = '!!asshole!!asshole'
+DEFAULT_DATABASE = 'infoCollection'
+
+
+def get_config(**overrides):
+    """取得連線設定（環境變數優先，參數可覆寫）"""
+    config = {
+        'host': os.environ.get('MYSQL_HOST', DEFAULT_HOST),
+        'port': int(os.environ.get('MYSQL_PORT', DEFAULT_PORT)),
+        'user': os.environ.get('MYSQL_USER', DEFAULT_USER),
+        'password': os.environ.get('MYSQL_PASSWORD', DEFAULT_PASSWORD),
+        'database': os.environ.get('MYSQL_DATABASE', DEFAULT_DATABASE)
+    }
+    for key, value in overrides.items():
+        if value is not None:
+            config[key] = int(value) if key == 'port' else value
+    return config
+
+
+def config_fingerprint(config):
+    """連線設定的指紋（含密碼雜湊），用來確認 daemon 連的是同一個資料庫"""
+    data = json.dumps(sorted(config.items()), default=str).encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+
+def get_socket_path():
+    """取得 daemon 的 Unix socket 路徑"""
+    default = f"/tmp/mysql-pool-{os.getuid()}.sock" if hasattr(os, 'getuid') else "/tmp/mysql-pool.sock"
+    return os.environ.get('MYSQL_POOL_SOCKET', default)
+
+
+class ConnectionPool:
+    """
+    簡易連線池
+
+    Args:
+        config: mysql.connector.connect 的參數
+        size: 最大保留的閒置連線數
+        idle_timeout: 閒置超過此秒數的連線直接重建
+        health_check: 閒置超過此秒數的連線在取出前先 ping
+    """
+
+    def __init__(self, config, size=5, idle_timeout=300, health_check=30):
+        self.config = config
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.health_check = health_check
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        return mysql.connector.connect(**self.config)
+
+    def acquire(self):
+        """取出一條可用連線"""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                conn, last_used = self._idle.pop()
+
+            idle = time.monotonic() - last_used
+            if idle > self.idle_timeout:
+                self._discard(conn)
+                continue
+
+            if idle >= self.health_check:
+                try:
+                    conn.ping(reconnect=True, attempts=1, delay=0)
+                except mysql.connector.Error:
+                    self._discard(conn)
+                    continue
+                # 重新連線後伺服器端的 prepared statement 已失效
+                clear_statement_cache(conn)
+
+            return conn
+
+        return self._connect()
+
+    def release(self, conn):
+        """將連線歸還連線池"""
+        try:
+            if not conn.is_connected():
+                return
+            if conn.in_transaction:
+                conn.rollback()
+        except mysql.connector.Error:
+            self._discard(conn)
+            return
+
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append((conn, time.monotonic()))
+                return
+
+        self._discard(conn)
+
+    def close_all(self):
+        """關閉所有閒置連線"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def stats(self):
+        """回傳連線池狀態"""
+        with self._lock:
+            return {'size': self.size, 'idle': len(self._idle)}
+
+    @staticmethod
+    def _discard(conn):
+        clear_statement_cache(conn)
+        try:
+            conn.close()
+        except mysql.connector.Error:
+            pass
+
+
+class StatementCache:
+    """
+    單一連線的 prepared statement LRU 快取
+
+    每條 SQL 對應一個 prepared cursor，重複執行相同 SQL 時沿用已在伺服器端準備好的語句，
+    只傳送參數；超過上限時關閉最久未使用的 cursor（同時釋放伺服器端語句）。
+    """
+
+    def __init__(self, conn, size=64):
+        self.conn = conn
+        self.size = size
+        self._cursors = OrderedDict()
+
+    def cursor_for(self, sql):
+        """取得 SQL 對應的 prepared cursor"""
+        cursor = self._cursors.get(sql)
+        if cursor is not None:
+            self._cursors.move_to_end(sql)
+            return cursor
+
+        cursor = self.conn.cursor(prepared=True)
+        self._cursors[sql] = cursor
+        while len(self._cursors) > self.size:
+            _, oldest = self._cursors.popitem(last=False)
+            self._close(oldest)
+        return cursor
+
+    def drop(self, sql):
+        """移除單一語句"""
+        cursor = self._cursors.pop(sql, None)
+        if cursor is not None:
+            self._close(cursor)
+
+    def clear(self):
+        """關閉所有 cursor"""
+        while self._cursors:
+            _, cursor = self._cursors.popitem()
+            self._close(cursor)
+
+    def __len__(self):
+        return len(self._cursors)
+
+    @staticmethod
+    def _close(cursor):
+        try:
+            cursor.close()
+        except mysql.connector.Error:
+            pass
+
+
+def get_statement_cache(conn):
+    """取得（或建立）連線專屬的 statement 快取"""
+    cache = getattr(conn, '_statement_cache', None)
+    if cache is None:
+        cache = StatementCache(conn, int(os.environ.get('MYSQL_STATEMENT_CACHE_SIZE', 64)))
+        conn._statement_cache = cache
+    return cache
+
+
+def clear_statement_cache(conn):
+    """清除連線的 statement 快取（重新連線或關閉前呼叫）"""
+    cache = getattr(conn, '_statement_cache', None)
+    if cache is not None:
+        cache.clear()
+
+
+def translate_placeholders(sql):
+    """
+    將 `?` 佔位符轉為 mysql.connector 使用的 `%s`
+
+    只處理引號、反引號與註解以外的 `?`；轉換時一併把其餘的 `%` 轉義為 `%%`。
+    SQL 中沒有 `?` 佔位符時原樣回傳（已使用 `%s` 的語句不受影響）。
+
+    範例:
+        translate_placeholders("SELECT * FROM t WHERE a > ? AND b LIKE 'x%'")
+        -> "SELECT * FROM t WHERE a > %s AND b LIKE 'x%%'"
+    """
+    out = []
+    found = False
+    quote = None
+    i = 0
+    while i < len(sql):
+        ch = sql[i]
+        if quote:
+            if ch == '\\' and quote != '`' and i + 1 < len(sql):
+                out.append(sql[i:i + 2].replace('%', '%%'))
+                i += 2
+                continue
+            if ch == quote:
+                quote = None
+            out.append('%%' if ch == '%' else ch)
+        elif ch in ("'", '"', '`'):
+            quote = ch
+            out.append(ch)
+        elif ch == '-' and sql.startswith('-- ', i) or ch == '#':
+            end = sql.find('\n', i)
+            end = len(sql) if end == -1 else end
+            out.append(sql[i:end].replace('%', '%%'))
+            i = end
+            continue
+        elif ch == '?':
+            found = True
+            out.append('%s')
+        else:
+            out.append('%%' if ch == '%' else ch)
+        i += 1
+
+    return ''.join(out) if found else sql
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(**overrides):
+    """取得（或建立）對應連線設定的連線池"""
+    config = get_config(**overrides)
+    key = tuple(sorted(config.items()))
+
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(
+                config,
+                size=int(os.environ.get('MYSQL_POOL_SIZE', 5)),
+                idle_timeout=float(os.environ.get('MYSQL_POOL_IDLE_TIMEOUT', 300)),
+                health_check=float(os.environ.get('MYSQL_POOL_HEALTH_CHECK', 30))
+            )
+            _pools[key] = pool
+        return pool
+
+
+def get_connection(**overrides):
+    """從連線池取得連線，失敗時結束程式"""
+    try:
+        return get_pool(**overrides).acquire()
+    except mysql.connector.Error as e:
+        print(f"資料庫連線失敗: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+def release_connection(conn, **overrides):
+    """歸還連線"""
+    get_pool(**overrides).release(conn)
+
+
+@contextmanager
+def connection(**overrides):
+    """
+    以 with 語法借用連線
+
+    範例:
+        with connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+    """
+    pool = get_pool(**overrides)
+    conn = pool.acquire()
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
+
+
+def daemon_execute(sql, params=None, many=False, prepared=False):
+    """
+    透過常駐 daemon 執行單一語句（prepared 模式會使用 daemon 連線上的 statement 快取）
+
+    請求附帶本程序的連線設定指紋；daemon 的 MYSQL_* 設定不同時（例如另一個 MYSQL_DATABASE）
+    daemon 會拒絕執行，改由本地連線池處理。
+
+    Returns:
+        daemon 回傳的結果字典；daemon 未啟動或連線設定不同時回傳 None
+    """
+    if os.environ.get('MYSQL_POOL_DAEMON', '1') == '0':
+        return None
+
+    path = get_socket_path()
+    if not os.path.exists(path):
+        return None
+
+    request = {'sql': sql, 'params': params, 'many': many, 'prepared': prepared,
+               'config': config_fingerprint(get_config())}
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(path)
+            sock.sendall(json.dumps(request, ensure_ascii=False, default=str).encode('utf-8') + b'\n')
+            sock.shutdown(socket.SHUT_WR)
+            with sock.makefile('rb') as reader:
+                line = reader.readline()
+    except OSError:
+        return None
+
+    if not line:
+        return None
+
+    response = json.loads(line)
+    if response.get('mismatch'):
+        return None
+    if 'error' in response:
+        raise mysql.connector.Error(msg=response['error'], errno=response.get('errno'))
+    return response
+
+
+def execute(sql, params=None, many=False, prepared=False):
+    """
+    執行單一語句（優先使用 daemon，否則使用本地連線池）
+
+    Args:
+        prepared: 使用伺服器端 prepared statement（僅限單筆執行）
+
+    Returns:
+        {'rows': 查詢結果或 None, 'rowcount': 受影響行數, 'lastrowid': 最後插入 ID}
+    """
+    response = daemon_execute(sql, params, many, prepared)
+    if response is not None:
+        return response
+
+    with connection() as conn:
+        if prepared and not many:
+            return run_prepared(conn, sql, params)
+        return run_statement(conn, sql, params, many)
+
+
+def run_statement(conn, sql, params=None, many=False):
+    """在指定連線上執行語句，寫入類語句會自動 commit"""
+    cursor = conn.cursor(dictionary=True)
+    try:
+        if many:
+            cursor.executemany(sql, params or [])
+        elif params:
+            cursor.execute(sql, params)
+        else:
+            cursor.execute(sql)
+
+        rows = cursor.fetchall() if cursor.with_rows else None
+        if rows is None:
+            conn.commit()
+
+        return {'rows': rows, 'rowcount': cursor.rowcount, 'lastrowid': cursor.lastrowid}
+    except mysql.connector.Error:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def run_prepared(conn, sql, params=None):
+    """
+    以連線的 statement 快取執行 prepared statement，寫入類語句會自動 commit
+
+    伺服器端語句失效（例如連線被重置）時會重新準備並重試一次。
+    """
+    cache = get_statement_cache(conn)
+    for attempt in (1, 2):
+        cursor = cache.cursor_for(sql)
+        try:
+            cursor.execute(sql, tuple(params) if params else ())
+            if cursor.with_rows:
+                columns = cursor.column_names
+                rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            else:
+                rows = None
+                conn.commit()
+            return {'rows': rows, 'rowcount': cursor.rowcount, 'lastrowid': cursor.lastrowid}
+        except mysql.connector.Error as e:
+            cache.drop(sql)
+            if attempt == 1 and e.errno == 1243:  # ER_UNKNOWN_STMT_HANDLER
+                continue
+            conn.rollback()
+            raise
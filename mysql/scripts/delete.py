@@ -1,27 +1,17 @@
 #!/usr/bin/env python3
 """
 MySQL Delete - Python 腳本
-刪除 MySQL 資料表中的記錄
+刪除 MySQL 資料表中的記錄，支援以 ID 列表批次刪除
 """
 
-import os
 import sys
+import time
 import mysql.connector
 
-def get_connection():
-    """建立資料庫連線"""
-    try:
-        conn = mysql.connector.connect(
-            host=os.environ.get('MYSQL_HOST', '165.154.226.78'),
-            port=int(os.environ.get('MYSQL_PORT', 3306)),
-            user=os.environ.get('MYSQL_USER', 'n8n'),
-            password=os.environ.get('MYSQL_PASSWORD', '!!asshole!!asshole'),
-            database=os.environ.get('MYSQL_DATABASE', 'infoCollection')
-        )
-        return conn
-    except mysql.connector.Error as e:
-        print(f"資料庫連線失敗: {e}", file=sys.stderr)
-        sys.exit(1)
+import mysql_api
+from db_pool import connection
+from query_cache import invalidate_tables
+from batch_utils import DEFAULT_CHUNK_SIZE, read_ids, chunked, pop_option, format_summary
 
 def delete_record(table, record_id):
     """
@@ -34,30 +24,86 @@ def delete_record(table, record_id):
     Returns:
         受影響的行數
     """
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
+    try:
+        return mysql_api.delete(table, record_id)
+    except mysql.connector.Error as e:
+        print(f"刪除失敗: {e}", file=sys.stderr)
+        sys.exit(1)
+
+def delete_records(table, ids, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    以 `WHERE id IN (...)` 分段批次刪除，所有分段在同一個交易內
+
+    Args:
+        table: 資料表名稱
+        ids: 記錄 ID 列表
+        chunk_size: 每條語句的 ID 數量
+
+    Returns:
+        {'affected': 受影響行數, 'ids': ID 數, 'statements': 語句數,
+         'elapsed': 秒數, 'ids_per_sec': 每秒筆數}
+    """
+    summary = {'affected': 0, 'ids': len(ids), 'statements': 0}
+    started = time.perf_counter()
+
+    with connection() as conn:
+        cursor = conn.cursor()
+        try:
+            for chunk in chunked(ids, chunk_size):
+                placeholders = ', '.join(['%s'] * len(chunk))
+                cursor.execute(f"DELETE FROM {table} WHERE id IN ({placeholders})", tuple(chunk))
+                summary['affected'] += cursor.rowcount
+                summary['statements'] += 1
+            conn.commit()
+        except mysql.connector.Error:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    invalidate_tables(table)
+
+    elapsed = time.perf_counter() - started
+    summary['elapsed'] = round(elapsed, 3)
+    summary['ids_per_sec'] = round(len(ids) / elapsed, 1) if elapsed > 0 else 0.0
+    return summary
 
+def batch_main(args):
     try:
-        sql = f"DELETE FROM {table} WHERE id = %s"
-        cursor.execute(sql, (record_id,))
-        conn.commit()
+        chunk_size = pop_option(args, '--chunk-size', DEFAULT_CHUNK_SIZE)
+        if len(args) < 2 or chunk_size < 1:
+            raise ValueError("需要 <table> <ids>，且 chunk-size 必須大於 0")
+        table = args[0]
+        ids = read_ids(args[1])
+    except (OSError, ValueError) as e:
+        print(f"錯誤: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if not ids:
+        print("沒有需要刪除的 ID")
+        return
 
-        affected_rows = cursor.rowcount
-        return affected_rows
+    try:
+        summary = delete_records(table, ids, chunk_size)
     except mysql.connector.Error as e:
-        conn.rollback()
-        print(f"刪除失敗: {e}", file=sys.stderr)
+        print(f"批次刪除失敗，已回滾: {e}", file=sys.stderr)
         sys.exit(1)
-    finally:
-        cursor.close()
-        conn.close()
+
+    print(format_summary("批次刪除", summary))
 
 def main():
+    if len(sys.argv) >= 2 and sys.argv[1] == '--ids':
+        batch_main(sys.argv[2:])
+        return
+
     if len(sys.argv) < 3:
         print("使用方法: python3 delete.py <table> <id>")
+        print("       python3 delete.py --ids <table> <id,id,...|file|-> [--chunk-size N]")
         print("範例:")
         print("  python3 delete.py users 5")
         print("  python3 delete.py products 10")
+        print("  python3 delete.py --ids content_history 12,13,14")
+        print("  python3 delete.py --ids content_history failed_ids.txt --chunk-size 1000")
         sys.exit(1)
 
     table = sys.argv[1]
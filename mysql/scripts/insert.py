@@ -1,28 +1,19 @@
 #!/usr/bin/env python3
 """
 MySQL Insert - Python 腳本
-插入新記錄到 MySQL 資料表
+插入新記錄到 MySQL 資料表，支援批次匯入（JSON Lines / JSON 陣列）
 """
 
-import os
 import sys
 import json
+import time
 import mysql.connector
 
-def get_connection():
-    """建立資料庫連線"""
-    try:
-        conn = mysql.connector.connect(
-            host=os.environ.get('MYSQL_HOST', '192.168.1.159'),
-            port=int(os.environ.get('MYSQL_PORT', 3306)),
-            user=os.environ.get('MYSQL_USER', 'n8n'),
-            password=os.environ.get('MYSQL_PASSWORD', '!!asshole!!asshole'),
-            database=os.environ.get('MYSQL_DATABASE', 'infoCollection')
-        )
-        return conn
-    except mysql.connector.Error as e:
-        print(f"資料庫連線失敗: {e}", file=sys.stderr)
-        sys.exit(1)
+import mysql_api
+from db_pool import connection
+from query_cache import invalidate_tables
+
+DEFAULT_BATCH_SIZE = 500
 
 def insert_record(table, data):
     """
@@ -35,33 +26,183 @@ def insert_record(table, data):
     Returns:
         插入的記錄 ID
     """
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
+    try:
+        return mysql_api.insert(table, data)
+    except mysql.connector.Error as e:
+        print(f"插入失敗: {e}", file=sys.stderr)
+        sys.exit(1)
+
+def read_rows(source):
+    """
+    讀取批次資料，自動判斷 JSON 陣列或 JSON Lines
+
+    Args:
+        source: 檔案物件
+
+    Returns:
+        字典列表
+    """
+    text = source.read()
+    stripped = text.lstrip()
+    if not stripped:
+        return []
+
+    if stripped.startswith('['):
+        rows = json.loads(stripped)
+    else:
+        rows = []
+        for line_no, line in enumerate(text.splitlines(), 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rows.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                raise ValueError(f"第 {line_no} 行 JSON 解析失敗: {e}")
+
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            raise ValueError(f"第 {index + 1} 筆資料必須是 JSON 物件格式")
+    return rows
+
+def group_by_columns(rows):
+    """
+    依欄位組合分組，同一組的資料可用同一條 INSERT 語句
+
+    Returns:
+        [(欄位列表, 值 tuple 列表), ...]，依首次出現順序排列
+    """
+    groups = {}
+    for row in rows:
+        key = frozenset(row.keys())
+        if key not in groups:
+            groups[key] = (list(row.keys()), [])
+        columns, values = groups[key]
+        values.append(tuple(row[c] for c in columns))
+    return list(groups.values())
+
+def bulk_insert(table, rows, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    批次插入記錄，每批一次 executemany 與一次 commit
+
+    單一批次失敗只回滾該批次並記錄錯誤，不會中斷整體匯入。
+
+    Args:
+        table: 資料表名稱
+        rows: 字典列表
+        batch_size: 每批筆數
+
+    Returns:
+        {'inserted': 成功筆數, 'failed': 失敗筆數, 'batches': 批次數,
+         'elapsed': 秒數, 'rows_per_sec': 每秒筆數, 'errors': 失敗批次列表}
+    """
+    summary = {'inserted': 0, 'failed': 0, 'batches': 0, 'errors': []}
+    started = time.perf_counter()
+
+    with connection() as conn:
+        cursor = conn.cursor()
+        try:
+            for columns, values in group_by_columns(rows):
+                placeholders = ', '.join(['%s'] * len(columns))
+                sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+
+                for offset in range(0, len(values), batch_size):
+                    batch = values[offset:offset + batch_size]
+                    summary['batches'] += 1
+                    try:
+                        cursor.executemany(sql, batch)
+                        conn.commit()
+                        summary['inserted'] += len(batch)
+                    except mysql.connector.Error as e:
+                        conn.rollback()
+                        summary['failed'] += len(batch)
+                        summary['errors'].append({
+                            'batch': summary['batches'],
+                            'columns': columns,
+                            'rows': len(batch),
+                            'error': str(e)
+                        })
+        finally:
+            cursor.close()
+
+    if summary['inserted']:
+        invalidate_tables(table)
+
+    elapsed = time.perf_counter() - started
+    summary['elapsed'] = round(elapsed, 3)
+    summary['rows_per_sec'] = round(summary['inserted'] / elapsed, 1) if elapsed > 0 else 0.0
+    return summary
+
+def parse_bulk_args(args):
+    """解析 --bulk 模式的參數: <table> [file] [--batch-size N]"""
+    batch_size = DEFAULT_BATCH_SIZE
+    positional = []
+    i = 0
+    while i < len(args):
+        if args[i] == '--batch-size' and i + 1 < len(args):
+            batch_size = int(args[i + 1])
+            i += 2
+            continue
+        positional.append(args[i])
+        i += 1
+
+    if not positional or batch_size < 1:
+        raise ValueError("需要資料表名稱，且 batch-size 必須大於 0")
+
+    table = positional[0]
+    path = positional[1] if len(positional) > 1 and positional[1] != '-' else None
+    return table, path, batch_size
+
+def bulk_main(args):
+    try:
+        table, path, batch_size = parse_bulk_args(args)
+    except ValueError as e:
+        print(f"錯誤: {e}", file=sys.stderr)
+        sys.exit(1)
 
     try:
-        columns = ', '.join(data.keys())
-        placeholders = ', '.join(['%s'] * len(data))
-        sql = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
+        if path:
+            with open(path, 'r', encoding='utf-8') as f:
+                rows = read_rows(f)
+        else:
+            rows = read_rows(sys.stdin)
+    except (OSError, ValueError) as e:
+        print(f"讀取資料失敗: {e}", file=sys.stderr)
+        sys.exit(1)
 
-        cursor.execute(sql, tuple(data.values()))
-        conn.commit()
+    if not rows:
+        print("沒有需要插入的資料")
+        return
 
-        insert_id = cursor.lastrowid
-        return insert_id
+    try:
+        summary = bulk_insert(table, rows, batch_size)
     except mysql.connector.Error as e:
-        conn.rollback()
-        print(f"插入失敗: {e}", file=sys.stderr)
+        print(f"批次插入失敗: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"批次插入完成: 成功 {summary['inserted']} 筆，失敗 {summary['failed']} 筆，"
+          f"共 {summary['batches']} 批，耗時 {summary['elapsed']} 秒（{summary['rows_per_sec']} 筆/秒）")
+
+    for error in summary['errors']:
+        print(f"  第 {error['batch']} 批失敗（{error['rows']} 筆，欄位 {', '.join(error['columns'])}）: {error['error']}",
+              file=sys.stderr)
+
+    if summary['failed']:
         sys.exit(1)
-    finally:
-        cursor.close()
-        conn.close()
 
 def main():
+    if len(sys.argv) >= 3 and sys.argv[1] == '--bulk':
+        bulk_main(sys.argv[2:])
+        return
+
     if len(sys.argv) < 3:
         print("使用方法: python3 insert.py <table> <data>")
+        print("       python3 insert.py --bulk <table> [file|-] [--batch-size N]")
         print("範例:")
         print('  python3 insert.py users \'{"name":"John","email":"john@example.com","age":25}\'')
         print('  python3 insert.py products \'{"name":"Product A","price":99.99}\'')
+        print('  python3 insert.py --bulk content_history rows.jsonl --batch-size 1000')
+        print('  cat rows.json | python3 insert.py --bulk content_history')
         sys.exit(1)
 
     table = sys.argv[1]
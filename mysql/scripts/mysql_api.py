@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+MySQL Python API - Python 模組
+mysql 技能的程式內呼叫介面，取代以 subprocess 執行 query.py / insert.py 再解析 stdout
+
+所有函式共用 db_pool 連線池（daemon 啟動時亦會經由 daemon），失敗時拋出 mysql.connector.Error，
+寫入後自動清除 query_cache 中相關資料表的快取。
+
+範例:
+    import sys
+    sys.path.insert(0, 'skills/mysql/scripts')
+    import mysql_api
+
+    rows = mysql_api.query("SELECT * FROM content_history WHERE topic LIKE %s LIMIT %s", ('%AI%', 5))
+    new_id = mysql_api.insert('content_history', {'topic': 'AI', 'platform': 'facebook', 'content': '...'})
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from db_pool import execute, translate_placeholders
+from query_cache import QueryCache, is_cacheable, extract_tables, invalidate_tables
+
+Row = Dict[str, Any]
+
+
+def query(sql: str, params: Optional[Sequence] = None,
+          use_cache: bool = False, ttl: Optional[float] = None,
+          prepared: bool = False) -> List[Row]:
+    """
+    執行查詢並回傳字典列表
+
+    Args:
+        sql: SQL 語句，參數以 %s 或 ? 標示
+        params: 查詢參數
+        use_cache: 是否使用本地查詢快取（只對唯讀語句生效）
+        ttl: 快取有效秒數
+        prepared: 使用伺服器端 prepared statement 並快取於連線上，適合重複執行的參數化查詢
+
+    Returns:
+        查詢結果；非查詢語句回傳空列表
+    """
+    cache = QueryCache(ttl=ttl) if use_cache and is_cacheable(sql) else None
+    if cache:
+        cached = cache.get(sql, params)
+        if cached is not None:
+            return cached
+
+    # prepared cursor 原生支援 ? 佔位符，一般 cursor 需轉為 %s
+    statement = translate_placeholders(sql) if params and not prepared else sql
+    result = execute(statement, params, prepared=prepared)
+    if result['rows'] is None:
+        invalidate_tables(*extract_tables(sql))
+        return []
+
+    if cache:
+        cache.put(sql, params, result['rows'])
+    return result['rows']
+
+
+def query_one(sql: str, params: Optional[Sequence] = None,
+              use_cache: bool = False, prepared: bool = False) -> Optional[Row]:
+    """執行查詢並回傳第一筆結果"""
+    rows = query(sql, params, use_cache=use_cache, prepared=prepared)
+    return rows[0] if rows else None
+
+
+def insert(table: str, data: Row) -> int:
+    """插入一筆記錄，回傳新記錄 ID"""
+    columns = ', '.join(data.keys())
+    placeholders = ', '.join(['%s'] * len(data))
+    sql = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
+
+    result = execute(sql, tuple(data.values()))
+    invalidate_tables(table)
+    return result['lastrowid']
+
+
+def update(table: str, record_id: int, data: Row) -> int:
+    """依 ID 更新一筆記錄，回傳受影響行數"""
+    set_clause = ', '.join([f"{k} = %s" for k in data.keys()])
+    sql = f"UPDATE {table} SET {set_clause} WHERE id = %s"
+
+    result = execute(sql, tuple(data.values()) + (record_id,))
+    invalidate_tables(table)
+    return result['rowcount']
+
+
+def delete(table: str, record_id: int) -> int:
+    """依 ID 刪除一筆記錄，回傳受影響行數"""
+    result = execute(f"DELETE FROM {table} WHERE id = %s", (record_id,))
+    invalidate_tables(table)
+    return result['rowcount']
+
+
+def insert_many(table: str, rows: List[Row], batch_size: int = 500) -> Dict[str, Any]:
+    """批次插入（見 insert.bulk_insert），回傳筆數、失敗批次與吞吐量摘要"""
+    from insert import bulk_insert
+    return bulk_insert(table, rows, batch_size)
+
+
+def update_many(table: str, ids: List[int], data: Row, chunk_size: int = 500) -> Dict[str, Any]:
+    """將相同資料套用到多個 ID（見 update.update_records）"""
+    from update import update_records
+    return update_records(table, ids, data, chunk_size)
+
+
+def update_rows(table: str, rows: Iterable[Tuple[int, Row]], chunk_size: int = 500) -> Dict[str, Any]:
+    """每筆記錄各自的更新資料（見 update.update_rows）"""
+    from update import update_rows as _update_rows
+    return _update_rows(table, list(rows), chunk_size)
+
+
+def delete_many(table: str, ids: List[int], chunk_size: int = 500) -> Dict[str, Any]:
+    """依 ID 列表批次刪除（見 delete.delete_records）"""
+    from delete import delete_records
+    return delete_records(table, ids, chunk_size)
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+MySQL Pool Daemon - Python 腳本
+常駐背景程序，持有已暖機的連線池，讓重複的 CLI 呼叫不需重新連線
+
+query.py / insert.py / update.py / delete.py 偵測到 daemon 的 socket 時
+會自動把語句交給 daemon 執行，否則退回本地連線池。
+"""
+
+import os
+import sys
+import json
+import signal
+import socket
+import socketserver
+import mysql.connector
+
+from db_pool import config_fingerprint, get_pool, get_socket_path, run_statement, run_prepared
+
+
+class StatementHandler(socketserver.StreamRequestHandler):
+    """處理單一請求：讀取一行 JSON，回傳一行 JSON"""
+
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            self._reply({'error': f"JSON 解析失敗: {e}"})
+            return
+
+        if request.get('command') == 'status':
+            self._reply({'status': 'running', 'pid': os.getpid(), 'pool': self.server.pool.stats()})
+            return
+
+        pool = self.server.pool
+        # 用戶端的 MYSQL_* 設定與 daemon 不同：不可代為執行（用戶端會改用本地連線池）
+        if request.get('config') != self.server.fingerprint:
+            self._reply({'mismatch': True})
+            return
+
+        try:
+            conn = pool.acquire()
+        except mysql.connector.Error as e:
+            self._reply({'error': f"資料庫連線失敗: {e}", 'errno': e.errno})
+            return
+
+        try:
+            params = request.get('params')
+            if params and not request.get('many'):
+                params = tuple(params) if isinstance(params, list) else params
+            elif params:
+                params = [tuple(p) if isinstance(p, list) else p for p in params]
+            if request.get('prepared') and not request.get('many'):
+                result = run_prepared(conn, request['sql'], params)
+            else:
+                result = run_statement(conn, request['sql'], params, request.get('many', False))
+            self._reply(result)
+        except mysql.connector.Error as e:
+            self._reply({'error': str(e), 'errno': e.errno})
+        finally:
+            pool.release(conn)
+
+    def _reply(self, payload):
+        data = json.dumps(payload, ensure_ascii=False, default=str)
+        self.wfile.write(data.encode('utf-8') + b'\n')
+
+
+class PoolServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, pool):
+        self.pool = pool
+        self.fingerprint = config_fingerprint(pool.config)
+        super().__init__(path, StatementHandler)
+
+
+def send_command(command):
+    """傳送控制指令給 daemon"""
+    path = get_socket_path()
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        sock.sendall(json.dumps({'command': command}).encode('utf-8') + b'\n')
+        with sock.makefile('rb') as reader:
+            return json.loads(reader.readline())
+
+
+def start():
+    """啟動 daemon（前景執行，可搭配 nohup / systemd）"""
+    path = get_socket_path()
+    if os.path.exists(path):
+        try:
+            status = send_command('status')
+            print(f"daemon 已在執行中 (pid {status['pid']})")
+            return
+        except (OSError, ValueError):
+            os.unlink(path)
+
+    pool = get_pool()
+    # bind 時即以 0600 建立 socket，避免建立後才 chmod 的空檔
+    old_umask = os.umask(0o177)
+    try:
+        server = PoolServer(path, pool)
+    finally:
+        os.umask(old_umask)
+
+    def shutdown(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, shutdown)
+
+    print(f"MySQL pool daemon 已啟動: {path} (pid {os.getpid()}, 連線池大小 {pool.size})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.close_all()
+        if os.path.exists(path):
+            os.unlink(path)
+        print("MySQL pool daemon 已停止")
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ('start', 'status', 'stop'):
+        print("使用方法: python3 pool_daemon.py <start|status|stop>")
+        print("範例:")
+        print("  nohup python3 pool_daemon.py start &")
+        print("  python3 pool_daemon.py status")
+        sys.exit(1)
+
+    command = sys.argv[1]
+
+    if command == 'start':
+        start()
+        return
+
+    try:
+        status = send_command('status')
+    except (OSError, ValueError):
+        print("daemon 未執行")
+        sys.exit(1)
+
+    if command == 'status':
+        print(json.dumps(status, indent=2, ensure_ascii=False))
+    else:
+        os.kill(status['pid'], signal.SIGTERM)
+        print(f"已停止 daemon (pid {status['pid']})")
+
+
+if __name__ == "__main__":
+    main()
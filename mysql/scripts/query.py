@@ -1,70 +1,158 @@
 #!/usr/bin/env python3
 """
 MySQL Query - Python 腳本
-執行 MySQL SELECT 查詢並返回結果
+執行 MySQL SELECT 查詢並返回結果，支援以 JSON Lines / CSV 串流輸出大量結果
 """
 
-import os
 import sys
+import csv
 import json
 import mysql.connector
 
-def get_connection():
-    """建立資料庫連線"""
-    try:
-        conn = mysql.connector.connect(
-            host=os.environ.get('MYSQL_HOST', '192.168.1.159'),
-            port=int(os.environ.get('MYSQL_PORT', 3306)),
-            user=os.environ.get('MYSQL_USER', 'n8n'),
-            password=os.environ.get('MYSQL_PASSWORD', '!!asshole!!asshole'),
-            database=os.environ.get('MYSQL_DATABASE', 'infoCollection')
-        )
-        return conn
-    except mysql.connector.Error as e:
-        print(f"資料庫連線失敗: {e}", file=sys.stderr)
-        sys.exit(1)
+import mysql_api
+from db_pool import connection, translate_placeholders
+from query_cache import is_enabled
+
+DEFAULT_CHUNK_SIZE = 1000
+STREAM_FORMATS = ('jsonl', 'csv')
 
-def execute_query(sql, params=None):
+def execute_query(sql, params=None, use_cache=False, ttl=None, prepared=False):
     """
     執行查詢並返回結果
 
     Args:
         sql: SQL 查詢語句
         params: 查詢參數（可選）
+        use_cache: 是否使用本地查詢快取（只對唯讀語句生效）
+        ttl: 快取有效秒數（可選，預設讀取 MYSQL_QUERY_CACHE_TTL）
+        prepared: 使用 prepared statement（可選）
 
     Returns:
         查詢結果列表
     """
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-
     try:
-        if params:
-            cursor.execute(sql, params)
-        else:
-            cursor.execute(sql)
-
-        results = cursor.fetchall()
-        return results
+        return mysql_api.query(sql, params, use_cache=use_cache, ttl=ttl, prepared=prepared)
     except mysql.connector.Error as e:
         print(f"查詢執行失敗: {e}", file=sys.stderr)
         return []
-    finally:
-        cursor.close()
-        conn.close()
+
+def stream_query(sql, params=None, fmt='jsonl', chunk_size=DEFAULT_CHUNK_SIZE, out=None):
+    """
+    以非緩衝 cursor 串流輸出查詢結果
+
+    每次以 fetchmany 取出 chunk_size 筆後立即寫出，記憶體用量與結果筆數無關。
+
+    Args:
+        sql: SQL 查詢語句
+        params: 查詢參數（可選）
+        fmt: 輸出格式，jsonl 或 csv
+        chunk_size: 每次 fetchmany 的筆數
+        out: 輸出檔案物件（預設 stdout）
+
+    Returns:
+        輸出的總筆數
+    """
+    out = out or sys.stdout
+    total = 0
+
+    with connection() as conn:
+        cursor = conn.cursor(buffered=False)
+        try:
+            if params:
+                cursor.execute(translate_placeholders(sql), params)
+            else:
+                cursor.execute(sql)
+
+            columns = list(cursor.column_names)
+            writer = None
+            if fmt == 'csv':
+                writer = csv.writer(out)
+                writer.writerow(columns)
+
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+
+                for row in rows:
+                    if writer:
+                        writer.writerow(row)
+                    else:
+                        out.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=str) + '\n')
+                out.flush()
+                total += len(rows)
+        finally:
+            try:
+                cursor.close()
+            except mysql.connector.Error:
+                conn.close()
+
+    return total
+
+def parse_options(args):
+    """解析 SQL 前的選項: [--prepared] [--cache] [--ttl N] [--stream] [--format jsonl|csv] [--chunk-size N]"""
+    options = {'stream': False, 'format': 'jsonl', 'chunk_size': DEFAULT_CHUNK_SIZE,
+               'cache': is_enabled(), 'ttl': None, 'prepared': False}
+    while args and args[0].startswith('--'):
+        flag = args.pop(0)
+        if flag == '--prepared':
+            options['prepared'] = True
+        elif flag == '--cache':
+            options['cache'] = True
+        elif flag == '--no-cache':
+            options['cache'] = False
+        elif flag == '--ttl' and args:
+            options['ttl'] = float(args.pop(0))
+            options['cache'] = True
+        elif flag == '--stream':
+            options['stream'] = True
+        elif flag == '--format' and args:
+            options['format'] = args.pop(0)
+            options['stream'] = True
+        elif flag == '--chunk-size' and args:
+            options['chunk_size'] = int(args.pop(0))
+        else:
+            raise ValueError(f"未知的選項: {flag}")
+
+    if options['format'] not in STREAM_FORMATS:
+        raise ValueError(f"不支援的格式: {options['format']}（可用: {', '.join(STREAM_FORMATS)}）")
+    if options['chunk_size'] < 1:
+        raise ValueError("chunk-size 必須大於 0")
+    return options, args
 
 def main():
-    if len(sys.argv) < 2:
-        print("使用方法: python3 query.py <sql> [params...]")
+    try:
+        options, args = parse_options(sys.argv[1:])
+    except ValueError as e:
+        print(f"錯誤: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if not args:
+        print("使用方法: python3 query.py [--prepared] [--cache] [--ttl N] [--stream] [--format jsonl|csv] [--chunk-size N] <sql> [params...]")
         print("範例:")
         print('  python3 query.py "SELECT * FROM users"')
         print('  python3 query.py "SELECT * FROM users WHERE age > ?" 18')
+        print('  python3 query.py --prepared "SELECT * FROM channal_info WHERE channal_id = ?" 3')
+        print('  python3 query.py --cache --ttl 600 "SELECT * FROM channal_info WHERE channal_id = %s" 3')
+        print('  python3 query.py --stream "SELECT * FROM content_history" > history.jsonl')
+        print('  python3 query.py --format csv --chunk-size 5000 "SELECT * FROM content_history" > history.csv')
         sys.exit(1)
 
-    sql = sys.argv[1]
-    params = sys.argv[2:] if len(sys.argv) > 2 else None
+    sql = args[0]
+    params = args[1:] if len(args) > 1 else None
+
+    if options['stream']:
+        try:
+            stream_query(sql, params, options['format'], options['chunk_size'])
+        except mysql.connector.Error as e:
+            print(f"查詢執行失敗: {e}", file=sys.stderr)
+            sys.exit(1)
+        except BrokenPipeError:
+            sys.stderr.close()
+        return
 
-    results = execute_query(sql, params)
+    results = execute_query(sql, params, use_cache=options['cache'], ttl=options['ttl'],
+                            prepared=options['prepared'])
 
     if results:
         print(json.dumps(results, indent=2, ensure_ascii=False, default=str))
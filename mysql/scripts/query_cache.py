@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+MySQL Query Cache - Python 模組
+query.py 的查詢結果快取，以 SQLite 檔案保存，可跨 CLI 程序共用
+
+快取鍵為正規化後的 SQL + 參數 + 連線目標，支援 TTL 與 LRU 筆數上限。
+insert.py / update.py / delete.py 寫入資料表時會自動清除該資料表相關的快取。
+
+環境變數:
+  MYSQL_QUERY_CACHE          設為 1 時 query.py 預設啟用快取
+  MYSQL_QUERY_CACHE_PATH     快取檔案路徑（預設 ~/.cache/mysql-skill/query_cache.db）
+  MYSQL_QUERY_CACHE_TTL      快取有效秒數（預設 300）
+  MYSQL_QUERY_CACHE_MAX      最多保留的查詢筆數（預設 1000）
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+
+from db_pool import get_config
+
+DEFAULT_TTL = 300
+DEFAULT_MAX_ENTRIES = 1000
+
+TABLE_PATTERN = re.compile(
+    r'\b(?:FROM|JOIN|INTO|UPDATE|TABLE)\s+((?:`[^`]+`|\w+)(?:\.(?:`[^`]+`|\w+))?)',
+    re.IGNORECASE
+)
+
+
+def get_cache_path():
+    """取得快取檔案路徑"""
+    default = os.path.join(os.path.expanduser('~'), '.cache', 'mysql-skill', 'query_cache.db')
+    return os.environ.get('MYSQL_QUERY_CACHE_PATH', default)
+
+
+def is_enabled():
+    """環境變數是否預設啟用快取"""
+    return os.environ.get('MYSQL_QUERY_CACHE', '0') == '1'
+
+
+def normalize_sql(sql):
+    """正規化 SQL：合併空白、去除結尾分號"""
+    return ' '.join(sql.split()).rstrip(';').strip()
+
+
+def extract_tables(sql):
+    """
+    從 SQL 取出涉及的資料表名稱（小寫、去除反引號與資料庫前綴）
+
+    範例:
+        extract_tables("SELECT * FROM `db`.users u JOIN orders o ON ...") -> {'users', 'orders'}
+    """
+    tables = set()
+    for match in TABLE_PATTERN.finditer(sql):
+        name = match.group(1).split('.')[-1].strip('`').lower()
+        if name.upper() not in ('SELECT', 'DUAL'):
+            tables.add(name)
+    return tables
+
+
+def is_cacheable(sql):
+    """只快取 SELECT / SHOW / DESCRIBE 類的唯讀語句"""
+    first = normalize_sql(sql).split(' ', 1)[0].upper()
+    return first in ('SELECT', 'SHOW', 'DESCRIBE', 'DESC', 'WITH')
+
+
+class QueryCache:
+    """
+    以 SQLite 保存的查詢結果快取
+
+    Args:
+        path: 快取檔案路徑
+        ttl: 有效秒數
+        max_entries: LRU 上限筆數
+    """
+
+    def __init__(self, path=None, ttl=None, max_entries=None):
+        self.path = path or get_cache_path()
+        self.ttl = ttl if ttl is not None else float(os.environ.get('MYSQL_QUERY_CACHE_TTL', DEFAULT_TTL))
+        self.max_entries = max_entries or int(os.environ.get('MYSQL_QUERY_CACHE_MAX', DEFAULT_MAX_ENTRIES))
+        self._conn = None
+
+    def _db(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript('''
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    sql TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS entry_tables (
+                    key TEXT NOT NULL,
+                    table_name TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_entry_tables_name ON entry_tables (table_name);
+                CREATE INDEX IF NOT EXISTS idx_entry_tables_key ON entry_tables (key);
+                CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at);
+            ''')
+        return self._conn
+
+    @staticmethod
+    def make_key(sql, params=None):
+        """快取鍵：連線目標 + 正規化 SQL + 參數"""
+        config = get_config()
+        target = f"{config['host']}:{config['port']}/{config['database']}"
+        raw = json.dumps([target, normalize_sql(sql), list(params) if params else None],
+                         ensure_ascii=False, default=str)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, sql, params=None):
+        """取得快取結果，未命中或已過期時回傳 None"""
+        db = self._db()
+        key = self.make_key(sql, params)
+        row = db.execute('SELECT payload, created_at FROM entries WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+
+        now = time.time()
+        if now - row[1] > self.ttl:
+            self._delete_keys(db, [key])
+            return None
+
+        db.execute('UPDATE entries SET accessed_at = ? WHERE key = ?', (now, key))
+        return json.loads(row[0])
+
+    def put(self, sql, params, rows):
+        """寫入快取並依 LRU 淘汰超出上限的項目"""
+        db = self._db()
+        key = self.make_key(sql, params)
+        now = time.time()
+        payload = json.dumps(rows, ensure_ascii=False, default=str)
+
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            db.execute('DELETE FROM entry_tables WHERE key = ?', (key,))
+            db.execute(
+                'INSERT OR REPLACE INTO entries (key, sql, payload, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)',
+                (key, normalize_sql(sql), payload, now, now)
+            )
+            db.executemany('INSERT INTO entry_tables (key, table_name) VALUES (?, ?)',
+                           [(key, t) for t in extract_tables(sql)])
+
+            overflow = db.execute('SELECT COUNT(*) FROM entries').fetchone()[0] - self.max_entries
+            if overflow > 0:
+                stale = [r[0] for r in db.execute(
+                    'SELECT key FROM entries ORDER BY accessed_at ASC LIMIT ?', (overflow,))]
+                self._delete_keys(db, stale)
+            db.execute('COMMIT')
+        except sqlite3.Error:
+            db.execute('ROLLBACK')
+            raise
+
+    def invalidate(self, table):
+        """清除涉及指定資料表的所有快取，回傳清除筆數"""
+        db = self._db()
+        keys = [r[0] for r in db.execute(
+            'SELECT DISTINCT key FROM entry_tables WHERE table_name = ?', (table.strip('`').lower(),))]
+        self._delete_keys(db, keys)
+        return len(keys)
+
+    def clear(self):
+        """清除全部快取"""
+        db = self._db()
+        db.execute('DELETE FROM entries')
+        db.execute('DELETE FROM entry_tables')
+
+    def stats(self):
+        """回傳快取狀態"""
+        db = self._db()
+        count = db.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+        return {'path': self.path, 'entries': count, 'ttl': self.ttl, 'max_entries': self.max_entries}
+
+    @staticmethod
+    def _delete_keys(db, keys):
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            marks = ', '.join(['?'] * len(chunk))
+            db.execute(f'DELETE FROM entries WHERE key IN ({marks})', chunk)
+            db.execute(f'DELETE FROM entry_tables WHERE key IN ({marks})', chunk)
+
+
+def invalidate_tables(*tables):
+    """
+    寫入後呼叫：清除指定資料表的快取
+
+    快取檔案不存在時直接略過，不影響未使用快取的環境。
+    """
+    if not os.path.exists(get_cache_path()):
+        return
+    try:
+        cache = QueryCache()
+        for table in tables:
+            cache.invalidate(table)
+    except sqlite3.Error as e:
+        print(f"警告: 清除查詢快取失敗: {e}", file=sys.stderr)
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ('stats', 'clear', 'invalidate'):
+        print("使用方法: python3 query_cache.py <stats|clear|invalidate> [table...]")
+        print("範例:")
+        print("  python3 query_cache.py stats")
+        print("  python3 query_cache.py invalidate channal_info")
+        sys.exit(1)
+
+    cache = QueryCache()
+    command = sys.argv[1]
+    if command == 'stats':
+        print(json.dumps(cache.stats(), indent=2, ensure_ascii=False))
+    elif command == 'clear':
+        cache.clear()
+        print("已清除全部查詢快取")
+    else:
+        removed = sum(cache.invalidate(table) for table in sys.argv[2:])
+        print(f"已清除 {removed} 筆快取")
+
+
+if __name__ == "__main__":
+    main()
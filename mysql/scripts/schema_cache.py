@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+MySQL Schema Cache - Python 模組
+一次讀取 information_schema 中所有資料表的欄位資訊並保存為本地索引
+
+show_comments.py 從索引查詢欄位名稱、型別與說明，不需每次執行 SHOW FULL COLUMNS。
+索引會比對各資料表的欄位指紋（information_schema.COLUMNS 中欄位名稱、型別、
+NULL、鍵、預設值與說明的 MD5）與資料表清單，偵測到結構變更時自動重建。
+CREATE_TIME 不可靠：只改說明的 ALTER ... MODIFY ... COMMENT 與 MySQL 8 的
+INSTANT 加欄位都不會更新它。
+
+環境變數:
+  MYSQL_SCHEMA_CACHE_DIR        索引目錄（預設 ~/.cache/mysql-skill）
+  MYSQL_SCHEMA_CHECK_INTERVAL   兩次 DDL 檢查的最短間隔秒數（預設 60）
+"""
+
+import os
+import json
+import time
+import hashlib
+
+from db_pool import get_config, connection
+
+INDEX_VERSION = 3
+
+# 每個欄位一個 MD5，於 Python 依序合併成資料表指紋
+# （不用 GROUP_CONCAT：其長度上限需改 session 變數，會殘留在連線池的連線上）
+# QUOTE(NULL) 回傳 NULL 字樣，避免 CONCAT_WS 略過 NULL 造成欄位錯位
+TABLES_SQL = """
+SELECT TABLE_NAME, MD5(
+    CONCAT_WS(0x1f, COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE, COLUMN_KEY, QUOTE(COLUMN_DEFAULT), COLUMN_COMMENT))
+FROM information_schema.COLUMNS
+WHERE TABLE_SCHEMA = DATABASE()
+ORDER BY TABLE_NAME, ORDINAL_POSITION
+"""
+
+COLUMNS_SQL = """
+SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE, COLUMN_KEY, COLUMN_DEFAULT, COLUMN_COMMENT
+FROM information_schema.COLUMNS
+WHERE TABLE_SCHEMA = DATABASE()
+ORDER BY TABLE_NAME, ORDINAL_POSITION
+"""
+
+# 索引中每個欄位以列表保存，依序為下列欄位
+COLUMN_FIELDS = ('field', 'type', 'null', 'key', 'default', 'comment')
+
+
+def _text(value):
+    """information_schema 的值在部分驅動版本會是 bytes"""
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode('utf-8')
+    return value
+
+
+def get_index_path():
+    """依連線目標決定索引檔案路徑"""
+    config = get_config()
+    directory = os.environ.get('MYSQL_SCHEMA_CACHE_DIR',
+                               os.path.join(os.path.expanduser('~'), '.cache', 'mysql-skill'))
+    name = f"schema_{config['host']}_{config['port']}_{config['database']}.json"
+    return os.path.join(directory, name)
+
+
+class SchemaIndex:
+    """
+    資料表結構索引
+
+    Args:
+        path: 索引檔案路徑（預設依連線目標決定）
+        check_interval: 兩次 DDL 檢查的最短間隔秒數
+    """
+
+    def __init__(self, path=None, check_interval=None):
+        self.path = path or get_index_path()
+        self.check_interval = check_interval if check_interval is not None else \
+            float(os.environ.get('MYSQL_SCHEMA_CHECK_INTERVAL', 60))
+        self.data = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == INDEX_VERSION:
+                return data
+        except (OSError, ValueError):
+            pass
+        return None
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def _read_versions(cursor):
+        cursor.execute(TABLES_SQL)
+        digests = {}
+        for name, column_md5 in cursor.fetchall():
+            digests.setdefault(_text(name), hashlib.md5()).update(_text(column_md5).encode('ascii'))
+        return {name: digest.hexdigest() for name, digest in digests.items()}
+
+    def refresh(self):
+        """從 information_schema 重建整份索引（一次查詢讀取所有欄位）"""
+        with connection() as conn:
+            cursor = conn.cursor()
+            try:
+                versions = self._read_versions(cursor)
+                cursor.execute(COLUMNS_SQL)
+                tables = {name: {'version': version, 'columns': []} for name, version in versions.items()}
+                for row in cursor.fetchall():
+                    table = _text(row[0])
+                    column = [None if v is None else str(_text(v)) for v in row[1:]]
+                    tables.setdefault(table, {'version': None, 'columns': []})['columns'].append(column)
+            finally:
+                cursor.close()
+
+        now = time.time()
+        self.data = {'version': INDEX_VERSION, 'generated_at': now, 'checked_at': now, 'tables': tables}
+        self._save()
+        return self.data
+
+    def ensure_fresh(self, force=False):
+        """
+        確認索引與資料庫結構一致
+
+        距上次檢查未超過 check_interval 秒時直接使用索引；
+        否則只查詢各資料表的欄位指紋比對，有差異才重建。
+
+        Returns:
+            True 表示有重建索引
+        """
+        if force or self.data is None:
+            self.refresh()
+            return True
+
+        now = time.time()
+        if now - self.data.get('checked_at', 0) < self.check_interval:
+            return False
+
+        with connection() as conn:
+            cursor = conn.cursor()
+            try:
+                versions = self._read_versions(cursor)
+            finally:
+                cursor.close()
+
+        current = {name: info['version'] for name, info in self.data['tables'].items()}
+        if versions != current:
+            self.refresh()
+            return True
+
+        self.data['checked_at'] = now
+        self._save()
+        return False
+
+    def tables(self):
+        """回傳所有資料表名稱"""
+        return sorted(self.data['tables']) if self.data else []
+
+    def columns(self, table):
+        """
+        回傳資料表欄位資訊
+
+        Returns:
+            欄位字典列表（鍵見 COLUMN_FIELDS），資料表不存在時回傳 None
+        """
+        if not self.data:
+            return None
+
+        tables = self.data['tables']
+        info = tables.get(table)
+        if info is None:
+            matches = [name for name in tables if name.lower() == table.lower()]
+            if not matches:
+                return None
+            info = tables[matches[0]]
+        return [dict(zip(COLUMN_FIELDS, column)) for column in info['columns']]
+
+    def search(self, keyword):
+        """在欄位名稱與說明中搜尋關鍵字，回傳 [(table, column_dict), ...]"""
+        keyword = keyword.lower()
+        results = []
+        for table in self.tables():
+            for column in self.columns(table):
+                if keyword in column['field'].lower() or keyword in (column['comment'] or '').lower():
+                    results.append((table, column))
+        return results
@@ -1,74 +1,89 @@
 #!/usr/bin/env python3
 """
 MySQL Show Column Comments - Python 腳本
-顯示資料表的欄位說明
+顯示資料表的欄位說明（從本地結構索引查詢，結構變更時自動更新）
 """
 
-import os
 import sys
 import mysql.connector
 
-def get_connection():
-    """建立資料庫連線"""
-    try:
-        conn = mysql.connector.connect(
-            host=os.environ.get('MYSQL_HOST', '192.168.1.159'),
-            port=int(os.environ.get('MYSQL_PORT', 3306)),
-            user=os.environ.get('MYSQL_USER', 'n8n'),
-            password=os.environ.get('MYSQL_PASSWORD', '!!asshole!!asshole'),
-            database=os.environ.get('MYSQL_DATABASE', 'infoCollection')
-        )
-        return conn
-    except mysql.connector.Error as e:
-        print(f"資料庫連線失敗: {e}", file=sys.stderr)
-        sys.exit(1)
+from schema_cache import SchemaIndex
 
-def show_column_comments(table):
-    """顯示資料表欄位說明"""
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
+def print_columns(table, columns):
+    """輸出欄位說明"""
+    print(f"\n{'='*80}")
+    print(f"資料表: {table} 的欄位說明")
+    print(f"{'='*80}\n")
 
-    try:
-        sql = f"SHOW FULL COLUMNS FROM {table}"
-        cursor.execute(sql)
-        results = cursor.fetchall()
+    for column in columns:
+        print(f"欄位名稱: {column['field']}")
+        print(f"資料類型: {column['type']}")
+        print(f"可為空: {column['null']}")
+        print(f"鍵值: {column['key']}")
+        if column['default']:
+            print(f"預設值: {column['default']}")
+        print(f"說明: {column['comment'] if column['comment'] else '(無)'}")
+        print(f"{'-'*80}\n")
 
-        print(f"\n{'='*80}")
-        print(f"資料表: {table} 的欄位說明")
-        print(f"{'='*80}\n")
-
-        for row in results:
-            field = row['Field']
-            type_info = row['Type'].decode('utf-8') if isinstance(row['Type'], bytes) else row['Type']
-            comment = row['Comment'].decode('utf-8') if isinstance(row['Comment'], bytes) else row['Comment']
-            null = row['Null'].decode('utf-8') if isinstance(row['Null'], bytes) else row['Null']
-            key = row['Key'].decode('utf-8') if isinstance(row['Key'], bytes) else row['Key']
-            default = row['Default']
+def show_column_comments(table, refresh=False):
+    """顯示資料表欄位說明"""
+    try:
+        index = SchemaIndex()
+        rebuilt = index.ensure_fresh(force=refresh)
+        columns = index.columns(table)
 
-            print(f"欄位名稱: {field}")
-            print(f"資料類型: {type_info}")
-            print(f"可為空: {null}")
-            print(f"鍵值: {key}")
-            if default:
-                default_str = default.decode('utf-8') if isinstance(default, bytes) else str(default)
-                print(f"預設值: {default_str}")
-            print(f"說明: {comment if comment else '(無)'}")
-            print(f"{'-'*80}\n")
+        # 索引中找不到時可能是剛建立的資料表，重建一次再查
+        if columns is None and not rebuilt:
+            index.refresh()
+            columns = index.columns(table)
     except mysql.connector.Error as e:
         print(f"錯誤: {e}", file=sys.stderr)
-    finally:
-        cursor.close()
-        conn.close()
+        return
+
+    if columns is None:
+        print(f"錯誤: 找不到資料表 {table}", file=sys.stderr)
+        return
+
+    print_columns(table, columns)
+
+def list_tables(refresh=False):
+    """列出所有資料表與欄位數"""
+    index = SchemaIndex()
+    index.ensure_fresh(force=refresh)
+    for table in index.tables():
+        print(f"{table} ({len(index.columns(table))} 欄)")
+
+def search_columns(keyword, refresh=False):
+    """在所有資料表的欄位名稱與說明中搜尋"""
+    index = SchemaIndex()
+    index.ensure_fresh(force=refresh)
+    for table, column in index.search(keyword):
+        print(f"{table}.{column['field']}\t{column['type']}\t{column['comment'] or '(無)'}")
 
 def main():
-    if len(sys.argv) < 2:
-        print("使用方法: python3 show_comments.py <table>")
+    args = sys.argv[1:]
+    refresh = '--refresh' in args
+    args = [a for a in args if a != '--refresh']
+
+    if not args:
+        print("使用方法: python3 show_comments.py <table> [--refresh]")
+        print("       python3 show_comments.py --tables")
+        print("       python3 show_comments.py --search <keyword>")
         print("範例:")
         print("  python3 show_comments.py channal_info")
+        print("  python3 show_comments.py --search token")
         sys.exit(1)
 
-    table = sys.argv[1]
-    show_column_comments(table)
+    try:
+        if args[0] == '--tables':
+            list_tables(refresh)
+        elif args[0] == '--search' and len(args) > 1:
+            search_columns(args[1], refresh)
+        else:
+            show_column_comments(args[0], refresh)
+    except mysql.connector.Error as e:
+        print(f"錯誤: {e}", file=sys.stderr)
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+MySQL Table Transfer - Python 腳本
+以 gzip 壓縮的分段檔案匯出 / 匯入整張資料表，依主鍵水位線分段，中斷後可續傳
+
+檔案格式（gzip 壓縮的 JSON Lines）:
+  第一行   {"format": 1, "table": "...", "key": "id", "columns": [...]}
+  之後每行 {"last_key": 最後一筆主鍵, "rows": [[欄位值...], ...]}
+
+每一段只保存值陣列，不重複欄位名稱，並各自壓縮為一個完整的 gzip 成員（多成員檔案）。
+匯出進度記錄在 <file>.export.state，內容為最後完成的主鍵值與該段結束時的檔案位移，
+續傳時先截斷到此位移，丟棄中斷時寫到一半的成員。
+匯入進度記錄在目標資料庫的 _transfer_import_state 資料表，與每段資料在同一個交易內提交，
+因此中斷在任何時間點續傳都不會重複匯入（沒有唯一鍵的資料表也一樣）。
+"""
+
+import os
+import sys
+import json
+import gzip
+import zlib
+import time
+import base64
+import argparse
+import datetime
+import decimal
+import mysql.connector
+
+from db_pool import connection
+from query_cache import invalidate_tables
+
+FORMAT_VERSION = 1
+DEFAULT_CHUNK_SIZE = 5000
+IMPORT_MODES = {
+    'insert': 'INSERT INTO',
+    'ignore': 'INSERT IGNORE INTO',
+    'replace': 'REPLACE INTO'
+}
+
+# 匯入水位線與資料同一交易寫入；source 為匯出檔案的絕對路徑，last_key 為 JSON
+IMPORT_STATE_TABLE = '_transfer_import_state'
+IMPORT_STATE_DDL = f"""
+CREATE TABLE IF NOT EXISTS {IMPORT_STATE_TABLE} (
+    target_table VARCHAR(64) NOT NULL,
+    source VARCHAR(512) NOT NULL,
+    last_key TEXT NOT NULL,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (target_table, source)
+) ENGINE=InnoDB
+"""
+
+
+def _encode(value):
+    """JSON 無法直接表示的型別"""
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time, datetime.timedelta)):
+        return str(value)
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, (bytes, bytearray)):
+        try:
+            return bytes(value).decode('utf-8')
+        except UnicodeDecodeError:
+            return {'$base64': base64.b64encode(bytes(value)).decode('ascii')}
+    raise TypeError(f"無法序列化的型別: {type(value).__name__}")
+
+
+def _decode(value):
+    if isinstance(value, dict) and '$base64' in value:
+        return base64.b64decode(value['$base64'])
+    return value
+
+
+def _state_path(path, direction):
+    return f"{path}.{direction}.state"
+
+
+def _read_state(path, direction):
+    try:
+        with open(_state_path(path, direction), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_state(path, direction, state):
+    tmp_path = _state_path(path, direction) + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, default=_encode)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, _state_path(path, direction))
+
+
+def _read_import_state(cursor, table, source):
+    cursor.execute(f"SELECT last_key FROM {IMPORT_STATE_TABLE} WHERE target_table = %s AND source = %s",
+                   (table, source))
+    row = cursor.fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def _write_import_state(cursor, table, source, last_key):
+    """在目前交易內更新水位線（由呼叫端與該段資料一起 commit）"""
+    cursor.execute(
+        f"INSERT INTO {IMPORT_STATE_TABLE} (target_table, source, last_key) VALUES (%s, %s, %s) "
+        f"ON DUPLICATE KEY UPDATE last_key = VALUES(last_key)",
+        (table, source, json.dumps(last_key, ensure_ascii=False, default=_encode))
+    )
+
+
+def _write_member(out, line):
+    """將一行 JSON 寫成獨立且完整的 gzip 成員，並確保寫入磁碟"""
+    out.write(gzip.compress(line.encode('utf-8') + b'\n'))
+    out.flush()
+    os.fsync(out.fileno())
+
+
+def export_table(table, path, key='id', chunk_size=DEFAULT_CHUNK_SIZE, where=None, resume=False):
+    """
+    依主鍵順序分段匯出資料表
+
+    每段以 `WHERE key > 上次水位 ORDER BY key LIMIT chunk_size` 讀取，資料庫端不需維持長交易，
+    記憶體只保留一段資料。
+
+    Args:
+        table: 資料表名稱
+        path: 輸出檔案
+        key: 遞增主鍵欄位
+        chunk_size: 每段筆數
+        where: 額外篩選條件（SQL 片段，可選）
+        resume: 從 <path>.export.state 的水位線續傳
+
+    Returns:
+        {'rows': 本次匯出筆數, 'chunks': 段數, 'last_key': 最後主鍵, 'elapsed': 秒數}
+    """
+    state = _read_state(path, 'export') if resume and os.path.exists(path) else None
+    if state is not None and not 0 < state.get('offset', 0) <= os.path.getsize(path):
+        # 沒有位移（舊版記錄）或檔案比記錄短：無法確定哪些段完整
+        print("續傳記錄與檔案不符，從頭開始匯出", file=sys.stderr)
+        state = None
+    elif resume and state is None:
+        print("找不到續傳記錄，從頭開始匯出", file=sys.stderr)
+    watermark = state['last_key'] if state else None
+    mode = 'r+b' if state else 'wb'
+
+    summary = {'rows': 0, 'chunks': 0, 'last_key': watermark}
+    started = time.perf_counter()
+    condition = f" AND ({where})" if where else ""
+
+    with connection() as conn, open(path, mode) as out:
+        if state:
+            # 丟棄最後一次記錄之後寫入的資料（中斷時未完成的成員）
+            out.truncate(state['offset'])
+            out.seek(state['offset'])
+        cursor = conn.cursor()
+        try:
+            while True:
+                if watermark is None:
+                    sql = f"SELECT * FROM {table} WHERE 1=1{condition} ORDER BY {key} LIMIT %s"
+                    cursor.execute(sql, (chunk_size,))
+                else:
+                    sql = f"SELECT * FROM {table} WHERE {key} > %s{condition} ORDER BY {key} LIMIT %s"
+                    cursor.execute(sql, (watermark, chunk_size))
+
+                columns = list(cursor.column_names)
+                rows = cursor.fetchall()
+
+                if mode == 'wb' and summary['chunks'] == 0:
+                    header = {'format': FORMAT_VERSION, 'table': table, 'key': key, 'columns': columns}
+                    _write_member(out, json.dumps(header, ensure_ascii=False))
+
+                if not rows:
+                    break
+
+                key_index = columns.index(key)
+                watermark = rows[-1][key_index]
+                chunk = {'last_key': watermark, 'rows': [list(r) for r in rows]}
+                _write_member(out, json.dumps(chunk, ensure_ascii=False, default=_encode))
+                # 成員已完整落地後才記錄水位線與位移
+                _write_state(path, 'export', {'table': table, 'last_key': watermark, 'offset': out.tell()})
+
+                summary['rows'] += len(rows)
+                summary['chunks'] += 1
+                summary['last_key'] = watermark
+                print(f"  已匯出 {summary['rows']} 筆（{key} ≤ {watermark}）", file=sys.stderr)
+
+                if len(rows) < chunk_size:
+                    break
+        finally:
+            cursor.close()
+
+    summary['elapsed'] = round(time.perf_counter() - started, 3)
+    return summary
+
+
+def read_export(path):
+    """
+    讀取匯出檔案的表頭與分段
+
+    Yields:
+        (header, chunk)，chunk 為 {'last_key': ..., 'rows': [[...], ...]}
+    """
+    header = None
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            record = json.loads(line)
+            if 'format' in record:
+                if header is None:
+                    header = record
+                continue
+            if header is None:
+                raise ValueError("匯出檔案缺少表頭")
+            yield header, record
+
+
+def iter_rows(path):
+    """
+    以字典逐筆讀取匯出檔案，供離線分析使用（例如 ContentAnalyzer）
+
+    範例:
+        for row in iter_rows('content_history.jsonl.gz'):
+            analyzer.analyze(row['content'])
+    """
+    for header, chunk in read_export(path):
+        columns = header['columns']
+        for values in chunk['rows']:
+            yield dict(zip(columns, (_decode(v) for v in values)))
+
+
+def import_table(table, path, mode='insert', resume=False, columns=None):
+    """
+    將匯出檔案分段匯入資料表，每段一次 executemany 與一次 commit
+
+    Args:
+        table: 目標資料表（可與來源不同）
+        path: 匯出檔案
+        mode: insert / ignore / replace
+        resume: 略過 _transfer_import_state 記錄中已匯入的分段
+        columns: 只匯入指定欄位（可選）
+
+    Returns:
+        {'rows': 本次匯入筆數, 'chunks': 段數, 'skipped': 略過段數, 'last_key': 最後主鍵, 'elapsed': 秒數}
+    """
+    source = os.path.abspath(path)
+    started = time.perf_counter()
+    verb = IMPORT_MODES[mode]
+
+    with connection() as conn:
+        cursor = conn.cursor()
+        try:
+            # DDL 會隱含 commit，必須在第一段交易開始前執行
+            cursor.execute(IMPORT_STATE_DDL)
+            watermark = _read_import_state(cursor, table, source) if resume else None
+            conn.commit()
+            summary = {'rows': 0, 'chunks': 0, 'skipped': 0, 'last_key': watermark}
+
+            sql = None
+            indexes = None
+            for header, chunk in read_export(path):
+                if sql is None:
+                    selected = columns or header['columns']
+                    indexes = [header['columns'].index(c) for c in selected]
+                    placeholders = ', '.join(['%s'] * len(selected))
+                    sql = f"{verb} {table} ({', '.join(selected)}) VALUES ({placeholders})"
+
+                if watermark is not None and chunk['last_key'] <= watermark:
+                    summary['skipped'] += 1
+                    continue
+
+                values = [tuple(_decode(row[i]) for i in indexes) for row in chunk['rows']]
+                try:
+                    cursor.executemany(sql, values)
+                    _write_import_state(cursor, table, source, chunk['last_key'])
+                    conn.commit()
+                except mysql.connector.Error:
+                    conn.rollback()
+                    raise
+
+                summary['rows'] += len(values)
+                summary['chunks'] += 1
+                summary['last_key'] = chunk['last_key']
+                print(f"  已匯入 {summary['rows']} 筆（{header['key']} ≤ {chunk['last_key']}）", file=sys.stderr)
+        finally:
+            cursor.close()
+
+    if summary['rows']:
+        invalidate_tables(table)
+
+    summary['elapsed'] = round(time.perf_counter() - started, 3)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="以壓縮分段檔案匯出 / 匯入 MySQL 資料表（可續傳）")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    exp = sub.add_parser("export", help="匯出資料表")
+    exp.add_argument("table", help="資料表名稱")
+    exp.add_argument("file", help="輸出檔案（建議 .jsonl.gz）")
+    exp.add_argument("--key", default="id", help="遞增主鍵欄位（預設 id）")
+    exp.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help=f"每段筆數（預設 {DEFAULT_CHUNK_SIZE}）")
+    exp.add_argument("--where", help="額外篩選條件，例如 \"status = 'published'\"")
+    exp.add_argument("--resume", action="store_true", help="從上次中斷的水位線續傳")
+
+    imp = sub.add_parser("import", help="匯入資料表")
+    imp.add_argument("table", help="目標資料表名稱")
+    imp.add_argument("file", help="匯出檔案")
+    imp.add_argument("--mode", choices=list(IMPORT_MODES), default="insert",
+                     help="insert（預設）/ ignore（略過重複主鍵）/ replace（覆寫）")
+    imp.add_argument("--columns", help="只匯入指定欄位（逗號分隔）")
+    imp.add_argument("--resume", action="store_true", help="略過上次已匯入的分段")
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == "export":
+            if args.chunk_size < 1:
+                parser.error("--chunk-size 必須大於 0")
+            summary = export_table(args.table, args.file, args.key, args.chunk_size, args.where, args.resume)
+            print(f"匯出完成: {summary['rows']} 筆，{summary['chunks']} 段，"
+                  f"最後 {args.key} = {summary['last_key']}，耗時 {summary['elapsed']} 秒")
+        else:
+            columns = [c.strip() for c in args.columns.split(',')] if args.columns else None
+            summary = import_table(args.table, args.file, args.mode, args.resume, columns)
+            print(f"匯入完成: {summary['rows']} 筆，{summary['chunks']} 段（略過 {summary['skipped']} 段），"
+                  f"耗時 {summary['elapsed']} 秒")
+    except mysql.connector.Error as e:
+        print(f"資料庫錯誤: {e}（可使用 --resume 續傳）", file=sys.stderr)
+        sys.exit(1)
+    except (OSError, ValueError, EOFError, zlib.error) as e:
+        print(f"檔案錯誤: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,18 @@
 #!/usr/bin/env python3
 """
 MySQL Update - Python 腳本
-更新 MySQL 資料表中的記錄
+更新 MySQL 資料表中的記錄，支援以 ID 列表或 `id,data` 檔案批次更新
 """
 
-import os
 import sys
 import json
+import time
 import mysql.connector
 
-def get_connection():
-    """建立資料庫連線"""
-    try:
-        conn = mysql.connector.connect(
-            host=os.environ.get('MYSQL_HOST', '192.168.1.159'),
-            port=int(os.environ.get('MYSQL_PORT', 3306)),
-            user=os.environ.get('MYSQL_USER', 'n8n'),
-            password=os.environ.get('MYSQL_PASSWORD', '!!asshole!!asshole'),
-            database=os.environ.get('MYSQL_DATABASE', 'infoCollection')
-        )
-        return conn
-    except mysql.connector.Error as e:
-        print(f"資料庫連線失敗: {e}", file=sys.stderr)
-        sys.exit(1)
+import mysql_api
+from db_pool import connection
+from query_cache import invalidate_tables
+from batch_utils import DEFAULT_CHUNK_SIZE, read_ids, read_id_rows, chunked, pop_option, format_summary
 
 def update_record(table, record_id, data):
     """
@@ -36,33 +26,173 @@ def update_record(table, record_id, data):
     Returns:
         受影響的行數
     """
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
+    try:
+        return mysql_api.update(table, record_id, data)
+    except mysql.connector.Error as e:
+        print(f"更新失敗: {e}", file=sys.stderr)
+        sys.exit(1)
+
+def build_case_update(table, columns, rows):
+    """
+    建立以 CASE 區分每筆值的 UPDATE 語句
+
+    UPDATE t SET col = CASE id WHEN %s THEN %s ... ELSE col END, ... WHERE id IN (...)
+
+    Args:
+        table: 資料表名稱
+        columns: 欄位列表
+        rows: [(id, dict), ...]，每筆都包含 columns 中的欄位；同一 id 出現多次時以最後一筆為準
+
+    Returns:
+        (sql, params)
+    """
+    # CASE 取第一個符合的 WHEN，逐筆 UPDATE 則是最後一筆生效，因此先依 id 去重
+    rows = list(dict(rows).items())
+    set_parts = []
+    params = []
+    for column in columns:
+        whens = ' '.join(['WHEN %s THEN %s'] * len(rows))
+        set_parts.append(f"{column} = CASE id {whens} ELSE {column} END")
+        for record_id, data in rows:
+            params.extend((record_id, data[column]))
+
+    placeholders = ', '.join(['%s'] * len(rows))
+    params.extend(record_id for record_id, _ in rows)
+    sql = f"UPDATE {table} SET {', '.join(set_parts)} WHERE id IN ({placeholders})"
+    return sql, tuple(params)
+
+def run_batch(table, statements, id_count):
+    """
+    在同一個交易內執行多條語句，任一失敗則全部回滾
+
+    Args:
+        table: 資料表名稱（用於清除快取）
+        statements: 產生 (sql, params) 的可迭代物件
+        id_count: 涉及的 ID 數（用於計算吞吐量）
+    """
+    summary = {'affected': 0, 'ids': id_count, 'statements': 0}
+    started = time.perf_counter()
+
+    with connection() as conn:
+        cursor = conn.cursor()
+        try:
+            for sql, params in statements:
+                cursor.execute(sql, params)
+                summary['affected'] += cursor.rowcount
+                summary['statements'] += 1
+            conn.commit()
+        except mysql.connector.Error:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    invalidate_tables(table)
+
+    elapsed = time.perf_counter() - started
+    summary['elapsed'] = round(elapsed, 3)
+    summary['ids_per_sec'] = round(id_count / elapsed, 1) if elapsed > 0 else 0.0
+    return summary
+
+def update_records(table, ids, data, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    將相同的資料套用到多筆記錄，以 `WHERE id IN (...)` 分段執行
+
+    Returns:
+        批次結果摘要（見 run_batch）
+    """
+    set_clause = ', '.join([f"{k} = %s" for k in data.keys()])
+
+    def statements():
+        for chunk in chunked(ids, chunk_size):
+            placeholders = ', '.join(['%s'] * len(chunk))
+            sql = f"UPDATE {table} SET {set_clause} WHERE id IN ({placeholders})"
+            yield sql, tuple(data.values()) + tuple(chunk)
+
+    return run_batch(table, statements(), len(ids))
+
+def update_rows(table, rows, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    每筆記錄各自的更新資料，依欄位組合分組後以 CASE 語句分段執行
+
+    Args:
+        rows: [(id, dict), ...]；同一 id 出現多次時依序合併，結果與逐筆 UPDATE 相同
+
+    Returns:
+        批次結果摘要（見 run_batch）
+    """
+    merged = {}
+    for record_id, data in rows:
+        merged.setdefault(record_id, {}).update(data)
+
+    groups = {}
+    for record_id, data in merged.items():
+        key = frozenset(data.keys())
+        if key not in groups:
+            groups[key] = (list(data.keys()), [])
+        groups[key][1].append((record_id, data))
+
+    def statements():
+        for columns, group_rows in groups.values():
+            for chunk in chunked(group_rows, chunk_size):
+                yield build_case_update(table, columns, chunk)
+
+    return run_batch(table, statements(), len(merged))
 
+def batch_main(mode, args):
     try:
-        set_clause = ', '.join([f"{k} = %s" for k in data.keys()])
-        sql = f"UPDATE {table} SET {set_clause} WHERE id = %s"
+        chunk_size = pop_option(args, '--chunk-size', DEFAULT_CHUNK_SIZE)
+        if chunk_size < 1:
+            raise ValueError("chunk-size 必須大於 0")
 
-        values = tuple(data.values()) + (record_id,)
-        cursor.execute(sql, values)
-        conn.commit()
+        if mode == '--ids':
+            if len(args) < 3:
+                raise ValueError("需要 <table> <ids> <data>")
+            table = args[0]
+            ids = read_ids(args[1])
+            data = json.loads(args[2])
+            if not isinstance(data, dict) or not data:
+                raise ValueError("data 必須是非空 JSON 物件格式")
+            count = len(ids)
+        else:
+            if len(args) < 1:
+                raise ValueError("需要 <table> [file|-]")
+            table = args[0]
+            rows = read_id_rows(args[1] if len(args) > 1 else '-')
+            count = len(rows)
+    except (OSError, ValueError) as e:
+        print(f"錯誤: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if not count:
+        print("沒有需要更新的記錄")
+        return
 
-        affected_rows = cursor.rowcount
-        return affected_rows
+    try:
+        if mode == '--ids':
+            summary = update_records(table, ids, data, chunk_size)
+        else:
+            summary = update_rows(table, rows, chunk_size)
     except mysql.connector.Error as e:
-        conn.rollback()
-        print(f"更新失敗: {e}", file=sys.stderr)
+        print(f"批次更新失敗，已回滾: {e}", file=sys.stderr)
         sys.exit(1)
-    finally:
-        cursor.close()
-        conn.close()
+
+    print(format_summary("批次更新", summary))
 
 def main():
+    if len(sys.argv) >= 2 and sys.argv[1] in ('--ids', '--rows'):
+        batch_main(sys.argv[1], sys.argv[2:])
+        return
+
     if len(sys.argv) < 4:
         print("使用方法: python3 update.py <table> <id> <data>")
+        print("       python3 update.py --ids <table> <id,id,...|file|-> <data> [--chunk-size N]")
+        print("       python3 update.py --rows <table> [file|-] [--chunk-size N]")
         print("範例:")
         print('  python3 update.py users 5 \'{"name":"Updated Name","age":26}\'')
         print('  python3 update.py products 10 \'{"price":89.99}\'')
+        print('  python3 update.py --ids content_history 12,13,14 \'{"status":"published"}\'')
+        print('  python3 update.py --rows content_history status_updates.csv')
         sys.exit(1)
 
     table = sys.argv[1]
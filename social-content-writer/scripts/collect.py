@@ -7,6 +7,7 @@ Social Content Writer - Research Data Collection Script
 import os
 import sys
 import json
+import asyncio
 import argparse
 from datetime import datetime
 from typing import List, Dict, Any
@@ -15,6 +16,9 @@ import subprocess
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# mysql 技能的程式內 API
+MYSQL_SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "mysql", "scripts")
+
 
 class ResearchCollector:
     """研究資料收集器 - 真正整合 MCP 工具"""
@@ -168,57 +172,68 @@ print(json.dumps({{"url": "{url}", "content": result}}))
             return []
 
         try:
-            mysql_script = os.path.join(
-                os.path.dirname(os.path.dirname(__file__)),
-                "mysql",
-                "scripts",
-                "query.py"
-            )
-
-            if not os.path.exists(mysql_script):
+            if not os.path.exists(os.path.join(MYSQL_SCRIPTS_DIR, "mysql_api.py")):
                 print("  ⚠️  MySQL 腳本不存在")
                 return []
 
+            sys.path.insert(0, MYSQL_SCRIPTS_DIR)
+            import mysql_api
+
             # 構建查詢
-            query = f"""
+            query = """
             SELECT topic, content, platform, created_at
             FROM content_history
-            WHERE topic LIKE '%{topic}%'
+            WHERE topic LIKE %s
             ORDER BY created_at DESC
-            LIMIT {max_results}
+            LIMIT %s
             """
 
-            result = subprocess.run(
-                ["python3", mysql_script, query],
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
+            data = mysql_api.query(query, (f"%{topic}%", max_results))
+            results = self._history_items(data)
+            print(f"  ✅ 找到 {len(results)} 筆歷史資料")
+            return results
 
-            if result.returncode == 0:
-                data = json.loads(result.stdout)
-                results = []
-                for item in data:
-                    results.append({
-                        "source_type": "database",
-                        "title": f"歷史內容: {item.get('topic', '')}",
-                        "url": None,
-                        "summary": item.get('content', '')[:300],
-                        "relevance_score": 0.80,
-                        "credibility_score": 0.90,
-                        "recency_score": 0.60,
-                        "completeness_score": 0.85
-                    })
-                print(f"  ✅ 找到 {len(results)} 筆歷史資料")
-                return results
-            else:
-                print(f"  ⚠️  查詢失敗: {result.stderr}")
-                return []
+        except Exception as e:
+            print(f"  ⚠️  資料庫查詢錯誤: {e}")
+            return []
+
+    async def collect_from_database_async(self, topic: str, max_results: int = 5) -> List[Dict]:
+        """以 async_db 查詢歷史資料，可與網路搜尋同時進行（沒有 aiomysql 時改用同步查詢）"""
+        try:
+            sys.path.insert(0, MYSQL_SCRIPTS_DIR)
+            from async_db import AsyncDatabase, aiomysql
+        except ImportError:
+            aiomysql = None
+
+        if aiomysql is None or not os.environ.get("MYSQL_HOST"):
+            return await asyncio.to_thread(self.collect_from_database, topic, max_results)
 
+        print(f"💾 正在查詢資料庫: {topic}")
+        try:
+            async with AsyncDatabase() as db:
+                data = await db.find_content_history(topic, max_results)
         except Exception as e:
             print(f"  ⚠️  資料庫查詢錯誤: {e}")
             return []
 
+        results = self._history_items(data)
+        print(f"  ✅ 找到 {len(results)} 筆歷史資料")
+        return results
+
+    @staticmethod
+    def _history_items(data: List[Dict]) -> List[Dict]:
+        """content_history 查詢結果轉為收集項目"""
+        return [{
+            "source_type": "database",
+            "title": f"歷史內容: {item.get('topic', '')}",
+            "url": None,
+            "summary": (item.get('content') or '')[:300],
+            "relevance_score": 0.80,
+            "credibility_score": 0.90,
+            "recency_score": 0.60,
+            "completeness_score": 0.85
+        } for item in data]
+
     def calculate_quality_score(self, item: Dict) -> float:
         """計算綜合質量分數"""
         weights = {
@@ -248,18 +263,12 @@ print(json.dumps({{"url": "{url}", "content": result}}))
 
         return insights[:5]  # 返回前 5 個
 
-    def collect(self, topic: str, sources: str = "web_search,web_reader",
-                max_results: int = 20, deep_research: bool = False) -> Dict:
-        """收集所有資料來源 - 改進版"""
-
-        source_list = [s.strip() for s in sources.split(",")]
+    def _collect_web(self, topic: str, source_list: List[str], max_results: int,
+                     deep_research: bool) -> List[Dict]:
+        """網路搜尋，deep_research 時再深入閱讀前 5 個網頁"""
         all_data = []
         urls_to_read = []
 
-        print("\n" + "="*60)
-        print("📚 開始資料收集")
-        print("="*60 + "\n")
-
         # 階段 1: 網路搜尋
         if "web_search" in source_list:
             search_results = self.collect_from_web_search(topic, max_results)
@@ -275,10 +284,28 @@ print(json.dumps({{"url": "{url}", "content": result}}))
             reader_results = self.collect_from_web_reader(urls_to_read)
             all_data.extend(reader_results)
 
-        # 階段 3: 資料庫查詢
+        return all_data
+
+    async def _collect_sources(self, topic: str, source_list: List[str], max_results: int,
+                               deep_research: bool) -> List[Dict]:
+        """網路資料與資料庫查詢（階段 3）同時進行，不必等搜尋結束才查資料庫"""
+        tasks = [asyncio.to_thread(self._collect_web, topic, source_list, max_results, deep_research)]
         if "database" in source_list:
-            db_results = self.collect_from_database(topic, max_results)
-            all_data.extend(db_results)
+            tasks.append(self.collect_from_database_async(topic, max_results))
+        results = await asyncio.gather(*tasks)
+        return [item for items in results for item in items]
+
+    def collect(self, topic: str, sources: str = "web_search,web_reader",
+                max_results: int = 20, deep_research: bool = False) -> Dict:
+        """收集所有資料來源 - 改進版"""
+
+        source_list = [s.strip() for s in sources.split(",")]
+
+        print("\n" + "="*60)
+        print("📚 開始資料收集")
+        print("="*60 + "\n")
+
+        all_data = asyncio.run(self._collect_sources(topic, source_list, max_results, deep_research))
 
         # 計算質量分數並過濾
         scored_data = []
@@ -24,6 +24,9 @@ import argparse
 from typing import Dict, Optional
 from datetime import datetime
 
+# mysql 技能的共用連線池模組
+MYSQL_SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "mysql", "scripts")
+
 
 class FacebookTokenHelper:
     """Facebook Token 輔助工具"""
@@ -300,37 +303,29 @@ def main():
             return 1
 
         try:
-            import mysql.connector
-
-            # 連接資料庫
-            conn = mysql.connector.connect(
-                host=args.mysql_host,
-                user=args.mysql_user,
-                password=args.mysql_password,
-                database=args.mysql_database
-            )
-
-            cursor = conn.cursor(dictionary=True)
-
-            # 查詢頻道資訊
-            cursor.execute(
-                "SELECT page_id, access_token FROM channal_info WHERE channal_id = %s",
-                (args.channel_id,)
-            )
-            channel = cursor.fetchone()
+            sys.path.insert(0, MYSQL_SCRIPTS_DIR)
+            from db_pool import connection
+
+            # 從共用連線池借用連線
+            with connection(host=args.mysql_host, user=args.mysql_user,
+                            password=args.mysql_password, database=args.mysql_database) as conn:
+                cursor = conn.cursor(dictionary=True)
+
+                # 查詢頻道資訊
+                cursor.execute(
+                    "SELECT page_id, access_token FROM channal_info WHERE channal_id = %s",
+                    (args.channel_id,)
+                )
+                channel = cursor.fetchone()
+                cursor.close()
 
             if not channel:
                 print(f"❌ 錯誤：找不到頻道 ID {args.channel_id}")
-                cursor.close()
-                conn.close()
                 return 1
 
             page_id = channel["page_id"]
             token = channel["access_token"]
 
-            cursor.close()
-            conn.close()
-
             print(f"✅ 從資料庫讀取頻道 {args.channel_id} 的設定")
 
             # 判斷是否要使用 Page Token（預設直接使用 token，與 n8n 系統一致）
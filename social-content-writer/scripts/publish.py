@@ -7,12 +7,16 @@ Social Content Writer - Multi-Platform Publisher
 import os
 import sys
 import json
+import asyncio
 import argparse
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 import subprocess
 import time
 
+# mysql 技能的程式內 API
+MYSQL_SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "mysql", "scripts")
+
 
 class ContentPublisher:
     """內容發布器"""
@@ -269,60 +273,85 @@ class ContentPublisher:
     def save_to_database(self, content_data: Dict, results: Dict,
                         table: str = "content_history") -> bool:
         """保存發布歷史到資料庫"""
-        script_path = os.path.join(
-            os.path.dirname(os.path.dirname(__file__)),
-            "mysql",
-            "scripts",
-            "insert.py"
-        )
-
-        if not os.path.exists(script_path):
+        if not os.path.exists(os.path.join(MYSQL_SCRIPTS_DIR, "mysql_api.py")):
             print("⚠️  MySQL 插入腳本不存在")
             return False
 
         try:
-            # 構建插入數據
-            title = content_data.get("title", "")
-            content = content_data.get("content", "")
-            hashtags_json = json.dumps(content_data.get("hashtags", []))
-            metadata_json = json.dumps(content_data.get("metadata", {}))
-
-            # 統計發布結果
-            platforms = list(results.keys())
-            successful = sum(1 for r in results.values() if r.get("success"))
-
-            # 構建 SQL
-            sql = f"""
-            INSERT INTO {table} (topic, platform, content, hashtags, metadata, status)
-            VALUES (
-                '{title[:255]}',
-                '{','.join(platforms)}',
-                '{content[:1000]}',
-                '{hashtags_json}',
-                '{metadata_json}',
-                'published'
-            )
-            """
+            sys.path.insert(0, MYSQL_SCRIPTS_DIR)
+            import mysql_api
 
-            # 調用 MySQL 插入腳本
-            result = subprocess.run(
-                ["python3", script_path, sql],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-
-            if result.returncode == 0:
-                print("✅ 發布歷史已保存到資料庫")
-                return True
-            else:
-                print(f"⚠️  保存到資料庫失敗")
-                return False
+            record = self._history_record(content_data, list(results.keys()), "published")
+            mysql_api.insert(table, record)
+            print("✅ 發布歷史已保存到資料庫")
+            return True
 
         except Exception as e:
             print(f"⚠️  保存到資料庫錯誤: {e}")
             return False
 
+    @staticmethod
+    def _history_record(content_data: Dict, platforms: List[str], status: str) -> Dict:
+        """content_history 的一筆記錄"""
+        return {
+            "topic": content_data.get("title", "")[:255],
+            "platform": ",".join(platforms),
+            "content": content_data.get("content", "")[:1000],
+            "hashtags": json.dumps(content_data.get("hashtags", []), ensure_ascii=False),
+            "metadata": json.dumps(content_data.get("metadata", {}), ensure_ascii=False),
+            "status": status
+        }
+
+    async def publish_with_history(self, content_data: Dict, platforms: List[str],
+                                   schedule: Optional[str] = None,
+                                   notify_discord: bool = False) -> Dict:
+        """
+        發布並保存歷史，資料庫寫入與各平台的 HTTP 發布同時進行
+
+        發布開始時以 draft 狀態寫入 content_history，發布完成後只更新狀態
+        （排程為 scheduled，任一平台成功為 published，全部失敗則維持 draft）。
+        沒有 aiomysql 或資料庫無法連線時，改為發布後同步保存。
+        """
+        try:
+            sys.path.insert(0, MYSQL_SCRIPTS_DIR)
+            from async_db import AsyncDatabase
+            db = await AsyncDatabase().open()
+        except Exception as e:
+            print(f"⚠️  無法使用非同步資料庫（{e}），發布後再保存")
+            results = await asyncio.to_thread(self.publish, content_data, platforms, schedule, notify_discord)
+            self.save_to_database(content_data, results)
+            return results
+
+        try:
+            insert = asyncio.create_task(
+                db.insert_content_history(self._history_record(content_data, platforms, "draft"))
+            )
+            results = await asyncio.to_thread(self.publish, content_data, platforms, schedule, False)
+
+            notify = asyncio.create_task(asyncio.to_thread(self._notify_discord, content_data, results)) \
+                if notify_discord else None
+
+            if schedule:
+                status = "scheduled"
+            elif any(result.get("success") for result in results.values()):
+                status = "published"
+            else:
+                status = None
+
+            try:
+                record_id = await insert
+                if status:
+                    await db.update_content_status([record_id], status)
+                print("✅ 發布歷史已保存到資料庫")
+            except Exception as e:
+                print(f"⚠️  保存到資料庫錯誤: {e}")
+
+            if notify:
+                await notify
+            return results
+        finally:
+            await db.close()
+
     def print_publish_results(self, results: Dict):
         """打印發布結果"""
         print("\n" + "="*60)
@@ -416,17 +445,21 @@ def main():
     # 創建發布器
     publisher = ContentPublisher()
 
-    # 發布內容
-    results = publisher.publish(
-        content_data,
-        platforms,
-        schedule=args.schedule,
-        notify_discord=args.notify_discord
-    )
-
-    # 保存到資料庫
+    # 發布內容（--save-db 時資料庫寫入與發布同時進行）
     if args.save_db:
-        publisher.save_to_database(content_data, results)
+        results = asyncio.run(publisher.publish_with_history(
+            content_data,
+            platforms,
+            schedule=args.schedule,
+            notify_discord=args.notify_discord
+        ))
+    else:
+        results = publisher.publish(
+            content_data,
+            platforms,
+            schedule=args.schedule,
+            notify_discord=args.notify_discord
+        )
 
     # 打印結果
     publisher.print_publish_results(results)
@@ -4,37 +4,18 @@ Suno Batch Fetch Script
 Fetch multiple Suno music generation tasks at once
 """
 
-import os
 import sys
 import json
 import argparse
 import requests
 from typing import List
 
-# API Configuration
-BASE_URL = os.environ.get("ALLAPI_BASE_URL", "https://allapi.store/")
-API_KEY = os.environ.get("ALLAPI_KEY", "")
-
-def check_api_key():
-    """Check if API key is set"""
-    if not API_KEY:
-        print("Error: ALLAPI_KEY environment variable not set", file=sys.stderr)
-        print("Please set it using: export ALLAPI_KEY='your-api-key'", file=sys.stderr)
-        sys.exit(1)
-
-def batch_fetch_tasks(task_ids: List[str]) -> List[dict]:
-    """Fetch multiple tasks at once"""
-    url = f"{BASE_URL}suno/fetch"
-    headers = {
-        "Authorization": f"Bearer {API_KEY}",
-        "Content-Type": "application/json"
-    }
-    params = {"ids": task_ids}
+from suno_client import check_api_key, get_client
 
+def batch_fetch_tasks(task_ids: List[str], use_cache: bool = True) -> List[dict]:
+    """Fetch multiple tasks at once (finished tasks come from the local cache)"""
     try:
-        response = requests.get(url, params=params, headers=headers)
-        response.raise_for_status()
-        return response.json()
+        return get_client().fetch_tasks(task_ids, use_cache)
     except requests.exceptions.RequestException as e:
         print(f"Error fetching tasks: {e}", file=sys.stderr)
         sys.exit(1)
@@ -91,6 +72,8 @@ Examples:
     parser.add_argument("--ids", help="Comma-separated task IDs")
     parser.add_argument("--summary", action="store_true", help="Show summary only")
     parser.add_argument("--json", action="store_true", help="Output raw JSON")
+    parser.add_argument("--refresh", action="store_true",
+                       help="Always query the API, even for finished tasks in the local cache")
 
     args = parser.parse_args()
 
@@ -111,7 +94,10 @@ Examples:
 
     # Fetch tasks
     print(f"Fetching {len(task_ids)} task(s)...", file=sys.stderr)
-    tasks = batch_fetch_tasks(task_ids)
+    tasks = batch_fetch_tasks(task_ids, use_cache=not args.refresh)
+    cache_hits = get_client().cache_hits
+    if cache_hits:
+        print(f"  {cache_hits} finished task(s) served from local cache", file=sys.stderr)
 
     if not tasks:
         print("No tasks found", file=sys.stderr)
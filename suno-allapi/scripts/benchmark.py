@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Suno Poll Benchmark Script
+Compare poll-loop latency of bare requests.post calls (new TLS handshake per
+request) against the shared keep-alive SunoClient session
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+import requests
+
+from suno_client import API_KEY, BASE_URL, DEFAULT_TIMEOUT, SunoClient, check_api_key
+
+def describe(samples: list) -> str:
+    """Spread of one method's poll latencies"""
+    ms = sorted(sample * 1000 for sample in samples)
+    return f"min {ms[0]:.0f} ms / median {statistics.median(ms):.0f} ms / max {ms[-1]:.0f} ms"
+
+def bench_bare_requests(task_id: str, iterations: int) -> list:
+    """One requests.post per poll, as the scripts did before suno_client"""
+    url = f"{BASE_URL}suno/fetch"
+    headers = {
+        "Authorization": f"Bearer {API_KEY}",
+        "Content-Type": "application/json"
+    }
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        response = requests.post(url, json={"ids": [task_id]}, headers=headers, timeout=DEFAULT_TIMEOUT)
+        response.raise_for_status()
+        response.json()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+def bench_session(task_id: str, iterations: int) -> list:
+    """Polls through a SunoClient (first call includes the handshake)"""
+    samples = []
+    with SunoClient() as client:
+        for _ in range(iterations):
+            started = time.perf_counter()
+            client.fetch_task(task_id, use_cache=False)
+            samples.append(time.perf_counter() - started)
+    return samples
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark suno/fetch poll latency: bare requests vs pooled session",
+        epilog="""
+Examples:
+  %(prog)s f4a94d75-087b-4bb1-bd45-53ba293faf96
+  %(prog)s f4a94d75-087b-4bb1-bd45-53ba293faf96 -n 50
+        """
+    )
+    parser.add_argument("task_id", help="Any existing task ID to poll")
+    parser.add_argument("--iterations", "-n", type=int, default=20,
+                       help="Polls per method (default: 20)")
+    args = parser.parse_args()
+
+    check_api_key()
+
+    # Measure the network path only: no clip store writes, no cached answers
+    os.environ["SUNO_CLIP_STORE"] = "0"
+
+    print(f"Polling {BASE_URL}suno/fetch {args.iterations} times per method...\n", file=sys.stderr)
+
+    try:
+        results = {
+            "requests.post": bench_bare_requests(args.task_id, args.iterations),
+            "SunoClient session": bench_session(args.task_id, args.iterations)
+        }
+    except requests.exceptions.RequestException as e:
+        print(f"Error polling task: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    for name, samples in results.items():
+        print(f"{name}: {describe(samples)}")
+
+    before = statistics.median(results["requests.post"])
+    after = statistics.median(results["SunoClient session"])
+    if after > 0:
+        print(f"\nMedian poll latency speedup: {before / after:.1f}x")
+
+if __name__ == "__main__":
+    main()
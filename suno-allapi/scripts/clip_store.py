@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Suno Clip Store
+Local SQLite index of every task and clip seen by the suno-allapi scripts
+
+SunoClient records each submission (mode, model, tags, persona) and every
+suno/fetch payload here, so clip IDs, titles, tags, audio URLs and persona
+IDs can be looked up locally instead of re-fetching from the API — e.g. to
+find a clip to extend or to use as --artist-clip-id. Payloads of finished
+(SUCCESS / FAILURE) tasks also serve as SunoClient's fetch cache.
+
+Default location: ~/.cache/suno-allapi/clips.db (override with SUNO_CLIP_DB,
+disable recording with SUNO_CLIP_STORE=0).
+
+Usage:
+    python3 clip_store.py search --title "city" --tags synthwave
+    python3 clip_store.py get <clip_id>
+    python3 clip_store.py task <task_id>
+    python3 clip_store.py import tasks.json
+    python3 clip_store.py stats
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "suno-allapi", "clips.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id TEXT PRIMARY KEY,
+    status TEXT,
+    action TEXT,
+    mode TEXT,
+    model TEXT,
+    params TEXT,
+    submit_time TEXT,
+    finish_time TEXT,
+    fail_reason TEXT,
+    payload TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS clips (
+    clip_id TEXT PRIMARY KEY,
+    task_id TEXT,
+    title TEXT,
+    tags TEXT,
+    audio_url TEXT,
+    video_url TEXT,
+    image_url TEXT,
+    duration REAL,
+    model TEXT,
+    persona_id TEXT,
+    payload TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_created ON tasks (created_at);
+CREATE INDEX IF NOT EXISTS idx_clips_task ON clips (task_id);
+CREATE INDEX IF NOT EXISTS idx_clips_title ON clips (title COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_clips_tags ON clips (tags COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_clips_persona ON clips (persona_id);
+CREATE INDEX IF NOT EXISTS idx_clips_created ON clips (created_at);
+"""
+
+
+def is_enabled() -> bool:
+    return os.environ.get("SUNO_CLIP_STORE", "1").lower() not in ("0", "false", "off", "no")
+
+
+def _first(*values):
+    for value in values:
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def _float(value) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _str(value) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+class ClipStore:
+    """
+    Task / clip index
+
+    Args:
+        path: SQLite file (default: SUNO_CLIP_DB or ~/.cache/suno-allapi/clips.db)
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.environ.get("SUNO_CLIP_DB") or DEFAULT_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # Written from the poll scheduler thread as well as the main thread
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    # Recording
+
+    def record_submission(self, task_id: str, params: Dict[str, Any]):
+        """Remember what was requested for a task (mode, model, tags, persona)"""
+        metadata = params.get("metadata") or {}
+        mode = _first(metadata.get("create_mode"), params.get("task"))
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO tasks (task_id, status, mode, model, params, created_at, updated_at)
+                VALUES (?, 'SUBMITTED', ?, ?, ?, ?, ?)
+                ON CONFLICT(task_id) DO UPDATE SET
+                    mode = excluded.mode, model = excluded.model, params = excluded.params,
+                    updated_at = excluded.updated_at
+                """,
+                (task_id, mode, params.get("mv"), json.dumps(params, ensure_ascii=False), now, now)
+            )
+
+    def record_tasks(self, tasks: Iterable[Dict[str, Any]]):
+        """Upsert fetched task payloads and their clips"""
+        now = time.time()
+        with self._lock, self._conn:
+            for task in tasks:
+                task_id = task.get("task_id") or task.get("id")
+                if not task_id:
+                    continue
+                self._conn.execute(
+                    """
+                    INSERT INTO tasks (task_id, status, action, submit_time, finish_time, fail_reason,
+                                       payload, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(task_id) DO UPDATE SET
+                        status = excluded.status, action = excluded.action,
+                        submit_time = excluded.submit_time, finish_time = excluded.finish_time,
+                        fail_reason = excluded.fail_reason, payload = excluded.payload,
+                        updated_at = excluded.updated_at
+                    """,
+                    (task_id, task.get("status"), task.get("action"),
+                     _str(task.get("submitTime")), _str(task.get("finishTime")), task.get("failReason"),
+                     json.dumps(task, ensure_ascii=False), now, now)
+                )
+
+                row = self._conn.execute("SELECT params FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+                params = json.loads(row["params"]) if row and row["params"] else {}
+                for clip in task.get("data") or []:
+                    if isinstance(clip, dict) and clip.get("id"):
+                        self._upsert_clip(task_id, clip, params, now)
+
+    def _upsert_clip(self, task_id: str, clip: Dict[str, Any], params: Dict[str, Any], now: float):
+        metadata = clip.get("metadata") if isinstance(clip.get("metadata"), dict) else {}
+        self._conn.execute(
+            """
+            INSERT INTO clips (clip_id, task_id, title, tags, audio_url, video_url, image_url, duration,
+                               model, persona_id, payload, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(clip_id) DO UPDATE SET
+                task_id = excluded.task_id, title = excluded.title, tags = excluded.tags,
+                audio_url = excluded.audio_url, video_url = excluded.video_url,
+                image_url = excluded.image_url, duration = excluded.duration, model = excluded.model,
+                persona_id = excluded.persona_id, payload = excluded.payload,
+                updated_at = excluded.updated_at
+            """,
+            (clip["id"], task_id,
+             _first(clip.get("title"), params.get("title")),
+             _first(clip.get("tags"), metadata.get("tags"), params.get("tags")),
+             _first(clip.get("audio_url"), clip.get("audioUrl")),
+             _first(clip.get("video_url"), clip.get("videoUrl")),
+             _first(clip.get("image_url"), clip.get("imageUrl"), clip.get("image_large_url")),
+             _float(_first(clip.get("duration"), metadata.get("duration"))),
+             _first(clip.get("model_name"), clip.get("mv"), params.get("mv")),
+             _first(clip.get("persona_id"), metadata.get("persona_id"), params.get("persona_id")),
+             json.dumps(clip, ensure_ascii=False), now, now)
+        )
+
+    # Lookup
+
+    def get_clip(self, clip_id: str) -> Optional[Dict[str, Any]]:
+        """Clip by full ID or unique prefix (an exact match wins over other IDs sharing the prefix)"""
+        with self._lock:
+            rows = self._conn.execute(
+                # substr, not LIKE: '%' / '_' in the input must not act as wildcards
+                "SELECT * FROM clips WHERE substr(clip_id, 1, ?) = ? ORDER BY clip_id = ? DESC LIMIT 2",
+                (len(clip_id), clip_id, clip_id)
+            ).fetchall()
+        if rows and rows[0]["clip_id"] == clip_id:
+            return dict(rows[0])
+        return dict(rows[0]) if len(rows) == 1 else None
+
+    def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+        return dict(row) if row else None
+
+    def terminal_tasks(self, task_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Stored payloads of tasks that reached SUCCESS / FAILURE (these never change)"""
+        task_ids = list(task_ids)
+        if not task_ids:
+            return {}
+        placeholders = ", ".join("?" * len(task_ids))
+        sql = (f"SELECT task_id, payload FROM tasks WHERE task_id IN ({placeholders}) "
+               f"AND status IN ('SUCCESS', 'FAILURE') AND payload IS NOT NULL")
+        with self._lock:
+            rows = self._conn.execute(sql, task_ids).fetchall()
+        return {r["task_id"]: json.loads(r["payload"]) for r in rows}
+
+    def task_clips(self, task_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM clips WHERE task_id = ? ORDER BY clip_id", (task_id,))
+            return [dict(r) for r in rows]
+
+    def search(self, title: Optional[str] = None, tags: Optional[str] = None,
+               task_id: Optional[str] = None, persona_id: Optional[str] = None,
+               since: Optional[float] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """Clips matching all given filters, newest first (title / tags are substring matches)"""
+        conditions, params = [], []
+        if title:
+            conditions.append("title LIKE ?")
+            params.append(f"%{title}%")
+        if tags:
+            for tag in [t.strip() for t in tags.split(",") if t.strip()]:
+                conditions.append("tags LIKE ?")
+                params.append(f"%{tag}%")
+        if task_id:
+            conditions.append("task_id = ?")
+            params.append(task_id)
+        if persona_id:
+            conditions.append("persona_id = ?")
+            params.append(persona_id)
+        if since:
+            conditions.append("created_at >= ?")
+            params.append(since)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        sql = f"SELECT * FROM clips {where} ORDER BY created_at DESC LIMIT ?"
+        with self._lock:
+            return [dict(r) for r in self._conn.execute(sql, (*params, limit))]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            tasks = self._conn.execute("SELECT status, COUNT(*) AS n FROM tasks GROUP BY status").fetchall()
+            clips = self._conn.execute("SELECT COUNT(*) FROM clips").fetchone()[0]
+        return {"tasks": {r["status"] or "UNKNOWN": r["n"] for r in tasks}, "clips": clips, "path": self.path}
+
+
+_store: Optional[ClipStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> Optional[ClipStore]:
+    """Process-wide store, None when disabled or the database cannot be opened"""
+    global _store
+    if not is_enabled():
+        return None
+    with _store_lock:
+        if _store is None:
+            try:
+                _store = ClipStore()
+            except (sqlite3.Error, OSError) as e:
+                print(f"Warning: clip store unavailable: {e}", file=sys.stderr)
+                os.environ["SUNO_CLIP_STORE"] = "0"
+                return None
+        return _store
+
+
+def _parse_since(value: str) -> float:
+    """'7d', '12h' or an ISO date"""
+    units = {"d": 86400, "h": 3600, "m": 60}
+    if value and value[-1] in units and value[:-1].replace(".", "", 1).isdigit():
+        return time.time() - float(value[:-1]) * units[value[-1]]
+    return datetime.fromisoformat(value).timestamp()
+
+
+def _print_clips(clips: List[Dict[str, Any]], as_json: bool):
+    if as_json:
+        for clip in clips:
+            clip.pop("payload", None)
+        print(json.dumps(clips, indent=2, ensure_ascii=False))
+        return
+    for clip in clips:
+        created = datetime.fromtimestamp(clip["created_at"]).strftime("%Y-%m-%d %H:%M")
+        print(f"{clip['clip_id']}  {created}  {clip['title'] or '(untitled)'}")
+        print(f"    task: {clip['task_id']}  tags: {clip['tags'] or '-'}  model: {clip['model'] or '-'}"
+              + (f"  persona: {clip['persona_id']}" if clip['persona_id'] else ""))
+        if clip["audio_url"]:
+            print(f"    audio: {clip['audio_url']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Query the local index of Suno tasks and clips",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s search --title "city" --tags synthwave,night
+  %(prog)s search --persona PERSONA_ID --since 7d
+  %(prog)s get 54834687
+  %(prog)s task f4a94d75-087b-4bb1-bd45-53ba293faf96
+  batch-fetch.py id1 id2 --json | %(prog)s import -
+        """
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    search = sub.add_parser("search", help="Search clips")
+    search.add_argument("--title", help="Title contains")
+    search.add_argument("--tags", help="Tags contain (comma-separated, all must match)")
+    search.add_argument("--task", help="Task ID")
+    search.add_argument("--persona", help="Persona ID")
+    search.add_argument("--since", help="Seen since, e.g. 7d, 12h or 2025-01-31")
+    search.add_argument("--limit", type=int, default=20, help="Max results (default: 20)")
+    search.add_argument("--json", action="store_true", help="Output JSON")
+
+    get = sub.add_parser("get", help="Show one clip (full ID or unique prefix)")
+    get.add_argument("clip_id")
+
+    task = sub.add_parser("task", help="Show a task and its clips")
+    task.add_argument("task_id")
+
+    imp = sub.add_parser("import", help="Import tasks from fetch.py / batch-fetch.py --json output")
+    imp.add_argument("file", help="JSON file ('-' for stdin)")
+
+    sub.add_parser("stats", help="Show counts")
+
+    args = parser.parse_args()
+    store = ClipStore()
+
+    if args.command == "search":
+        try:
+            since = _parse_since(args.since) if args.since else None
+        except ValueError:
+            parser.error(f"Invalid --since: {args.since}")
+        clips = store.search(args.title, args.tags, args.task, args.persona, since, args.limit)
+        if not clips:
+            print("No matching clips", file=sys.stderr)
+            sys.exit(1)
+        _print_clips(clips, args.json)
+
+    elif args.command == "get":
+        clip = store.get_clip(args.clip_id)
+        if not clip:
+            print(f"No clip (or more than one) matches: {args.clip_id}", file=sys.stderr)
+            sys.exit(1)
+        clip["payload"] = json.loads(clip["payload"]) if clip["payload"] else None
+        print(json.dumps(clip, indent=2, ensure_ascii=False))
+
+    elif args.command == "task":
+        record = store.get_task(args.task_id)
+        if not record:
+            print(f"No task found with ID: {args.task_id}", file=sys.stderr)
+            sys.exit(1)
+        record["params"] = json.loads(record["params"]) if record["params"] else None
+        record.pop("payload", None)
+        record["clips"] = [c["clip_id"] for c in store.task_clips(args.task_id)]
+        print(json.dumps(record, indent=2, ensure_ascii=False))
+
+    elif args.command == "import":
+        text = sys.stdin.read() if args.file == "-" else open(args.file, encoding="utf-8").read()
+        try:
+            data = json.loads(text)
+        except ValueError:
+            data = [json.loads(line) for line in text.splitlines() if line.strip()]
+        tasks = data if isinstance(data, list) else [data]
+        store.record_tasks(t for t in tasks if isinstance(t, dict))
+        print(f"Imported {len(tasks)} task(s)")
+
+    else:
+        stats = store.stats()
+        print(f"Clips: {stats['clips']}")
+        print("Tasks: " + (", ".join(f"{k} {v}" for k, v in sorted(stats["tasks"].items())) or "0"))
+        print(f"Store: {stats['path']}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,72 +9,42 @@ import sys
 import json
 import argparse
 import requests
-from urllib.parse import urlparse
 from pathlib import Path
+from typing import List
 
-# API Configuration
-BASE_URL = os.environ.get("ALLAPI_BASE_URL", "https://allapi.store/")
-API_KEY = os.environ.get("ALLAPI_KEY", "")
-
-def check_api_key():
-    """Check if API key is set"""
-    if not API_KEY:
-        print("Error: ALLAPI_KEY environment variable not set", file=sys.stderr)
-        print("Please set it using: export ALLAPI_KEY='your-api-key'", file=sys.stderr)
-        sys.exit(1)
-
-def fetch_task(task_id: str) -> dict:
-    """Fetch task status and results"""
-    url = f"{BASE_URL}suno/fetch"
-    headers = {
-        "Authorization": f"Bearer {API_KEY}",
-        "Content-Type": "application/json"
-    }
-    params = {"ids": [task_id]}
+from suno_client import check_api_key, get_client
+from downloader import DEFAULT_WORKERS, DownloadJob, download_all, parse_size
 
+def fetch_task(task_id: str, use_cache: bool = True) -> dict:
+    """Fetch task status and results (finished tasks come from the local cache)"""
     try:
-        response = requests.get(url, params=params, headers=headers)
-        response.raise_for_status()
-        data = response.json()
-
-        if data and len(data) > 0:
-            return data[0]
-        return {}
+        return get_client().fetch_task(task_id, use_cache)
     except requests.exceptions.RequestException as e:
         print(f"Error fetching task: {e}", file=sys.stderr)
         sys.exit(1)
 
-def download_file(url: str, output_path: str) -> bool:
-    """Download file from URL to local path"""
+def fetch_tasks(task_ids: List[str], use_cache: bool = True) -> List[dict]:
+    """Fetch several tasks with one request (finished tasks come from the local cache)"""
     try:
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
-
-        # Create parent directory if needed
-        output_path = Path(output_path)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-
-        # Download with progress
-        total_size = int(response.headers.get('content-length', 0))
-        downloaded = 0
-
-        with open(output_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
-                    downloaded += len(chunk)
-
-                    # Show progress
-                    if total_size > 0:
-                        progress = (downloaded / total_size) * 100
-                        print(f"\rDownloading: {progress:.1f}%", end='', file=sys.stderr)
+        return get_client().fetch_tasks(task_ids, use_cache)
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching tasks: {e}", file=sys.stderr)
+        sys.exit(1)
 
-        print(f"\r✓ Downloaded to: {output_path}", file=sys.stderr)
-        return True
+def load_tasks_json(path: str) -> List[dict]:
+    """Read tasks saved from batch-fetch.py --json / fetch.py --json (file or '-' for stdin)
 
-    except requests.exceptions.RequestException as e:
-        print(f"\nError downloading file: {e}", file=sys.stderr)
-        return False
+    Accepts a JSON list of tasks, a single task object, or JSON Lines.
+    """
+    text = sys.stdin.read() if path == "-" else Path(path).read_text(encoding="utf-8")
+    text = text.strip()
+    if not text:
+        return []
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data = [json.loads(line) for line in text.splitlines() if line.strip()]
+    return data if isinstance(data, list) else [data]
 
 def get_audio_urls(task_data: dict) -> list:
     """Extract all audio URLs from task data"""
@@ -136,6 +106,13 @@ Examples:
   # Download all audio from a task
   %(prog)s task-id-here
 
+  # Download several tasks, 8 files at a time
+  %(prog)s task-id-1 task-id-2 task-id-3 --workers 8
+
+  # Download from saved batch-fetch.py output
+  batch-fetch.py id1 id2 --json > tasks.json
+  %(prog)s --from-json tasks.json
+
   # Download to specific directory
   %(prog)s task-id-here --output ./music
 
@@ -147,7 +124,9 @@ Examples:
         """
     )
 
-    parser.add_argument("task_id", help="Task ID to download from")
+    parser.add_argument("task_ids", nargs="*", help="Task ID(s) to download from")
+    parser.add_argument("--from-json", metavar="FILE",
+                       help="Read tasks from batch-fetch.py/fetch.py --json output ('-' for stdin)")
     parser.add_argument("--output", "-o", default="./suno-downloads",
                        help="Output directory (default: ./suno-downloads)")
     parser.add_argument("--list-only", action="store_true",
@@ -155,35 +134,62 @@ Examples:
     parser.add_argument("--wav-only", action="store_true",
                        help="Download only WAV format files")
     parser.add_argument("--clip-id", help="Download specific clip only")
+    parser.add_argument("--workers", "-w", type=int, default=DEFAULT_WORKERS,
+                       help=f"Parallel downloads (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--chunk-size", default="1M",
+                       help="Read chunk size, e.g. 256K, 1M, 4M (default: 1M)")
+    parser.add_argument("--verify", action="store_true",
+                       help="Re-check SHA-256 of files already present before skipping them")
+    parser.add_argument("--refresh", action="store_true",
+                       help="Re-query finished tasks from the API (e.g. when audio URLs have expired)")
 
     args = parser.parse_args()
 
-    # Check API key
-    check_api_key()
-
-    # Fetch task
-    print(f"Fetching task {args.task_id}...", file=sys.stderr)
-    task = fetch_task(args.task_id)
-
-    if not task:
-        print(f"No task found with ID: {args.task_id}", file=sys.stderr)
-        sys.exit(1)
-
-    # Get status
-    status = task.get("status", "UNKNOWN")
-
-    if status != "SUCCESS":
-        print(f"Task status: {status}", file=sys.stderr)
-        print("Cannot download from incomplete or failed tasks", file=sys.stderr)
-        if status == "FAILURE":
-            print(f"Failure reason: {task.get('failReason', 'Unknown')}", file=sys.stderr)
-        sys.exit(1)
+    if not args.task_ids and not args.from_json:
+        parser.error("Provide task ID(s) or --from-json")
+    try:
+        chunk_size = parse_size(args.chunk_size)
+    except ValueError:
+        parser.error(f"Invalid --chunk-size: {args.chunk_size}")
+
+    # Collect tasks
+    tasks = []
+    if args.from_json:
+        try:
+            tasks.extend(load_tasks_json(args.from_json))
+        except (OSError, ValueError) as e:
+            print(f"Error reading {args.from_json}: {e}", file=sys.stderr)
+            sys.exit(1)
 
-    # Get audio URLs
-    audio_list = get_audio_urls(task)
+    if args.task_ids:
+        # Check API key
+        check_api_key()
+
+        print(f"Fetching {len(args.task_ids)} task(s)...", file=sys.stderr)
+        fetched = fetch_tasks(args.task_ids, use_cache=not args.refresh)
+        found = {t.get("task_id") for t in fetched}
+        for task_id in args.task_ids:
+            if task_id not in found:
+                print(f"No task found with ID: {task_id}", file=sys.stderr)
+        tasks.extend(fetched)
+
+    # Get audio URLs from finished tasks
+    audio_list = []
+    for task in tasks:
+        status = task.get("status", "UNKNOWN")
+        if status != "SUCCESS":
+            print(f"Task {task.get('task_id')} status: {status} - skipped (only finished tasks can be downloaded)",
+                  file=sys.stderr)
+            if status == "FAILURE":
+                print(f"  Failure reason: {task.get('failReason', 'Unknown')}", file=sys.stderr)
+            continue
+        # Number clips within their task so file names stay stable across runs
+        for index, clip_info in enumerate(get_audio_urls(task), 1):
+            clip_info["index"] = index
+            audio_list.append(clip_info)
 
     if not audio_list:
-        print("No audio files found in task", file=sys.stderr)
+        print("No audio files found in task(s)", file=sys.stderr)
         sys.exit(1)
 
     # List available files
@@ -215,18 +221,18 @@ Examples:
         print(f"\nDownloading {len(audio_list)} file(s) to {args.output}/...", file=sys.stderr)
 
     # Download files
-    success_count = 0
-    for i, clip_info in enumerate(audio_list, 1):
-        output_path = generate_filename(clip_info, args.output, i)
-
-        print(f"\n[{i}/{len(audio_list)}] {clip_info['title']}", file=sys.stderr)
-        if download_file(clip_info["url"], output_path):
-            success_count += 1
+    jobs = [DownloadJob(clip_info["url"], generate_filename(clip_info, args.output, clip_info["index"]))
+            for clip_info in audio_list]
+    results = download_all(jobs, args.workers, chunk_size, args.verify)
+    success_count = sum(1 for r in results if r["status"] != "failed")
 
     # Summary
     print(f"\n{'='*60}", file=sys.stderr)
     print(f"Download complete: {success_count}/{len(audio_list)} files", file=sys.stderr)
     print(f"Saved to: {os.path.abspath(args.output)}", file=sys.stderr)
 
+    if success_count < len(audio_list):
+        sys.exit(1)
+
 if __name__ == "__main__":
     main()
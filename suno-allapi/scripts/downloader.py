@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Suno Download Engine
+Parallel, resumable audio downloads for suno-allapi
+
+- Worker pool: several clips download at once over the shared keep-alive session
+- Resume: data is written to <file>.part and an interrupted download continues
+  with an HTTP Range request instead of starting from zero; If-Range carries the
+  ETag / Last-Modified recorded in <file>.part.meta, so a file that changed on
+  the server is downloaded again from the start instead of being spliced
+- Verification: the finished size must match Content-Length / Content-Range;
+  size and SHA-256 are recorded in <output>/.downloads.json
+- Skip: files already present (and matching the recorded size) are not fetched again
+
+Usage:
+    from downloader import DownloadJob, download_all
+
+    results = download_all([DownloadJob(url, "out/song.mp3")], workers=4)
+"""
+
+import os
+import sys
+import json
+import hashlib
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from suno_client import SunoClient, get_client
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+DEFAULT_WORKERS = 4
+MAX_ATTEMPTS = 3
+MANIFEST_NAME = ".downloads.json"
+
+
+class DownloadError(Exception):
+    """Download failed or the result did not verify"""
+
+
+class DownloadJob:
+    """
+    One file to download
+
+    Args:
+        url: audio URL
+        path: destination file
+        label: name shown in progress output (default: file name)
+    """
+
+    def __init__(self, url: str, path: str, label: Optional[str] = None):
+        self.url = url
+        self.path = path
+        self.label = label or os.path.basename(path)
+
+
+def parse_size(value: str) -> int:
+    """Parse a chunk size such as 65536, 512K or 4M"""
+    value = str(value).strip().upper()
+    units = {"K": 1024, "M": 1024 * 1024}
+    if value and value[-1] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(value)
+
+
+def sha256_file(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Manifest:
+    """Recorded size / SHA-256 per downloaded file, stored next to the files"""
+
+    def __init__(self, directory: str):
+        self.path = os.path.join(directory, MANIFEST_NAME)
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries: Dict[str, Dict[str, Any]] = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def get(self, filename: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self.entries.get(filename)
+
+    def put(self, filename: str, entry: Dict[str, Any]):
+        with self._lock:
+            self.entries[filename] = entry
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+
+# The helpers below take plain headers / status codes so suno_async can use them with aiohttp
+
+def _total_size(headers: Mapping[str, str], status: int, offset: int) -> Optional[int]:
+    """Full file size from Content-Range (206) or Content-Length (200)"""
+    content_range = headers.get("Content-Range", "")
+    if "/" in content_range:
+        total = content_range.rsplit("/", 1)[1]
+        return int(total) if total.isdigit() else None
+    length = headers.get("Content-Length")
+    if length and length.isdigit():
+        return int(length) + (offset if status == 206 else 0)
+    return None
+
+
+def _validator(headers: Mapping[str, str]) -> Optional[str]:
+    """If-Range value identifying this version of the file (strong ETag, else Last-Modified)"""
+    etag = headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return headers.get("Last-Modified")
+
+
+def _read_part_meta(part_path: str) -> Dict[str, Any]:
+    try:
+        with open(part_path + ".meta", 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_part_meta(part_path: str, meta: Dict[str, Any]):
+    with open(part_path + ".meta", 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+
+
+def _remove_part(part_path: str):
+    for path in (part_path, part_path + ".meta"):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _resume_headers(job: DownloadJob, part_path: str):
+    """(offset, headers) for continuing <path>.part; (0, None) when it cannot be resumed safely"""
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    meta = _read_part_meta(part_path) if offset else {}
+    # Without a validator a changed file could not be detected, so start over
+    if not offset or meta.get("url") != job.url or not meta.get("validator"):
+        return 0, None
+    return offset, {"Range": f"bytes={offset}-", "If-Range": meta["validator"]}
+
+
+def _start_part(job: DownloadJob, part_path: str, offset: int, status: int,
+                headers: Mapping[str, str]) -> Tuple[int, Optional[int]]:
+    """(offset to write from, expected total size) for a download response"""
+    if offset and status != 206:
+        # 200: the file changed since the .part was started (If-Range) or Range is unsupported
+        offset = 0
+    total = _total_size(headers, status, offset)
+    if not offset:
+        _write_part_meta(part_path, {"url": job.url, "validator": _validator(headers)})
+    return offset, total
+
+
+def _check_part(part_path: str, total: Optional[int]) -> int:
+    """Size of the finished .part, DownloadError if it does not match the expected total"""
+    size = os.path.getsize(part_path)
+    if total is not None and size != total:
+        raise DownloadError(f"incomplete download: {size} of {total} bytes")
+    return size
+
+
+def _finish_part(job: DownloadJob):
+    """Move the verified .part into place and drop its metadata"""
+    part_path = job.path + ".part"
+    os.replace(part_path, job.path)
+    _remove_part(part_path)
+
+
+def _fetch_to_part(client: SunoClient, job: DownloadJob, chunk_size: int) -> int:
+    """Download (or resume) into <path>.part, returns the verified size"""
+    part_path = job.path + ".part"
+    offset, headers = _resume_headers(job, part_path)
+
+    try:
+        response = client.download(job.url, headers=headers)
+    except requests.exceptions.HTTPError as e:
+        # 416: the .part already holds the whole file
+        if offset and e.response is not None and e.response.status_code == 416:
+            return offset
+        raise
+
+    with response:
+        offset, total = _start_part(job, part_path, offset, response.status_code, response.headers)
+        with open(part_path, 'ab' if offset else 'wb') as f:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if chunk:
+                    f.write(chunk)
+
+    return _check_part(part_path, total)
+
+
+def download(job: DownloadJob, manifest: Manifest, chunk_size: int = DEFAULT_CHUNK_SIZE,
+             verify: bool = False, client: Optional[SunoClient] = None) -> Dict[str, Any]:
+    """
+    Download one file with resume, verification and skip-if-present
+
+    Args:
+        verify: re-hash files that are already present and re-download on mismatch
+
+    Returns:
+        {'path', 'status': 'downloaded' | 'skipped', 'size', 'sha256'}
+
+    Raises:
+        DownloadError, requests.exceptions.RequestException
+    """
+    client = client or get_client()
+    filename = os.path.basename(job.path)
+    entry = manifest.get(filename)
+
+    if os.path.exists(job.path):
+        size = os.path.getsize(job.path)
+        if entry is None or entry.get("size") == size:
+            if not verify or entry is None or sha256_file(job.path) == entry.get("sha256"):
+                return {"path": job.path, "status": "skipped", "size": size,
+                        "sha256": entry.get("sha256") if entry else None}
+        print(f"  {job.label}: existing file does not match, downloading again", file=sys.stderr)
+        os.remove(job.path)
+
+    os.makedirs(os.path.dirname(os.path.abspath(job.path)), exist_ok=True)
+
+    last_error: Optional[Exception] = None
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            size = _fetch_to_part(client, job, chunk_size)
+            break
+        except (DownloadError, requests.exceptions.RequestException) as e:
+            last_error = e
+            if attempt < MAX_ATTEMPTS:
+                print(f"  {job.label}: {e} (resuming, attempt {attempt + 1}/{MAX_ATTEMPTS})", file=sys.stderr)
+    else:
+        raise DownloadError(str(last_error))
+
+    digest = sha256_file(job.path + ".part", chunk_size)
+    _finish_part(job)
+    manifest.put(filename, {"size": size, "sha256": digest, "url": job.url})
+    return {"path": job.path, "status": "downloaded", "size": size, "sha256": digest}
+
+
+def download_all(jobs: Iterable[DownloadJob], workers: int = DEFAULT_WORKERS,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, verify: bool = False) -> List[Dict[str, Any]]:
+    """
+    Download jobs with a worker pool
+
+    Returns:
+        one result per job, in completion order; failures have status 'failed' and 'error'
+    """
+    jobs = list(jobs)
+    manifests: Dict[str, Manifest] = {}
+    for job in jobs:
+        directory = os.path.dirname(os.path.abspath(job.path))
+        if directory not in manifests:
+            manifests[directory] = Manifest(directory)
+
+    def run(job: DownloadJob) -> Dict[str, Any]:
+        manifest = manifests[os.path.dirname(os.path.abspath(job.path))]
+        try:
+            return download(job, manifest, chunk_size, verify)
+        except (DownloadError, requests.exceptions.RequestException, OSError) as e:
+            return {"path": job.path, "status": "failed", "error": str(e)}
+
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(run, job): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            result = future.result()
+            results.append(result)
+
+            done = f"[{len(results)}/{len(jobs)}]"
+            if result["status"] == "downloaded":
+                print(f"{done} ✓ {job.label} ({result['size'] / 1024 / 1024:.1f} MB)", file=sys.stderr)
+            elif result["status"] == "skipped":
+                print(f"{done} = {job.label} (already present)", file=sys.stderr)
+            else:
+                print(f"{done} ✗ {job.label}: {result['error']}", file=sys.stderr)
+    return results
@@ -4,45 +4,17 @@ Suno Task Fetch Script
 Fetch Suno music generation task status and results
 """
 
-import os
 import sys
 import json
 import argparse
 import requests
 
-# API Configuration
-BASE_URL = os.environ.get("ALLAPI_BASE_URL", "https://allapi.store/")
-API_KEY = os.environ.get("ALLAPI_KEY", "")
-
-def check_api_key():
-    """Check if API key is set"""
-    if not API_KEY:
-        print("Error: ALLAPI_KEY environment variable not set", file=sys.stderr)
-        print("Please set it using: export ALLAPI_KEY='your-api-key'", file=sys.stderr)
-        sys.exit(1)
-
-def fetch_task(task_id: str) -> dict:
-    """Fetch task status and results"""
-    url = f"{BASE_URL}suno/fetch"
-    headers = {
-        "Authorization": f"Bearer {API_KEY}",
-        "Content-Type": "application/json"
-    }
-    body = {"ids": [task_id]}
+from suno_client import check_api_key, get_client
 
+def fetch_task(task_id: str, use_cache: bool = True) -> dict:
+    """Fetch task status and results (finished tasks come from the local cache)"""
     try:
-        # AllAPI requires POST method for fetch
-        response = requests.post(url, json=body, headers=headers)
-        response.raise_for_status()
-        result = response.json()
-
-        # Parse response format: {"code": "success", "data": [...]}
-        if result.get("code") == "success":
-            data_list = result.get("data", [])
-            if data_list and len(data_list) > 0:
-                return data_list[0]
-
-        return {}
+        return get_client().fetch_task(task_id, use_cache)
     except requests.exceptions.RequestException as e:
         print(f"Error fetching task: {e}", file=sys.stderr)
         sys.exit(1)
@@ -74,6 +46,8 @@ Examples:
     parser.add_argument("task_id", help="Task ID to fetch")
     parser.add_argument("--id", dest="task_id_alt", help="Task ID (alternative)")
     parser.add_argument("--json", action="store_true", help="Output raw JSON")
+    parser.add_argument("--refresh", action="store_true",
+                       help="Always query the API, even for finished tasks in the local cache")
 
     args = parser.parse_args()
 
@@ -87,7 +61,7 @@ Examples:
     check_api_key()
 
     # Fetch task
-    task = fetch_task(task_id)
+    task = fetch_task(task_id, use_cache=not args.refresh)
 
     if not task:
         print(f"No task found with ID: {task_id}", file=sys.stderr)
@@ -6,35 +6,19 @@ Generate AI music using AllAPI Suno API with Persona support
 
 import os
 import sys
-import time
 import json
 import argparse
 import requests
-from typing import Optional, Dict, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Dict, Any, List
 
-# API Configuration
-BASE_URL = os.environ.get("ALLAPI_BASE_URL", "https://allapi.store/")
-API_KEY = os.environ.get("ALLAPI_KEY", "")
-
-def check_api_key():
-    """Check if API key is set"""
-    if not API_KEY:
-        print("Error: ALLAPI_KEY environment variable not set", file=sys.stderr)
-        print("Please set it using: export ALLAPI_KEY='your-api-key'", file=sys.stderr)
-        sys.exit(1)
+from suno_client import check_api_key, extract_task_id, get_client
+from poll_scheduler import get_scheduler
 
 def submit_music_task(params: Dict[str, Any]) -> Dict[str, Any]:
     """Submit music generation task to Suno API"""
-    url = f"{BASE_URL}suno/submit/music"
-    headers = {
-        "Authorization": f"Bearer {API_KEY}",
-        "Content-Type": "application/json"
-    }
-
     try:
-        response = requests.post(url, json=params, headers=headers)
-        response.raise_for_status()
-        return response.json()
+        return get_client().submit_music(params)
     except requests.exceptions.RequestException as e:
         print(f"Error submitting task: {e}", file=sys.stderr)
         if hasattr(e, 'response') and e.response is not None:
@@ -43,57 +27,46 @@ def submit_music_task(params: Dict[str, Any]) -> Dict[str, Any]:
 
 def fetch_task(task_id: str) -> Dict[str, Any]:
     """Fetch task status and results"""
-    url = f"{BASE_URL}suno/fetch"
-    headers = {
-        "Authorization": f"Bearer {API_KEY}",
-        "Content-Type": "application/json"
-    }
-    body = {"ids": [task_id]}
-
     try:
-        # AllAPI requires POST method for fetch
-        response = requests.post(url, json=body, headers=headers)
-        response.raise_for_status()
-        result = response.json()
-
-        # Parse response format: {"code": "success", "data": [...]}
-        if result.get("code") == "success":
-            data_list = result.get("data", [])
-            if data_list and len(data_list) > 0:
-                return data_list[0]
-
-        return {}
+        return get_client().fetch_task(task_id)
     except requests.exceptions.RequestException as e:
         print(f"Error fetching task: {e}", file=sys.stderr)
         sys.exit(1)
 
-def wait_for_completion(task_id: str, interval: int = 5, timeout: int = 300) -> Dict[str, Any]:
-    """Wait for task completion with polling"""
-    start_time = time.time()
+def wait_for_completion(task_id: str, mode: Optional[str] = None, model: Optional[str] = None,
+                        timeout: Optional[float] = None) -> Dict[str, Any]:
+    """Wait for task completion via the shared poll scheduler
 
-    print(f"Waiting for task {task_id} to complete...")
+    The poll schedule and default timeout adapt to past durations of the same mode/model.
+    """
+    scheduler = get_scheduler()
+    eta = scheduler.estimate(mode, model)
+    expected = f" (expected ~{eta:.0f}s)" if eta else ""
+    print(f"Waiting for task {task_id} to complete{expected}...")
 
-    while True:
-        if time.time() - start_time > timeout:
-            print(f"Timeout waiting for task {task_id}", file=sys.stderr)
-            sys.exit(1)
+    def show_status(task):
+        print(f"Status: {task.get('status', '')}...", end="\r", flush=True)
 
-        task = fetch_task(task_id)
-        status = task.get("status", "")
-
-        print(f"Status: {status}...", end="\r", flush=True)
+    try:
+        task = scheduler.wait(task_id, timeout, on_status=show_status, mode=mode, model=model)
+    except TimeoutError:
+        print(f"\nTimeout waiting for task {task_id}", file=sys.stderr)
+        print(f"The task may still finish; check later with: fetch.py {task_id}", file=sys.stderr)
+        sys.exit(1)
+    except requests.exceptions.RequestException as e:
+        print(f"\nError fetching task: {e}", file=sys.stderr)
+        sys.exit(1)
 
-        if status == "SUCCESS":
-            print(f"\n✓ Task completed successfully!")
-            return task
-        elif status == "FAILURE":
-            print(f"\n✗ Task failed: {task.get('failReason', 'Unknown error')}", file=sys.stderr)
-            sys.exit(1)
-        elif status in ["NOT_START", "SUBMITTED", "QUEUED", "IN_PROGRESS"]:
-            time.sleep(interval)
-        else:
-            print(f"\nUnknown status: {status}", file=sys.stderr)
-            sys.exit(1)
+    status = task.get("status", "")
+    if status == "SUCCESS":
+        print(f"\n✓ Task completed successfully!")
+        return task
+    elif status == "FAILURE":
+        print(f"\n✗ Task failed: {task.get('failReason', 'Unknown error')}", file=sys.stderr)
+        sys.exit(1)
+    else:
+        print(f"\nUnknown status: {status}", file=sys.stderr)
+        sys.exit(1)
 
 def format_output(task: Dict[str, Any]) -> str:
     """Format task output for display"""
@@ -247,7 +220,191 @@ def build_concat_params(args) -> Dict[str, Any]:
 
     return params
 
-def main():
+def build_params(args) -> Dict[str, Any]:
+    """Validate mode-specific arguments and build the request parameters
+
+    Raises:
+        ValueError: required parameters for the mode are missing
+    """
+    # Validate Persona parameters
+    if hasattr(args, 'persona_id') and args.persona_id:
+        if args.model not in ["chirp-v3-5-tau", "chirp-v4-tau"]:
+            print("⚠️  Warning: Persona requires chirp-v3-5-tau or chirp-v4-tau model", file=sys.stderr)
+            print(f"   Current model: {args.model}", file=sys.stderr)
+        if not hasattr(args, 'artist_clip_id') or not args.artist_clip_id:
+            print("⚠️  Warning: Persona usage works best with --artist-clip-id", file=sys.stderr)
+
+    # Validate required parameters based on mode
+    if args.mode == "inspiration":
+        if not args.prompt:
+            raise ValueError("prompt is required for inspiration mode")
+        return build_inspiration_params(args.prompt, args.model)
+
+    elif args.mode == "custom":
+        if not args.title or not args.tags or not args.prompt:
+            raise ValueError("--title, --tags, and --prompt are required for custom mode")
+        return build_custom_params(args)
+
+    elif args.mode == "extend":
+        if not args.task_id or not args.continue_at or not args.continue_clip_id or not args.prompt:
+            raise ValueError("--task-id, --continue-at, --continue-clip-id, and --prompt are required for extend mode")
+        return build_extend_params(args)
+
+    elif args.mode == "cover":
+        if not args.cover_clip_id or not args.prompt:
+            raise ValueError("--cover-clip-id and --prompt are required for cover mode")
+        return build_cover_params(args)
+
+    elif args.mode == "singer-style":
+        if not args.title or not args.tags or not args.prompt:
+            raise ValueError("--title, --tags, and --prompt are required for singer-style mode")
+        return build_singer_style_params(args)
+
+    elif args.mode == "concat":
+        if not args.concat_clips:
+            raise ValueError("--concat-clips is required for concat mode (at least 2 clip IDs)")
+        return build_concat_params(args)
+
+    raise ValueError(f"Unknown mode: {args.mode}")
+
+def load_manifest(path: str) -> List[Dict[str, Any]]:
+    """Load generation jobs from a JSON array or JSON Lines file
+
+    Each job uses the CLI option names (hyphens or underscores), e.g.
+    {"mode": "custom", "title": "Track 1", "tags": "pop", "prompt": "...", "model": "chirp-v4"}
+    An optional "name" labels the job in progress output and results.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read().strip()
+
+    if text.startswith("["):
+        jobs = json.loads(text)
+    else:
+        jobs = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    if not all(isinstance(job, dict) for job in jobs):
+        raise ValueError("Each manifest entry must be a JSON object")
+    return jobs
+
+# Options that configure the batch run itself rather than its jobs
+BATCH_OPTIONS = ("manifest", "concurrency", "results")
+
+def manifest_defaults(parser: argparse.ArgumentParser,
+                      args: Optional[argparse.Namespace] = None) -> Dict[str, Any]:
+    """Values manifest jobs are merged over: the options given with --manifest, else the parser defaults"""
+    values = vars(args if args is not None else parser.parse_args([]))
+    return {key: value for key, value in values.items() if key not in BATCH_OPTIONS}
+
+def option_choices(parser: argparse.ArgumentParser) -> Dict[str, List[Any]]:
+    """Allowed values of every option that has choices (--mode, --model, --vocal-gender ...)"""
+    return {action.dest: list(action.choices) for action in parser._actions if action.choices}
+
+def job_args(job: Dict[str, Any], defaults: Dict[str, Any],
+             choices: Optional[Dict[str, List[Any]]] = None) -> argparse.Namespace:
+    """Merge a manifest job over the CLI defaults into an args namespace for the build_* functions"""
+    values = dict(defaults)
+    for key, value in job.items():
+        if key == "name":
+            continue
+        dest = key.replace("-", "_")
+        if dest not in defaults:
+            raise ValueError(f"Unknown job option: {key}")
+        if choices and dest in choices and value not in choices[dest]:
+            raise ValueError(f"Invalid {key} {value!r} (choose from {', '.join(map(str, choices[dest]))})")
+        if dest == "concat_clips" and isinstance(value, list):
+            value = ",".join(value)
+        values[dest] = value
+    return argparse.Namespace(**values)
+
+def run_job(index: int, job: Dict[str, Any], defaults: Dict[str, Any], wait: bool) -> Dict[str, Any]:
+    """Submit one manifest job (and wait for it) and return its result record"""
+    record = {"index": index, "name": job.get("name"), "mode": job.get("mode", defaults["mode"]),
+              "task_id": None, "status": None, "clip_ids": [], "fail_reason": None, "data": []}
+    try:
+        args = job_args(job, defaults)
+        params = build_params(args)
+        task_id = extract_task_id(get_client().submit_music(params))
+        if not task_id:
+            raise ValueError("No task ID in response")
+        record["task_id"] = task_id
+        record["status"] = "SUBMITTED"
+        print(f"[{index}] ✓ Task submitted: {task_id}", file=sys.stderr)
+
+        if wait:
+            task = get_scheduler().wait(task_id, args.timeout, mode=args.mode, model=args.model)
+            data = task.get("data") or []
+            record["status"] = task.get("status")
+            record["fail_reason"] = task.get("failReason")
+            record["data"] = data
+            record["clip_ids"] = [clip.get("id") for clip in data if clip.get("id")]
+    except (ValueError, TimeoutError, requests.exceptions.RequestException) as e:
+        record["status"] = "ERROR"
+        record["fail_reason"] = str(e)
+    return record
+
+def run_manifest(path: str, parser: argparse.ArgumentParser, concurrency: int = 4,
+                 results_path: Optional[str] = None, wait: bool = True,
+                 args: Optional[argparse.Namespace] = None) -> List[Dict[str, Any]]:
+    """Run every job in a manifest with bounded concurrency
+
+    Jobs are merged over the CLI options in `args` (e.g. --model, --timeout)
+    and checked against the parser's choices before anything is submitted.
+    Up to `concurrency` jobs are submitted and polled at once. Each result is
+    appended to the results file (JSON Lines) as soon as its task finishes,
+    so partial progress survives an interrupted run.
+    """
+    try:
+        jobs = load_manifest(path)
+    except (OSError, ValueError) as e:
+        print(f"Error reading manifest: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    defaults = manifest_defaults(parser, args)
+    choices = option_choices(parser)
+    invalid = []
+    for i, job in enumerate(jobs, 1):
+        try:
+            job_args(job, defaults, choices)
+        except ValueError as e:
+            invalid.append(f"  [{i}] {job.get('name') or 'job ' + str(i)}: {e}")
+    if invalid:
+        print("Error: invalid manifest job(s), nothing submitted:", file=sys.stderr)
+        print("\n".join(invalid), file=sys.stderr)
+        sys.exit(1)
+
+    results_path = results_path or f"{os.path.splitext(path)[0]}.results.jsonl"
+    results = []
+
+    print(f"Running {len(jobs)} job(s) from {path} (concurrency {concurrency})...", file=sys.stderr)
+
+    with open(results_path, 'a', encoding='utf-8') as out, ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(run_job, i, job, defaults, wait) for i, job in enumerate(jobs, 1)]
+        for future in as_completed(futures):
+            record = future.result()
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            results.append(record)
+
+            label = record["name"] or record["task_id"] or f"job {record['index']}"
+            if record["status"] == "SUCCESS":
+                print(f"[{record['index']}] ✓ {label}: {', '.join(record['clip_ids'])} "
+                      f"({len(results)}/{len(jobs)})", file=sys.stderr)
+            elif record["status"] == "SUBMITTED":
+                print(f"[{record['index']}] {label}: SUBMITTED ({len(results)}/{len(jobs)})", file=sys.stderr)
+            else:
+                print(f"[{record['index']}] ✗ {label}: {record['status']} - {record['fail_reason']} "
+                      f"({len(results)}/{len(jobs)})", file=sys.stderr)
+
+    ok = sum(1 for r in results if r["status"] in ("SUCCESS", "SUBMITTED"))
+    print(f"\n{'='*60}", file=sys.stderr)
+    print(f"Batch complete: {ok}/{len(jobs)} succeeded", file=sys.stderr)
+    print(f"Results: {os.path.abspath(results_path)}", file=sys.stderr)
+
+    if ok < len(jobs):
+        sys.exit(1)
+    return results
+
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         description="Generate AI music using AllAPI Suno API with Persona support",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -266,6 +423,9 @@ Examples:
   # Cover mode
   %(prog)s --mode cover --cover-clip-id "xxx" --prompt "Remix this song"
 
+  # Batch mode: run every job in a manifest, 4 at a time
+  %(prog)s --manifest album.json --concurrency 4 --results album.results.jsonl
+
 Persona Usage:
   1. Generate a song and get the clip_id
   2. Use singer-style mode with --persona-id and --artist-clip-id
@@ -282,6 +442,8 @@ Persona Usage:
                        help="Model version (default: chirp-v4). Use chirp-v3-5-tau or chirp-v4-tau for Persona")
     parser.add_argument("--no-wait", action="store_true",
                        help="Return immediately without waiting for completion")
+    parser.add_argument("--timeout", type=float,
+                       help="Seconds to wait for completion (default: adaptive, at least 300)")
 
     # Custom mode parameters
     parser.add_argument("--title", help="Song title (custom/singer-style mode)")
@@ -307,62 +469,38 @@ Persona Usage:
     parser.add_argument("--persona-id", help="Persona ID for artist_consistency (singer-style mode)")
     parser.add_argument("--artist-clip-id", help="Original clip ID for Persona (singer-style mode)")
 
+    # Batch mode parameters
+    parser.add_argument("--manifest", help="Run all jobs in a JSON / JSON Lines manifest (batch mode)")
+    parser.add_argument("--concurrency", type=int, default=4,
+                       help="Jobs in flight at once in batch mode (default: 4)")
+    parser.add_argument("--results", help="Results file for batch mode (default: <manifest>.results.jsonl)")
+
+    return parser
+
+def main():
+    parser = build_parser()
     args = parser.parse_args()
 
     # Check API key
     check_api_key()
 
-    # Validate Persona parameters
-    if hasattr(args, 'persona_id') and args.persona_id:
-        if args.model not in ["chirp-v3-5-tau", "chirp-v4-tau"]:
-            print("⚠️  Warning: Persona requires chirp-v3-5-tau or chirp-v4-tau model", file=sys.stderr)
-            print(f"   Current model: {args.model}", file=sys.stderr)
-        if not hasattr(args, 'artist_clip_id') or not args.artist_clip_id:
-            print("⚠️  Warning: Persona usage works best with --artist-clip-id", file=sys.stderr)
-
-    # Validate required parameters based on mode
-    if args.mode == "inspiration":
-        if not args.prompt:
-            parser.error("prompt is required for inspiration mode")
-        params = build_inspiration_params(args.prompt, args.model)
-
-    elif args.mode == "custom":
-        if not args.title or not args.tags or not args.prompt:
-            parser.error("--title, --tags, and --prompt are required for custom mode")
-        params = build_custom_params(args)
-
-    elif args.mode == "extend":
-        if not args.task_id or not args.continue_at or not args.continue_clip_id or not args.prompt:
-            parser.error("--task-id, --continue-at, --continue-clip-id, and --prompt are required for extend mode")
-        params = build_extend_params(args)
-
-    elif args.mode == "cover":
-        if not args.cover_clip_id or not args.prompt:
-            parser.error("--cover-clip-id and --prompt are required for cover mode")
-        params = build_cover_params(args)
-
-    elif args.mode == "singer-style":
-        if not args.title or not args.tags or not args.prompt:
-            parser.error("--title, --tags, and --prompt are required for singer-style mode")
-        params = build_singer_style_params(args)
+    if args.manifest:
+        if args.concurrency < 1:
+            parser.error("--concurrency must be at least 1")
+        run_manifest(args.manifest, parser, args.concurrency, args.results, wait=not args.no_wait, args=args)
+        return
 
-    elif args.mode == "concat":
-        if not args.concat_clips:
-            parser.error("--concat-clips is required for concat mode (at least 2 clip IDs)")
-        params = build_concat_params(args)
+    try:
+        params = build_params(args)
+    except ValueError as e:
+        parser.error(str(e))
 
     # Submit task
     print(f"Submitting {args.mode} music generation task...")
     result = submit_music_task(params)
 
     # Handle different response formats
-    if isinstance(result, dict):
-        if result.get("code") == "success":
-            task_id = result.get("data")
-        else:
-            task_id = result.get("task_id") or result.get("id")
-    else:
-        task_id = result
+    task_id = extract_task_id(result)
 
     if not task_id:
         print("Error: No task ID in response", file=sys.stderr)
@@ -378,7 +516,7 @@ Persona Usage:
         return
 
     # Poll for completion
-    task = wait_for_completion(task_id)
+    task = wait_for_completion(task_id, args.mode, args.model, args.timeout)
 
     # Extract clip IDs from response
     data = task.get("data", [])
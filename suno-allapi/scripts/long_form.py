@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Suno Long-Form Planner
+Build a full-length track from a lyric sheet: generate → extend … → concat
+
+The lyric sheet is split on its structure tags ([Verse 1], [Chorus], ...) and
+packed into segments that fit one generation each. The first segment is a
+custom-mode generation; every following segment is an extend of the previous
+clip, submitted the moment that clip finishes (continue_at = its duration).
+When the lyrics run out before the target duration, instrumental extends are
+added until it is reached. The finished chain is merged with a concat task.
+
+Each clip of the first generation can start its own branch (--branches 2):
+branches run their extend chains in parallel on one event loop and each ends
+in its own concat, giving alternative full-length takes for the same wall-clock
+time as one.
+
+Usage:
+    python3 long_form.py lyrics.txt --title "Night Drive" --tags "synthwave" --target 360
+    python3 long_form.py lyrics.txt --title "Night Drive" --tags "synthwave" --plan-only
+"""
+
+import re
+import sys
+import json
+import math
+import asyncio
+import argparse
+import contextlib
+from typing import Any, Dict, List, Optional
+
+from suno_client import check_api_key
+from suno_async import NETWORK_ERRORS, SunoOrchestrator, aiohttp
+from downloader import DownloadError
+from generate import build_concat_params, build_custom_params, build_extend_params, build_parser
+
+# Rough sung length used to pack sections into segments
+SECONDS_PER_LINE = 4.0
+SECONDS_PER_SECTION = 6.0
+# Content per generation: a custom-mode clip runs longer than an extension
+FIRST_SEGMENT_SECONDS = 150
+EXTEND_SEGMENT_SECONDS = 90
+# Hard limit on extends per branch (lyric segments + instrumental fill)
+MAX_SEGMENTS = 12
+
+FILL_PROMPT = "[Instrumental Break]"
+OUTRO_PROMPT = "[Outro]\n[Fade Out]"
+
+TAG_LINE = re.compile(r"^\s*\[[^\]]+\]\s*$")
+
+
+def split_sections(lyrics: str) -> List[str]:
+    """Split a lyric sheet at structure tag lines; text before the first tag joins the first section"""
+    sections: List[List[str]] = []
+    for line in lyrics.strip().splitlines():
+        if TAG_LINE.match(line) and (not sections or any(l.strip() for l in sections[-1] if not TAG_LINE.match(l))):
+            sections.append([line])
+        elif sections:
+            sections[-1].append(line)
+        else:
+            sections.append([line])
+    return ["\n".join(section).strip() for section in sections if "\n".join(section).strip()]
+
+
+def estimate_seconds(text: str) -> float:
+    """Approximate sung duration of a lyric block"""
+    lines = [line for line in text.splitlines() if line.strip()]
+    tags = sum(1 for line in lines if TAG_LINE.match(line))
+    return (len(lines) - tags) * SECONDS_PER_LINE + max(tags, 1) * SECONDS_PER_SECTION
+
+
+def plan_segments(lyrics: str, target: Optional[float] = None,
+                  first_seconds: float = FIRST_SEGMENT_SECONDS,
+                  extend_seconds: float = EXTEND_SEGMENT_SECONDS) -> List[Dict[str, Any]]:
+    """
+    Pack lyric sections into generation segments
+
+    Sections are never split. Instrumental segments are appended when the
+    estimated length falls short of `target`.
+
+    Returns:
+        [{'prompt', 'estimate', 'kind': 'lyrics' | 'fill' | 'outro'}]
+    """
+    segments: List[Dict[str, Any]] = []
+    for section in split_sections(lyrics):
+        seconds = estimate_seconds(section)
+        limit = first_seconds if len(segments) <= 1 else extend_seconds
+        if segments and segments[-1]["estimate"] + seconds <= limit:
+            segments[-1]["prompt"] += "\n\n" + section
+            segments[-1]["estimate"] += seconds
+        else:
+            segments.append({"prompt": section, "estimate": seconds, "kind": "lyrics"})
+
+    if not segments:
+        raise ValueError("lyric sheet is empty")
+
+    total = sum(s["estimate"] for s in segments)
+    if target and total < target:
+        fills = min(math.ceil((target - total) / extend_seconds), MAX_SEGMENTS - len(segments))
+        for i in range(fills):
+            last = i == fills - 1
+            segments.append({"prompt": OUTRO_PROMPT if last else FILL_PROMPT,
+                             "estimate": extend_seconds, "kind": "outro" if last else "fill"})
+    if len(segments) > MAX_SEGMENTS:
+        raise ValueError(f"lyric sheet needs {len(segments)} segments (limit {MAX_SEGMENTS})")
+    return segments
+
+
+def clip_duration(clip: Dict[str, Any]) -> Optional[float]:
+    metadata = clip.get("metadata") if isinstance(clip.get("metadata"), dict) else {}
+    value = clip.get("duration") or metadata.get("duration")
+    try:
+        return float(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+class LongFormPlanner:
+    """
+    Run a segment plan on a SunoOrchestrator
+
+    Args:
+        orchestrator: open SunoOrchestrator
+        title / tags / model / vocal_gender: song settings (custom mode for the first segment)
+        target: desired length in seconds; extra instrumental extends are issued until reached
+    """
+
+    def __init__(self, orchestrator: SunoOrchestrator, title: str, tags: str, model: str = "chirp-v4",
+                 vocal_gender: Optional[str] = None, target: Optional[float] = None,
+                 timeout: Optional[float] = None):
+        self.orchestrator = orchestrator
+        self.target = target
+        self.timeout = timeout
+        self.defaults = vars(build_parser().parse_args([]))
+        self.defaults.update(title=title, tags=tags, model=model, vocal_gender=vocal_gender or "m")
+
+    def _params(self, builder, **values) -> Dict[str, Any]:
+        """Run a generate.py builder with the song defaults (its notes go to stderr, not the JSON output)"""
+        with contextlib.redirect_stdout(sys.stderr):
+            return builder(argparse.Namespace(**{**self.defaults, **values}))
+
+    async def _generate(self, params: Dict[str, Any], mode: str) -> Dict[str, Any]:
+        task_id = await self.orchestrator.submit(params)
+        task = await self.orchestrator.wait(task_id, self.timeout, mode=mode, model=self.defaults["model"])
+        if task.get("status") != "SUCCESS" or not task.get("data"):
+            raise RuntimeError(f"{mode} task {task_id} {task.get('status')}: {task.get('failReason') or 'no clips'}")
+        return task
+
+    async def run(self, segments: List[Dict[str, Any]], branches: int = 1) -> Dict[str, Any]:
+        """
+        Generate the first segment, then extend and concat each branch concurrently
+
+        Returns:
+            {'first_task_id', 'branches': [branch result, ...]}
+        """
+        print(f"[1/{len(segments)}] generating opening segment...", file=sys.stderr)
+        first = await self._generate(self._params(build_custom_params, prompt=segments[0]["prompt"]), "custom")
+        clips = first["data"][:max(1, branches)]
+
+        results = await asyncio.gather(*(
+            self._run_branch(n, first, clip, segments) for n, clip in enumerate(clips, 1)
+        ))
+        return {"first_task_id": first.get("task_id") or first.get("id"), "branches": list(results)}
+
+    async def _run_branch(self, branch: int, first: Dict[str, Any], clip: Dict[str, Any],
+                          segments: List[Dict[str, Any]]) -> Dict[str, Any]:
+        task_id = first.get("task_id") or first.get("id")
+        chain = [{"task_id": task_id, "clip_id": clip.get("id"), "duration": clip_duration(clip)}]
+        result = {"branch": branch, "status": "RUNNING", "segments": chain, "total_duration": None,
+                  "concat_task_id": None, "song_clip_ids": [], "error": None}
+        try:
+            for index, segment in enumerate(segments[1:], 2):
+                previous = chain[-1]
+                # Fill was planned from estimates; real clips may already be long enough
+                durations = [c["duration"] for c in chain]
+                if segment["kind"] == "fill" and self.target and all(durations) and sum(durations) >= self.target:
+                    continue
+                continue_at = previous["duration"] or segments[index - 2]["estimate"]
+                print(f"  branch {branch} [{index}/{len(segments)}] extending {previous['clip_id']} "
+                      f"at {continue_at:.0f}s ({segment['kind']})", file=sys.stderr)
+                params = self._params(build_extend_params, prompt=segment["prompt"], task_id=previous["task_id"],
+                                      continue_at=continue_at, continue_clip_id=previous["clip_id"])
+                task = await self._generate(params, "extend")
+                extension = task["data"][0]
+                chain.append({"task_id": task.get("task_id") or task.get("id"), "clip_id": extension.get("id"),
+                              "duration": clip_duration(extension)})
+
+            durations = [c["duration"] for c in chain]
+            result["total_duration"] = sum(durations) if all(durations) else None
+            if self.target and result["total_duration"] and result["total_duration"] < self.target:
+                print(f"  branch {branch}: {result['total_duration']:.0f}s is short of the "
+                      f"{self.target:.0f}s target", file=sys.stderr)
+
+            if len(chain) > 1:
+                params = self._params(build_concat_params, concat_clips=",".join(c["clip_id"] for c in chain))
+                print(f"  branch {branch}: concatenating {len(chain)} clips", file=sys.stderr)
+                task = await self._generate(params, "concat")
+                result["concat_task_id"] = task.get("task_id") or task.get("id")
+                result["song_clip_ids"] = [c.get("id") for c in task["data"] if c.get("id")]
+            else:
+                result["song_clip_ids"] = [chain[0]["clip_id"]]
+            result["status"] = "SUCCESS"
+        except (RuntimeError, TimeoutError, ValueError) + NETWORK_ERRORS as e:
+            result["status"] = "ERROR"
+            result["error"] = str(e)
+        return result
+
+
+async def run_plan(args, segments: List[Dict[str, Any]]) -> Dict[str, Any]:
+    async with SunoOrchestrator() as orchestrator:
+        planner = LongFormPlanner(orchestrator, args.title, args.tags, args.model,
+                                  args.vocal_gender, args.target, args.timeout)
+        result = await planner.run(segments, args.branches)
+        if args.download:
+            for branch in result["branches"]:
+                if branch["concat_task_id"]:
+                    try:
+                        task = (await orchestrator.client.fetch_tasks([branch["concat_task_id"]]))[0]
+                        branch["files"] = await orchestrator.download(task, args.download)
+                    except (OSError, DownloadError) + NETWORK_ERRORS as e:
+                        branch["status"] = "ERROR"
+                        branch["error"] = f"download failed: {e}"
+        print(f"suno/fetch requests: {orchestrator.requests_sent}", file=sys.stderr)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate a long-form Suno track from a lyric sheet (generate → extend … → concat)",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Plan only: show how the lyrics are split into segments
+  %(prog)s lyrics.txt --title "Night Drive" --tags "synthwave" --target 360 --plan-only
+
+  # Two parallel takes, at least 6 minutes each, download the merged songs
+  %(prog)s lyrics.txt --title "Night Drive" --tags "synthwave" --target 360 --branches 2 --download out/
+        """
+    )
+    parser.add_argument("lyrics", help="Lyric sheet with [Verse] / [Chorus] ... tags ('-' for stdin)")
+    parser.add_argument("--title", required=True, help="Song title")
+    parser.add_argument("--tags", required=True, help="Music styles, comma-separated")
+    parser.add_argument("--target", type=float, help="Target duration in seconds")
+    parser.add_argument("--model", default="chirp-v4", help="Model version (default: chirp-v4)")
+    parser.add_argument("--vocal-gender", choices=["m", "f"], help="Vocal gender: m/f")
+    parser.add_argument("--branches", type=int, default=1, choices=[1, 2],
+                       help="Extend chains started from the first generation's clips (default: 1)")
+    parser.add_argument("--timeout", type=float, help="Seconds to wait per task (default: adaptive)")
+    parser.add_argument("--download", metavar="DIR", help="Download the merged songs into DIR")
+    parser.add_argument("--plan-only", action="store_true", help="Print the segment plan without submitting")
+    args = parser.parse_args()
+
+    try:
+        with (sys.stdin if args.lyrics == "-" else open(args.lyrics, 'r', encoding='utf-8')) as f:
+            segments = plan_segments(f.read(), args.target)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    estimate = sum(s["estimate"] for s in segments)
+    print(f"Plan: {len(segments)} segment(s), ~{estimate:.0f}s estimated", file=sys.stderr)
+    if args.plan_only:
+        print(json.dumps(segments, indent=2, ensure_ascii=False))
+        return
+
+    if aiohttp is None:
+        print("Error: aiohttp is required: pip install aiohttp", file=sys.stderr)
+        sys.exit(1)
+    check_api_key()
+
+    try:
+        result = asyncio.run(run_plan(args, segments))
+    except (RuntimeError, TimeoutError, ValueError) + NETWORK_ERRORS as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    if any(branch["status"] != "SUCCESS" for branch in result["branches"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,32 +4,17 @@ Suno Lyrics Generation Script
 Generate lyrics using AllAPI Suno API
 """
 
-import os
 import sys
-import time
 import json
 import argparse
 import requests
+from typing import Optional
 
-# API Configuration
-BASE_URL = os.environ.get("ALLAPI_BASE_URL", "https://allapi.store/")
-API_KEY = os.environ.get("ALLAPI_KEY", "")
-
-def check_api_key():
-    """Check if API key is set"""
-    if not API_KEY:
-        print("Error: ALLAPI_KEY environment variable not set", file=sys.stderr)
-        print("Please set it using: export ALLAPI_KEY='your-api-key'", file=sys.stderr)
-        sys.exit(1)
+from suno_client import check_api_key, extract_task_id, get_client
+from poll_scheduler import get_scheduler
 
 def submit_lyrics_task(prompt: str, model: str = "chirp-v4") -> dict:
     """Submit lyrics generation task to Suno API"""
-    url = f"{BASE_URL}suno/submit/music"
-    headers = {
-        "Authorization": f"Bearer {API_KEY}",
-        "Content-Type": "application/json"
-    }
-
     params = {
         "prompt": prompt,
         "generation_type": "TEXT",
@@ -40,63 +25,47 @@ def submit_lyrics_task(prompt: str, model: str = "chirp-v4") -> dict:
     }
 
     try:
-        response = requests.post(url, json=params, headers=headers)
-        response.raise_for_status()
-        return response.json()
+        return get_client().submit_music(params)
     except requests.exceptions.RequestException as e:
         print(f"Error submitting task: {e}", file=sys.stderr)
-        if hasattr(e.response, 'text'):
+        if getattr(e, 'response', None) is not None:
             print(f"Response: {e.response.text}", file=sys.stderr)
         sys.exit(1)
 
 def fetch_task(task_id: str) -> dict:
     """Fetch task status and results"""
-    url = f"{BASE_URL}suno/fetch"
-    headers = {
-        "Authorization": f"Bearer {API_KEY}",
-        "Content-Type": "application/json"
-    }
-    params = {"ids": [task_id]}
-
     try:
-        response = requests.get(url, params=params, headers=headers)
-        response.raise_for_status()
-        data = response.json()
-
-        if data and len(data) > 0:
-            return data[0]
-        return {}
+        return get_client().fetch_task(task_id)
     except requests.exceptions.RequestException as e:
         print(f"Error fetching task: {e}", file=sys.stderr)
         sys.exit(1)
 
-def wait_for_completion(task_id: str, interval: int = 3, timeout: int = 120) -> dict:
+def wait_for_completion(task_id: str, model: str = "chirp-v4", timeout: Optional[float] = None) -> dict:
     """Wait for lyrics generation to complete"""
-    start_time = time.time()
-
     print(f"Generating lyrics for task {task_id}...")
 
-    while True:
-        if time.time() - start_time > timeout:
-            print(f"\nTimeout waiting for task {task_id}", file=sys.stderr)
-            sys.exit(1)
+    def show_status(task):
+        print(f"Status: {task.get('status', 'UNKNOWN')}...", end="\r")
 
-        task = fetch_task(task_id)
-        status = task.get("status", "UNKNOWN")
-
-        print(f"Status: {status}...", end="\r")
+    try:
+        task = get_scheduler().wait(task_id, timeout, on_status=show_status, mode="lyrics", model=model)
+    except TimeoutError:
+        print(f"\nTimeout waiting for task {task_id}", file=sys.stderr)
+        sys.exit(1)
+    except requests.exceptions.RequestException as e:
+        print(f"\nError fetching task: {e}", file=sys.stderr)
+        sys.exit(1)
 
-        if status == "SUCCESS":
-            print(f"\n✓ Lyrics generated successfully!")
-            return task
-        elif status == "FAILURE":
-            print(f"\n✗ Task failed: {task.get('failReason', 'Unknown error')}", file=sys.stderr)
-            sys.exit(1)
-        elif status in ["NOT_START", "SUBMITTED", "QUEUED", "IN_PROGRESS"]:
-            time.sleep(interval)
-        else:
-            print(f"\nUnknown status: {status}", file=sys.stderr)
-            sys.exit(1)
+    status = task.get("status", "UNKNOWN")
+    if status == "SUCCESS":
+        print(f"\n✓ Lyrics generated successfully!")
+        return task
+    elif status == "FAILURE":
+        print(f"\n✗ Task failed: {task.get('failReason', 'Unknown error')}", file=sys.stderr)
+        sys.exit(1)
+    else:
+        print(f"\nUnknown status: {status}", file=sys.stderr)
+        sys.exit(1)
 
 def display_lyrics(task: dict):
     """Display generated lyrics"""
@@ -148,7 +117,7 @@ Examples:
     # Submit task
     print("Submitting lyrics generation task...")
     result = submit_lyrics_task(args.prompt, args.model)
-    task_id = result.get("task_id") or result.get("id")
+    task_id = extract_task_id(result)
 
     if not task_id:
         print("Error: No task ID in response", file=sys.stderr)
@@ -164,7 +133,7 @@ Examples:
         return
 
     # Poll for completion
-    task = wait_for_completion(task_id)
+    task = wait_for_completion(task_id, args.model)
 
     # Display lyrics
     display_lyrics(task)
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Suno Poll Scheduler
+Coalesce status polling for many in-flight Suno tasks into one suno/fetch call per tick
+
+Instead of every waiter calling fetch_task() for its own task each interval,
+waiters register their task ID with a shared scheduler. A background thread
+sends all outstanding IDs in a single suno/fetch request per tick, resolves
+the waiters whose tasks reached a final status and drops those IDs from the
+next request. With N tasks in flight the request rate drops by a factor of N.
+
+Each task keeps its own adaptive schedule: one quick first check, then a sleep
+until the completion time predicted from local history (task_history.py), then
+exponential backoff with jitter once the prediction has passed. A tick fires
+when the earliest task is due and fetches every outstanding ID at once.
+
+Usage:
+    from poll_scheduler import get_scheduler
+
+    scheduler = get_scheduler()
+    task = scheduler.wait(task_id, mode="custom", model="chirp-v4")
+"""
+
+import sys
+import time
+import random
+import sqlite3
+import threading
+import requests
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+from suno_client import PENDING_STATUSES, SunoClient, get_client
+from task_history import DEFAULT_TIMEOUT, TaskHistory
+
+# Adaptive schedule (seconds)
+MIN_INTERVAL = 1.0
+MAX_INTERVAL = 20.0
+BACKOFF_FACTOR = 1.6
+JITTER = 0.2
+# IDs sent per suno/fetch request; larger sets are split across several requests in the same tick
+MAX_IDS_PER_FETCH = 50
+# Consecutive failed ticks before waiters are failed with the last error
+MAX_FETCH_ERRORS = 5
+
+StatusCallback = Callable[[Dict[str, Any]], None]
+
+
+def is_final(task: Dict[str, Any]) -> bool:
+    """SUCCESS, FAILURE or any status the API does not document as pending"""
+    status = task.get("status")
+    return bool(status) and status not in PENDING_STATUSES
+
+
+class AdaptiveBackoff:
+    """
+    Poll schedule for one task
+
+    The first check happens after `initial` seconds so immediate failures
+    surface quickly. With an ETA the next check is placed at the predicted
+    completion time; after that (or without an ETA) the delay grows by
+    `factor` up to `max_interval`, with ±jitter so many clients do not poll
+    in lockstep.
+    """
+
+    def __init__(self, eta: Optional[float] = None, initial: float = MIN_INTERVAL,
+                 factor: float = BACKOFF_FACTOR, max_interval: float = MAX_INTERVAL,
+                 jitter: float = JITTER):
+        self.eta = eta
+        self.initial = initial
+        self.factor = factor
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self._delay = initial
+        self._checks = 0
+
+    def next_delay(self, elapsed: float) -> float:
+        """Seconds until the next check, given seconds elapsed since submission"""
+        self._checks += 1
+        if self._checks > 1 and self.eta is not None and elapsed < self.eta - self.initial:
+            return self.eta - elapsed + random.uniform(0, self.initial)
+
+        delay = self._delay
+        self._delay = min(self._delay * self.factor, self.max_interval)
+        return max(self.initial, delay * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+
+# Scheduling helpers shared with suno_async.SunoOrchestrator, so both pollers follow one schedule
+
+def history_estimate(history: Optional[TaskHistory], mode: Optional[str], model: Optional[str]) -> Optional[float]:
+    """Predicted duration in seconds for a mode/model, None without history"""
+    if history is None or not mode:
+        return None
+    return history.estimate(mode, model or "")
+
+
+def history_timeout(history: Optional[TaskHistory], mode: Optional[str], model: Optional[str]) -> float:
+    """Default wait limit, scaled up for modes that historically run long"""
+    if history is None or not mode:
+        return DEFAULT_TIMEOUT
+    return history.timeout(mode, model or "")
+
+
+def task_backoff(history: Optional[TaskHistory], mode: Optional[str], model: Optional[str],
+                 min_interval: float = MIN_INTERVAL, max_interval: float = MAX_INTERVAL) -> AdaptiveBackoff:
+    """Poll schedule for a new task, using its history ETA when there is one"""
+    return AdaptiveBackoff(history_estimate(history, mode, model), min_interval, max_interval=max_interval)
+
+
+class _Waiter:
+    __slots__ = ("future", "callbacks", "backoff", "started", "next_check", "mode", "model")
+
+    def __init__(self, backoff: AdaptiveBackoff, mode: Optional[str], model: Optional[str], future=None):
+        self.future = future if future is not None else Future()
+        self.callbacks: List[StatusCallback] = []
+        self.backoff = backoff
+        self.started = time.time()
+        self.next_check = self.started + backoff.next_delay(0)
+        self.mode = mode
+        self.model = model
+
+
+def reschedule(waiters: Dict[str, _Waiter], task_ids: List[str], window: float):
+    """
+    Advance the schedule of every polled task due within `window` seconds
+
+    Tasks due shortly after a tick were just answered too; moving them on as
+    well merges jittered schedules into shared ticks instead of one each.
+    """
+    now = time.time()
+    for task_id in task_ids:
+        waiter = waiters.get(task_id)
+        if waiter is not None and waiter.next_check <= now + window:
+            waiter.next_check = now + waiter.backoff.next_delay(now - waiter.started)
+
+
+def deliver(waiter: _Waiter, task: Dict[str, Any], final: bool, history: Optional[TaskHistory]):
+    """Run a waiter's status callbacks; for a final task record its duration and resolve the future"""
+    task_id = task.get("task_id") or task.get("id")
+    for callback in waiter.callbacks:
+        try:
+            callback(task)
+        except Exception as e:
+            print(f"Warning: status callback failed for {task_id}: {e}", file=sys.stderr)
+    if final and task.get("status") == "SUCCESS" and waiter.mode and history is not None:
+        try:
+            history.record(task, waiter.mode, waiter.model, duration=time.time() - waiter.started)
+        except sqlite3.Error as e:
+            print(f"Warning: could not record task duration: {e}", file=sys.stderr)
+    if final and not waiter.future.done():
+        waiter.future.set_result(task)
+
+
+class PollScheduler:
+    """
+    Shared poller for Suno tasks
+
+    Args:
+        client: SunoClient used for suno/fetch (default: shared client)
+        history: TaskHistory for ETAs and recording durations (default: local history; False disables)
+        min_interval: first check delay and smallest gap between checks
+        max_interval: largest backoff delay once a task is past its ETA
+        max_ids: task IDs per suno/fetch request
+    """
+
+    def __init__(self, client: Optional[SunoClient] = None, history=None,
+                 min_interval: float = MIN_INTERVAL, max_interval: float = MAX_INTERVAL,
+                 max_ids: int = MAX_IDS_PER_FETCH):
+        self.client = client or get_client()
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.max_ids = max_ids
+        self.requests_sent = 0
+
+        if history is None:
+            try:
+                history = TaskHistory()
+            except (sqlite3.Error, OSError) as e:
+                print(f"Warning: task history unavailable ({e}), polling without ETA", file=sys.stderr)
+        self.history = history or None
+
+        self._waiters: Dict[str, _Waiter] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    # Registration
+
+    def estimate(self, mode: Optional[str], model: Optional[str]) -> Optional[float]:
+        """Predicted duration in seconds for a mode/model, None without history"""
+        return history_estimate(self.history, mode, model)
+
+    def timeout_for(self, mode: Optional[str], model: Optional[str]) -> float:
+        """Default wait limit, scaled up for modes that historically run long"""
+        return history_timeout(self.history, mode, model)
+
+    def watch(self, task_id: str, on_status: Optional[StatusCallback] = None,
+              mode: Optional[str] = None, model: Optional[str] = None) -> Future:
+        """
+        Register a task and return a Future resolved with its final task payload
+
+        on_status is called with every fetched payload for the task (pending ones too).
+        mode / model select the ETA used to schedule checks and label the recorded duration.
+        Watching the same ID twice shares one Future.
+        """
+        backoff = task_backoff(self.history, mode, model, self.min_interval, self.max_interval)
+        with self._cond:
+            waiter = self._waiters.get(task_id)
+            if waiter is None:
+                waiter = self._waiters[task_id] = _Waiter(backoff, mode, model)
+            if on_status:
+                waiter.callbacks.append(on_status)
+            self._ensure_thread()
+            self._cond.notify_all()
+        return waiter.future
+
+    def unwatch(self, task_id: str):
+        """Stop polling a task (its Future is cancelled if still pending)"""
+        with self._cond:
+            waiter = self._waiters.pop(task_id, None)
+        if waiter:
+            waiter.future.cancel()
+
+    def wait(self, task_id: str, timeout: Optional[float] = None,
+             on_status: Optional[StatusCallback] = None,
+             mode: Optional[str] = None, model: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Block until the task reaches a final status
+
+        Args:
+            timeout: seconds to wait (default: timeout_for(mode, model))
+
+        Raises:
+            TimeoutError: still pending after timeout seconds
+            requests.exceptions.RequestException: suno/fetch kept failing
+        """
+        if timeout is None:
+            timeout = self.timeout_for(mode, model)
+        future = self.watch(task_id, on_status, mode, model)
+        try:
+            return future.result(timeout)
+        except Exception as e:
+            # concurrent.futures.TimeoutError is not the builtin before Python 3.11
+            if not future.done():
+                self.unwatch(task_id)
+                raise TimeoutError(f"Timeout waiting for task {task_id}") from e
+            raise
+
+    def pending(self) -> List[str]:
+        with self._cond:
+            return list(self._waiters)
+
+    # Background loop
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="suno-poll-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the polling thread; pending waiters are left unresolved"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        errors = 0
+        while True:
+            with self._cond:
+                while self._running:
+                    if not self._waiters:
+                        self._cond.wait()
+                        continue
+                    # Sleep until the earliest task is due; watch() wakes us to re-check
+                    delay = min(w.next_check for w in self._waiters.values()) - time.time()
+                    if delay <= 0:
+                        break
+                    self._cond.wait(delay)
+                if not self._running:
+                    return
+                task_ids = list(self._waiters)
+
+            try:
+                self.tick(task_ids)
+                errors = 0
+            except requests.exceptions.RequestException as e:
+                errors += 1
+                print(f"Warning: poll failed ({errors}/{MAX_FETCH_ERRORS}): {e}", file=sys.stderr)
+                if errors >= MAX_FETCH_ERRORS:
+                    self._fail_all(e)
+                    errors = 0
+
+            self._reschedule(task_ids)
+
+    def _reschedule(self, task_ids: List[str]):
+        """Advance the schedule of every polled task that was (nearly) due"""
+        with self._cond:
+            reschedule(self._waiters, task_ids, self.min_interval)
+
+    def tick(self, task_ids: List[str]):
+        """Fetch the given tasks in as few requests as possible and fan results out"""
+        for start in range(0, len(task_ids), self.max_ids):
+            tasks = self.client.fetch_tasks(task_ids[start:start + self.max_ids])
+            self.requests_sent += 1
+            for task in tasks:
+                self._dispatch(task)
+
+    def _dispatch(self, task: Dict[str, Any]):
+        task_id = task.get("task_id") or task.get("id")
+        with self._cond:
+            waiter = self._waiters.get(task_id)
+            if waiter is None:
+                return
+            final = is_final(task)
+            if final:
+                del self._waiters[task_id]
+        deliver(waiter, task, final, self.history)
+
+    def _fail_all(self, error: Exception):
+        with self._cond:
+            waiters = list(self._waiters.values())
+            self._waiters.clear()
+        for waiter in waiters:
+            if not waiter.future.done():
+                waiter.future.set_exception(error)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+_scheduler: Optional[PollScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> PollScheduler:
+    """Process-wide shared scheduler"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = PollScheduler()
+        return _scheduler
@@ -0,0 +1,538 @@
+#!/usr/bin/env python3
+"""
+Suno Async Orchestrator
+asyncio API for driving many Suno jobs from one process
+
+Where the CLI scripts block a thread per job, this module runs every job as a
+coroutine on one event loop:
+
+- AsyncSunoClient: aiohttp version of SunoClient (keep-alive pool, timeouts,
+  retries, clip store recording and the finished-task cache)
+- SunoOrchestrator: submit → await completion → download, with all pending
+  tasks polled by a single loop that sends one suno/fetch per tick (same
+  adaptive ETA schedule and task history as poll_scheduler.py)
+
+Jobs use the same option names as generate.py manifests and are turned into
+request parameters by generate.build_params(), so extend / cover / concat /
+persona jobs behave exactly as on the command line.
+
+Usage:
+    from suno_async import SunoOrchestrator
+
+    async with SunoOrchestrator(concurrency=200) as orchestrator:
+        records = await orchestrator.run_many(jobs, download_dir="out")
+
+    python3 suno_async.py album.json --concurrency 200 --download out/
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import asyncio
+import sqlite3
+import argparse
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+try:
+    import aiohttp
+    NETWORK_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError)
+except ImportError:
+    aiohttp = None
+    NETWORK_ERRORS = (asyncio.TimeoutError,)
+
+from suno_client import MAX_RETRIES, POOL_SIZE, RETRY_STATUSES, _SunoApiBase, check_api_key, extract_task_id
+from poll_scheduler import (
+    MAX_FETCH_ERRORS, MAX_IDS_PER_FETCH, MAX_INTERVAL, MIN_INTERVAL, AdaptiveBackoff, _Waiter,
+    deliver, history_timeout, is_final, reschedule, task_backoff
+)
+from task_history import TaskHistory
+from downloader import (
+    DEFAULT_CHUNK_SIZE, DEFAULT_WORKERS, MAX_ATTEMPTS, DownloadError, DownloadJob, Manifest,
+    _check_part, _finish_part, _resume_headers, _start_part, sha256_file
+)
+
+# Jobs submitted / polled / downloaded at once by run_many()
+DEFAULT_CONCURRENCY = 50
+# Audio downloads in flight at once; they get their own connections so long
+# CDN transfers never hold up suno/fetch and submissions
+DOWNLOAD_POOL_SIZE = DEFAULT_WORKERS * 2
+
+StatusCallback = Callable[[Dict[str, Any]], None]
+
+
+class AsyncSunoClient(_SunoApiBase):
+    """
+    aiohttp client for the AllAPI Suno endpoints
+
+    Args:
+        api_key: AllAPI key (default: ALLAPI_KEY)
+        base_url: API base URL (default: ALLAPI_BASE_URL)
+        max_retries: retries for connection errors and 429/5xx responses (fetch only for 5xx)
+        pool_size: open connections to the API host
+        download_pool_size: open connections for audio downloads (a separate pool)
+    """
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 max_retries: int = MAX_RETRIES, pool_size: int = POOL_SIZE,
+                 download_pool_size: int = DOWNLOAD_POOL_SIZE):
+        super().__init__(api_key, base_url, max_retries)
+        self.pool_size = pool_size
+        self.download_pool_size = download_pool_size
+        self._session = None
+        self._download_session = None
+
+    async def open(self):
+        """Create the API and download sessions"""
+        if aiohttp is None:
+            raise RuntimeError("aiohttp is required: pip install aiohttp")
+        if self._session is None:
+            timeout = aiohttp.ClientTimeout(sock_connect=10, sock_read=60)
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size), timeout=timeout)
+            self._download_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.download_pool_size), timeout=timeout)
+        return self
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            await self._download_session.close()
+            self._session = None
+            self._download_session = None
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def _post(self, path: str, body: Dict[str, Any], idempotent: bool = False) -> Any:
+        """
+        POST JSON and return the decoded body
+
+        Submissions are only retried when the connection failed before a
+        response arrived; idempotent calls are also retried on 429/5xx.
+
+        Raises:
+            aiohttp.ClientError, asyncio.TimeoutError
+        """
+        await self.open()
+        url = self._url(path)
+        for attempt in range(self.max_retries + 1):
+            last = attempt == self.max_retries
+            try:
+                async with self._session.post(url, json=body, headers=self._headers()) as response:
+                    if response.status in RETRY_STATUSES and idempotent and not last:
+                        await asyncio.sleep(self._retry_delay(attempt))
+                        continue
+                    response.raise_for_status()
+                    return await response.json(content_type=None)
+            except aiohttp.ClientConnectorError:
+                if last:
+                    raise
+                await asyncio.sleep(self._retry_delay(attempt))
+
+    async def submit_music(self, params: Dict[str, Any]) -> Any:
+        """POST suno/submit/music, returns the raw response"""
+        result = await self._post("suno/submit/music", params)
+        # Clip store (SQLite) work runs in a thread so it never blocks the event loop
+        return await asyncio.to_thread(self._submitted, params, result)
+
+    async def fetch_tasks(self, task_ids: Iterable[str], use_cache: bool = True) -> List[Dict[str, Any]]:
+        """Fetch several tasks with one suno/fetch call (finished tasks come from the clip store)"""
+        task_ids = list(task_ids)
+        cached, missing = await asyncio.to_thread(self._split_cached, task_ids, use_cache)
+        result = await self._post("suno/fetch", {"ids": missing}, idempotent=True) if missing else None
+        return await asyncio.to_thread(self._fetched, task_ids, cached, result)
+
+    async def download(self, url: str, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """
+        Stream an audio URL into path via <path>.part, resuming a partial file with
+        Range / If-Range and retrying like downloader.download()
+
+        Returns:
+            size in bytes
+
+        Raises:
+            DownloadError: still failing or incomplete after MAX_ATTEMPTS
+        """
+        await self.open()
+        job = DownloadJob(url, path)
+        last_error: Optional[Exception] = None
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                size = await self._fetch_to_part(job, chunk_size)
+                break
+            except (DownloadError,) + NETWORK_ERRORS as e:
+                last_error = e
+                if attempt < MAX_ATTEMPTS:
+                    print(f"  {job.label}: {e} (resuming, attempt {attempt + 1}/{MAX_ATTEMPTS})", file=sys.stderr)
+        else:
+            raise DownloadError(str(last_error))
+        _finish_part(job)
+        return size
+
+    async def _fetch_to_part(self, job: DownloadJob, chunk_size: int) -> int:
+        """Download (or resume) into <path>.part, returns the verified size"""
+        part_path = job.path + ".part"
+        offset, headers = _resume_headers(job, part_path)
+
+        async with self._download_session.get(job.url, headers=headers) as response:
+            # 416: the .part already holds the whole file
+            if response.status == 416 and offset:
+                return offset
+            response.raise_for_status()
+            offset, total = _start_part(job, part_path, offset, response.status, response.headers)
+            with open(part_path, 'ab' if offset else 'wb') as f:
+                async for chunk in response.content.iter_chunked(chunk_size):
+                    f.write(chunk)
+
+        return _check_part(part_path, total)
+
+
+class _AsyncWaiter(_Waiter):
+    __slots__ = ("refs",)
+
+    def __init__(self, future: asyncio.Future, backoff: AdaptiveBackoff,
+                 mode: Optional[str], model: Optional[str]):
+        super().__init__(backoff, mode, model, future)
+        # watch() calls sharing the future; wait() timeouts only cancel it when none are left
+        self.refs = 0
+
+
+def clip_filename(clip: Dict[str, Any], index: int, ext: str = "mp3") -> str:
+    """<title>_<n>_<clip id prefix>.<ext>, safe for any file system"""
+    title = re.sub(r'[\\/:*?"<>|\s]+', "_", clip.get("title") or "suno").strip("_") or "suno"
+    return f"{title[:60]}_{index}_{(clip.get('id') or '')[:8]}.{ext}"
+
+
+class SunoOrchestrator:
+    """
+    Submit, await and download Suno jobs on one event loop
+
+    Args:
+        client: AsyncSunoClient (default: one created and closed by the orchestrator)
+        history: TaskHistory for ETAs and durations (default: local history; False disables)
+        concurrency: jobs running at once in run_many()
+        min_interval / max_interval / max_ids: poll schedule, as for PollScheduler
+    """
+
+    def __init__(self, client: Optional[AsyncSunoClient] = None, history=None,
+                 concurrency: int = DEFAULT_CONCURRENCY, min_interval: float = MIN_INTERVAL,
+                 max_interval: float = MAX_INTERVAL, max_ids: int = MAX_IDS_PER_FETCH):
+        self._owns_client = client is None
+        self.client = client or AsyncSunoClient()
+        self.concurrency = concurrency
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.max_ids = max_ids
+        self.requests_sent = 0
+
+        if history is None:
+            try:
+                history = TaskHistory()
+            except (sqlite3.Error, OSError) as e:
+                print(f"Warning: task history unavailable ({e}), polling without ETA", file=sys.stderr)
+        self.history = history or None
+
+        self._waiters: Dict[str, _AsyncWaiter] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._poller: Optional[asyncio.Task] = None
+
+    async def __aenter__(self):
+        await self.client.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        """Stop polling (pending waits are cancelled) and close an owned client"""
+        if self._poller is not None:
+            self._poller.cancel()
+            try:
+                await self._poller
+            except asyncio.CancelledError:
+                pass
+            self._poller = None
+        for waiter in self._waiters.values():
+            waiter.future.cancel()
+        self._waiters.clear()
+        if self._owns_client:
+            await self.client.close()
+
+    # Submit / wait
+
+    async def submit(self, params: Dict[str, Any]) -> str:
+        """Submit request parameters, returns the task ID"""
+        result = await self.client.submit_music(params)
+        task_id = extract_task_id(result)
+        if not task_id:
+            raise ValueError(f"No task ID in response: {json.dumps(result, ensure_ascii=False)[:200]}")
+        return task_id
+
+    def watch(self, task_id: str, on_status: Optional[StatusCallback] = None,
+              mode: Optional[str] = None, model: Optional[str] = None) -> asyncio.Future:
+        """Register a task with the poll loop; the Future resolves with its final payload"""
+        waiter = self._waiters.get(task_id)
+        if waiter is None:
+            backoff = task_backoff(self.history, mode, model, self.min_interval, self.max_interval)
+            waiter = self._waiters[task_id] = _AsyncWaiter(
+                asyncio.get_running_loop().create_future(), backoff, mode, model)
+        waiter.refs += 1
+        if on_status:
+            waiter.callbacks.append(on_status)
+
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.ensure_future(self._poll_loop())
+        self._wakeup.set()
+        return waiter.future
+
+    async def wait(self, task_id: str, timeout: Optional[float] = None,
+                   on_status: Optional[StatusCallback] = None,
+                   mode: Optional[str] = None, model: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Await the task's final payload
+
+        Args:
+            timeout: seconds (default: history-based limit for mode/model, at least 300)
+
+        Raises:
+            TimeoutError: still pending after timeout seconds
+        """
+        if timeout is None:
+            timeout = history_timeout(self.history, mode, model)
+        future = self.watch(task_id, on_status, mode, model)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError as e:
+            waiter = self._waiters.get(task_id)
+            if waiter is not None and waiter.future is future:
+                waiter.refs -= 1
+                if on_status in waiter.callbacks:
+                    waiter.callbacks.remove(on_status)
+                if waiter.refs <= 0:
+                    del self._waiters[task_id]
+                    future.cancel()
+            raise TimeoutError(f"Timeout waiting for task {task_id}") from e
+
+    # Poll loop
+
+    async def _poll_loop(self):
+        errors = 0
+        while self._waiters:
+            self._wakeup.clear()
+            delay = min(w.next_check for w in self._waiters.values()) - time.time()
+            if delay > 0:
+                try:
+                    # watch() sets the event so a new task's first check is not delayed
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                    continue
+                except asyncio.TimeoutError:
+                    pass
+
+            task_ids = list(self._waiters)
+            try:
+                for start in range(0, len(task_ids), self.max_ids):
+                    tasks = await self.client.fetch_tasks(task_ids[start:start + self.max_ids])
+                    self.requests_sent += 1
+                    for task in tasks:
+                        self._dispatch(task)
+                errors = 0
+            except Exception as e:
+                # Not only network errors: a 4xx, bad JSON or a clip store error must not
+                # kill the loop and leave every waiter hanging until its timeout
+                errors += 1
+                print(f"Warning: poll failed ({errors}/{MAX_FETCH_ERRORS}): {e}", file=sys.stderr)
+                if errors >= MAX_FETCH_ERRORS:
+                    error = e if isinstance(e, NETWORK_ERRORS) else RuntimeError(f"poll failed: {e}")
+                    for waiter in self._waiters.values():
+                        if not waiter.future.done():
+                            waiter.future.set_exception(error)
+                    self._waiters.clear()
+                    errors = 0
+
+            reschedule(self._waiters, task_ids, self.min_interval)
+
+    def _dispatch(self, task: Dict[str, Any]):
+        task_id = task.get("task_id") or task.get("id")
+        waiter = self._waiters.get(task_id)
+        if waiter is None:
+            return
+        final = is_final(task)
+        if final:
+            del self._waiters[task_id]
+        deliver(waiter, task, final, self.history)
+
+    # Download
+
+    async def download(self, task: Dict[str, Any], directory: str, wav: bool = False,
+                       chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[str]:
+        """
+        Download every clip of a finished task into directory
+
+        Files recorded in the directory's .downloads.json with a matching size are
+        skipped; new files are added to it with their SHA-256.
+
+        Returns:
+            local file paths
+        """
+        os.makedirs(directory, exist_ok=True)
+        manifest = Manifest(directory)
+        paths = []
+        for index, clip in enumerate(task.get("data") or [], 1):
+            url = (clip.get("wav_url") if wav else None) or clip.get("audio_url")
+            if not url:
+                continue
+            ext = "wav" if wav and clip.get("wav_url") else "mp3"
+            filename = clip_filename(clip, index, ext)
+            path = os.path.join(directory, filename)
+            entry = manifest.get(filename)
+            if not (os.path.exists(path) and entry and entry.get("size") == os.path.getsize(path)):
+                size = await self.client.download(url, path, chunk_size)
+                digest = await asyncio.to_thread(sha256_file, path)
+                manifest.put(filename, {"size": size, "sha256": digest, "url": url})
+            paths.append(path)
+        return paths
+
+    # Jobs
+
+    async def run(self, params: Dict[str, Any], mode: Optional[str] = None, model: Optional[str] = None,
+                  name: Optional[str] = None, timeout: Optional[float] = None,
+                  download_dir: Optional[str] = None, wait: bool = True) -> Dict[str, Any]:
+        """
+        Submit one job, await it and optionally download its clips
+
+        Clips are recorded in the local clip store as their task is fetched.
+
+        Returns:
+            {name, mode, task_id, status, clip_ids, fail_reason, data, files} (status ERROR on exceptions)
+        """
+        mode = mode or (params.get("metadata") or {}).get("create_mode") or params.get("task")
+        model = model or params.get("mv")
+        record = {"name": name, "mode": mode, "task_id": None, "status": None, "clip_ids": [],
+                  "fail_reason": None, "data": [], "files": []}
+        try:
+            record["task_id"] = await self.submit(params)
+            record["status"] = "SUBMITTED"
+            if not wait:
+                return record
+            task = await self.wait(record["task_id"], timeout, mode=mode, model=model)
+            data = task.get("data") or []
+            record.update(status=task.get("status"), fail_reason=task.get("failReason"), data=data,
+                          clip_ids=[clip.get("id") for clip in data if clip.get("id")])
+            if download_dir and record["status"] == "SUCCESS":
+                record["files"] = await self.download(task, download_dir)
+        except (ValueError, TimeoutError, OSError, RuntimeError, DownloadError) + NETWORK_ERRORS as e:
+            record["status"] = "ERROR"
+            record["fail_reason"] = str(e)
+        return record
+
+    async def run_many(self, jobs: Iterable[Dict[str, Any]], download_dir: Optional[str] = None,
+                       wait: bool = True,
+                       on_result: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+        """
+        Run generate.py manifest jobs with at most `concurrency` in flight
+
+        Returns:
+            one record per job in job order (with an 'index' starting at 1)
+        """
+        from generate import build_params, build_parser, job_args, manifest_defaults, option_choices
+
+        parser = build_parser()
+        defaults = manifest_defaults(parser)
+        choices = option_choices(parser)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run_one(index: int, job: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    args = job_args(job, defaults, choices)
+                    params = build_params(args)
+                except ValueError as e:
+                    record = {"name": job.get("name"), "mode": job.get("mode", defaults["mode"]),
+                              "task_id": None, "status": "ERROR", "clip_ids": [], "fail_reason": str(e),
+                              "data": [], "files": []}
+                else:
+                    record = await self.run(params, args.mode, args.model, job.get("name"),
+                                            args.timeout, download_dir, wait)
+            record = {"index": index, **record}
+            if on_result:
+                on_result(record)
+            return record
+
+        return list(await asyncio.gather(*(run_one(i, job) for i, job in enumerate(jobs, 1))))
+
+
+async def run_manifest(path: str, concurrency: int, results_path: Optional[str],
+                       download_dir: Optional[str], wait: bool) -> List[Dict[str, Any]]:
+    from generate import load_manifest
+
+    jobs = load_manifest(path)
+    results_path = results_path or f"{os.path.splitext(path)[0]}.results.jsonl"
+    print(f"Running {len(jobs)} job(s) from {path} (concurrency {concurrency})...", file=sys.stderr)
+
+    with open(results_path, 'a', encoding='utf-8') as out:
+        done = []
+
+        def on_result(record: Dict[str, Any]):
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            done.append(record)
+            label = record["name"] or record["task_id"] or f"job {record['index']}"
+            mark = "✓" if record["status"] in ("SUCCESS", "SUBMITTED") else "✗"
+            detail = ", ".join(record["clip_ids"]) or record["fail_reason"] or record["status"]
+            print(f"[{record['index']}] {mark} {label}: {detail} ({len(done)}/{len(jobs)})", file=sys.stderr)
+
+        async with SunoOrchestrator(concurrency=concurrency) as orchestrator:
+            results = await orchestrator.run_many(jobs, download_dir, wait, on_result)
+            print(f"\nsuno/fetch requests: {orchestrator.requests_sent}", file=sys.stderr)
+
+    print(f"Results: {os.path.abspath(results_path)}", file=sys.stderr)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run a generate.py manifest on one asyncio event loop",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s album.json --concurrency 200
+  %(prog)s album.json --download ./suno-downloads --results album.results.jsonl
+        """
+    )
+    parser.add_argument("manifest", help="JSON / JSON Lines manifest (same format as generate.py --manifest)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                       help=f"Jobs in flight at once (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--results", help="Results file (default: <manifest>.results.jsonl)")
+    parser.add_argument("--download", metavar="DIR", help="Download finished clips into DIR")
+    parser.add_argument("--no-wait", action="store_true", help="Only submit, do not wait for completion")
+    args = parser.parse_args()
+
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if aiohttp is None:
+        print("Error: aiohttp is required: pip install aiohttp", file=sys.stderr)
+        sys.exit(1)
+    check_api_key()
+
+    try:
+        results = asyncio.run(run_manifest(args.manifest, args.concurrency, args.results,
+                                           args.download, not args.no_wait))
+    except (OSError, ValueError) as e:
+        print(f"Error reading manifest: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    ok = sum(1 for r in results if r["status"] in ("SUCCESS", "SUBMITTED"))
+    print(f"Batch complete: {ok}/{len(results)} succeeded", file=sys.stderr)
+    if ok < len(results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
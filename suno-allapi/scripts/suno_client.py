@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Suno AllAPI Client
+Shared HTTP client for the suno-allapi scripts
+
+A single requests.Session keeps TLS connections to AllAPI alive between calls,
+so poll loops reuse one connection instead of doing a handshake per request.
+Every request has a default timeout, and connection errors / 429 / 5xx
+responses are retried with exponential backoff (submissions are only retried
+when the request never reached the server, so a task is never created twice).
+Finished tasks are answered from the local clip store without calling suno/fetch.
+
+Usage:
+    from suno_client import check_api_key, extract_task_id, get_client
+
+    check_api_key()
+    client = get_client()
+    task_id = extract_task_id(client.submit_music(params))
+    task = client.fetch_task(task_id)
+"""
+
+import os
+import sys
+import time
+import uuid
+import sqlite3
+import mimetypes
+import requests
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from clip_store import get_store
+
+# API Configuration
+BASE_URL = os.environ.get("ALLAPI_BASE_URL", "https://allapi.store/")
+API_KEY = os.environ.get("ALLAPI_KEY", "")
+
+# (connect, read) timeouts in seconds
+DEFAULT_TIMEOUT = (10, 60)
+UPLOAD_TIMEOUT = (10, 300)
+DOWNLOAD_TIMEOUT = (10, 120)
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+POOL_SIZE = int(os.environ.get("ALLAPI_POOL_SIZE", 10))
+MAX_RETRIES = int(os.environ.get("ALLAPI_MAX_RETRIES", 3))
+
+# Read size for streamed uploads
+UPLOAD_CHUNK_SIZE = 256 * 1024
+
+# Explicit types for formats Suno accepts; mimetypes varies by platform (e.g. audio/x-wav)
+AUDIO_MIME_TYPES = {
+    ".mp3": "audio/mpeg",
+    ".mpeg": "audio/mpeg",
+    ".wav": "audio/wav",
+    ".m4a": "audio/mp4",
+    ".mp4": "video/mp4",
+    ".aac": "audio/aac",
+    ".flac": "audio/flac",
+    ".ogg": "audio/ogg"
+}
+
+PENDING_STATUSES = ("NOT_START", "SUBMITTED", "QUEUED", "IN_PROGRESS")
+TERMINAL_STATUSES = ("SUCCESS", "FAILURE")
+
+Timeout = Union[float, Tuple[float, float]]
+
+
+def check_api_key():
+    """Check if API key is set"""
+    if not API_KEY:
+        print("Error: ALLAPI_KEY environment variable not set", file=sys.stderr)
+        print("Please set it using: export ALLAPI_KEY='your-api-key'", file=sys.stderr)
+        sys.exit(1)
+
+
+def extract_task_id(result: Any) -> Optional[str]:
+    """Extract the task ID from a submit response ({"code": "success", "data": id} or {"task_id": ...})"""
+    if isinstance(result, dict):
+        if result.get("code") == "success":
+            return result.get("data")
+        return result.get("task_id") or result.get("id")
+    return result or None
+
+
+def guess_mime_type(file_path: str) -> str:
+    """MIME type from the file extension"""
+    ext = os.path.splitext(file_path)[1].lower()
+    return AUDIO_MIME_TYPES.get(ext) or mimetypes.guess_type(file_path)[0] or "application/octet-stream"
+
+
+class MultipartFileStream:
+    """
+    multipart/form-data body that reads the file from disk while sending
+
+    requests sends it with a Content-Length (no chunked transfer encoding),
+    iterating it in `chunk_size` pieces, so large WAV stems are never held in
+    memory. progress(sent_bytes, total_bytes) is called after each piece.
+    """
+
+    def __init__(self, file_path: str, fields: Optional[Dict[str, str]] = None,
+                 file_field: str = "file", content_type: Optional[str] = None,
+                 chunk_size: int = UPLOAD_CHUNK_SIZE,
+                 progress: Optional[Callable[[int, int], None]] = None):
+        self.file_path = file_path
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+
+        head = b""
+        for name, value in (fields or {}).items():
+            head += (f"--{self.boundary}\r\n"
+                     f"Content-Disposition: form-data; name=\"{name}\"\r\n\r\n"
+                     f"{value}\r\n").encode("utf-8")
+        filename = os.path.basename(file_path).replace('"', "%22")
+        head += (f"--{self.boundary}\r\n"
+                 f"Content-Disposition: form-data; name=\"{file_field}\"; filename=\"{filename}\"\r\n"
+                 f"Content-Type: {content_type or guess_mime_type(file_path)}\r\n\r\n").encode("utf-8")
+        self._head = head
+        self._tail = f"\r\n--{self.boundary}--\r\n".encode("utf-8")
+        self.file_size = os.path.getsize(file_path)
+        self.total = len(self._head) + self.file_size + len(self._tail)
+
+    def __len__(self) -> int:
+        return self.total
+
+    def __iter__(self) -> Iterator[bytes]:
+        sent = 0
+
+        def report(block: bytes) -> bytes:
+            nonlocal sent
+            sent += len(block)
+            if self.progress:
+                self.progress(sent, self.total)
+            return block
+
+        yield report(self._head)
+        with open(self.file_path, "rb") as f:
+            for block in iter(lambda: f.read(self.chunk_size), b""):
+                yield report(block)
+        yield report(self._tail)
+
+
+def _record(method: str, *args):
+    """Mirror API results into the local clip store; never fails the API call"""
+    store = get_store()
+    if store is None:
+        return
+    try:
+        getattr(store, method)(*args)
+    except sqlite3.Error as e:
+        print(f"Warning: could not update clip store: {e}", file=sys.stderr)
+
+
+def _cached_terminal(task_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Finished task payloads from the clip store (empty when the store is disabled)"""
+    store = get_store()
+    if store is None:
+        return {}
+    try:
+        return store.terminal_tasks(task_ids)
+    except (sqlite3.Error, ValueError) as e:
+        print(f"Warning: could not read clip store: {e}", file=sys.stderr)
+        return {}
+
+
+def parse_fetch_response(result: Any) -> List[Dict[str, Any]]:
+    """Task list from a suno/fetch response ({"code": "success", "data": [...]} or a bare list)"""
+    if isinstance(result, dict):
+        result = result.get("data") or [] if result.get("code") == "success" else []
+    return [task for task in result or [] if isinstance(task, dict)]
+
+
+def merge_tasks(task_ids: List[str], cached: Dict[str, Dict[str, Any]],
+                fetched: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Cached and fetched tasks in request order; payloads for unrequested IDs go last"""
+    by_id = dict(cached)
+    unmatched = []
+    for task in fetched:
+        task_id = task.get("task_id") or task.get("id")
+        if task_id in by_id or task_id not in task_ids:
+            unmatched.append(task)
+        else:
+            by_id[task_id] = task
+    return [by_id[task_id] for task_id in task_ids if task_id in by_id] + unmatched
+
+
+class _SunoApiBase:
+    """
+    Settings, request building and response handling shared by SunoClient and
+    suno_async.AsyncSunoClient; subclasses only provide the transport
+    """
+
+    def __init__(self, api_key: Optional[str], base_url: Optional[str], max_retries: int):
+        self.api_key = api_key if api_key is not None else API_KEY
+        self.base_url = base_url or BASE_URL
+        if not self.base_url.endswith("/"):
+            self.base_url += "/"
+        self.max_retries = max_retries
+        # Tasks answered from the local terminal-state cache instead of suno/fetch
+        self.cache_hits = 0
+
+    def _headers(self, json_body: bool = True) -> Dict[str, str]:
+        # Auth is set per request so downloads from the CDN never carry the API key
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        if json_body:
+            headers["Content-Type"] = "application/json"
+        return headers
+
+    def _url(self, path: str) -> str:
+        return f"{self.base_url}{path}"
+
+    @staticmethod
+    def _retry_delay(attempt: int) -> float:
+        return 0.5 * (2 ** attempt)
+
+    @staticmethod
+    def _submitted(params: Dict[str, Any], result: Any) -> Any:
+        """Record a suno/submit/music response in the clip store"""
+        task_id = extract_task_id(result)
+        if task_id:
+            _record("record_submission", task_id, params)
+        return result
+
+    def _split_cached(self, task_ids: List[str], use_cache: bool):
+        """(cached terminal tasks, IDs that still need suno/fetch)"""
+        cached = _cached_terminal(task_ids) if use_cache else {}
+        self.cache_hits += len(cached)
+        return cached, [task_id for task_id in task_ids if task_id not in cached]
+
+    @staticmethod
+    def _fetched(task_ids: List[str], cached: Dict[str, Dict[str, Any]], result: Any) -> List[Dict[str, Any]]:
+        """Merge a suno/fetch response (None when nothing was fetched) with the cached tasks"""
+        fetched = parse_fetch_response(result) if result is not None else []
+        if fetched:
+            _record("record_tasks", fetched)
+        return merge_tasks(task_ids, cached, fetched)
+
+
+class SunoClient(_SunoApiBase):
+    """
+    Keep-alive HTTP client for the AllAPI Suno endpoints
+
+    Args:
+        api_key: AllAPI key (default: ALLAPI_KEY)
+        base_url: API base URL (default: ALLAPI_BASE_URL)
+        timeout: default (connect, read) timeout for API calls
+        max_retries: retries for connection errors and 429/5xx responses
+        pool_size: connections kept alive per host
+    """
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 timeout: Timeout = DEFAULT_TIMEOUT, max_retries: int = MAX_RETRIES,
+                 pool_size: int = POOL_SIZE):
+        super().__init__(api_key, base_url, max_retries)
+        self.timeout = timeout
+
+        # urllib3 retries connection failures for every method, but status
+        # retries only for idempotent methods; fetch (POST) is retried in _request
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=0.5,
+            status_forcelist=RETRY_STATUSES,
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # Low-level
+
+    def _request(self, method: str, path: str, idempotent: bool = False,
+                 timeout: Optional[Timeout] = None, **kwargs) -> Any:
+        """
+        Send an API request and return the decoded JSON body
+
+        Args:
+            idempotent: also retry POST requests on 429/5xx (read-only endpoints such as suno/fetch)
+
+        Raises:
+            requests.exceptions.RequestException
+        """
+        url = self._url(path)
+        attempts = self.max_retries + 1 if idempotent and method == "POST" else 1
+
+        for attempt in range(attempts):
+            response = self.session.request(method, url, timeout=timeout or self.timeout, **kwargs)
+            if response.status_code in RETRY_STATUSES and attempt < attempts - 1:
+                time.sleep(self._retry_delay(attempt))
+                continue
+            response.raise_for_status()
+            return response.json()
+
+    # Endpoints
+
+    def submit_music(self, params: Dict[str, Any]) -> Any:
+        """POST suno/submit/music, returns the raw response"""
+        result = self._request("POST", "suno/submit/music", json=params, headers=self._headers())
+        return self._submitted(params, result)
+
+    def fetch_tasks(self, task_ids: Iterable[str], use_cache: bool = True) -> List[Dict[str, Any]]:
+        """
+        Fetch several tasks with one suno/fetch call
+
+        Tasks already known to be SUCCESS / FAILURE are served from the local
+        clip store; only the remaining IDs go over the network (use_cache=False
+        always asks the API). Accepts both response shapes seen from AllAPI:
+        {"code": "success", "data": [...]} and a bare list of tasks.
+
+        Returns:
+            tasks in the order requested (IDs the API does not know are omitted)
+        """
+        task_ids = list(task_ids)
+        cached, missing = self._split_cached(task_ids, use_cache)
+        result = None
+        if missing:
+            body = {"ids": missing}
+            result = self._request("POST", "suno/fetch", idempotent=True, json=body, headers=self._headers())
+        return self._fetched(task_ids, cached, result)
+
+    def fetch_task(self, task_id: str, use_cache: bool = True) -> Dict[str, Any]:
+        """Fetch a single task, returns {} if not found"""
+        tasks = self.fetch_tasks([task_id], use_cache)
+        return tasks[0] if tasks else {}
+
+    def upload(self, file_path: str, description: Optional[str] = None,
+               content_type: Optional[str] = None, chunk_size: int = UPLOAD_CHUNK_SIZE,
+               progress: Optional[Callable[[int, int], None]] = None) -> Any:
+        """
+        POST suno/upload as a multipart body streamed from disk
+
+        Args:
+            content_type: file MIME type (default: detected from the extension)
+            progress: called with (sent_bytes, total_bytes) while uploading
+        """
+        fields = {"description": description} if description else {}
+        body = MultipartFileStream(file_path, fields, content_type=content_type,
+                                   chunk_size=chunk_size, progress=progress)
+        headers = self._headers(json_body=False)
+        headers["Content-Type"] = body.content_type
+        return self._request("POST", "suno/upload", data=body, headers=headers, timeout=UPLOAD_TIMEOUT)
+
+    def download(self, url: str, headers: Optional[Dict[str, str]] = None,
+                 timeout: Timeout = DOWNLOAD_TIMEOUT) -> requests.Response:
+        """Open a streaming GET for an audio URL (no API key is sent); caller closes the response"""
+        response = self.session.get(url, stream=True, headers=headers, timeout=timeout)
+        response.raise_for_status()
+        return response
+
+
+_client: Optional[SunoClient] = None
+
+
+def get_client() -> SunoClient:
+    """Process-wide shared client"""
+    global _client
+    if _client is None:
+        _client = SunoClient()
+    return _client
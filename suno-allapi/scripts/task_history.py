@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Suno Task History
+Local record of finished task durations, used to predict how long a new task will take
+
+Each successful task's submitTime → finishTime is stored per (mode, model) in a
+SQLite database (default ~/.cache/suno-allapi/history.db, override with
+SUNO_HISTORY_DB). The poll scheduler asks for an ETA before polling so it can
+sleep until a task is likely done instead of checking on a fixed interval.
+
+Usage:
+    python3 task_history.py stats
+    python3 task_history.py clear
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import threading
+import argparse
+import statistics
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "suno-allapi", "history.db")
+# Samples per (mode, model) used for predictions
+WINDOW = 50
+# Minimum samples before a (mode, model) estimate is trusted over the mode-wide one
+MIN_SAMPLES = 3
+
+# Seconds, used until enough history exists
+DEFAULT_ETA = {
+    "lyrics": 10,
+    "concat": 30
+}
+FALLBACK_ETA = 60
+DEFAULT_TIMEOUT = 300
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS timings (
+    task_id TEXT PRIMARY KEY,
+    mode TEXT NOT NULL,
+    model TEXT NOT NULL,
+    duration REAL NOT NULL,
+    finished_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_timings_kind ON timings (mode, model, finished_at);
+"""
+
+
+def parse_time(value: Any) -> Optional[float]:
+    """Convert submitTime / finishTime (epoch seconds, epoch ms or ISO 8601) to epoch seconds"""
+    if value in (None, ""):
+        return None
+    if isinstance(value, (int, float)):
+        return value / 1000 if value > 1e11 else float(value)
+    try:
+        return parse_time(float(value))
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def task_duration(task: Dict[str, Any]) -> Optional[float]:
+    """Server-side duration of a finished task in seconds, if both timestamps are present"""
+    submitted = parse_time(task.get("submitTime"))
+    finished = parse_time(task.get("finishTime"))
+    if submitted is None or finished is None or finished < submitted:
+        return None
+    return finished - submitted
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+class TaskHistory:
+    """
+    Task duration history
+
+    Args:
+        path: SQLite file (default: SUNO_HISTORY_DB or ~/.cache/suno-allapi/history.db)
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.environ.get("SUNO_HISTORY_DB") or DEFAULT_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # Shared by the poll scheduler thread and its callers
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def record(self, task: Dict[str, Any], mode: str, model: str,
+               duration: Optional[float] = None) -> Optional[float]:
+        """
+        Store a finished task's duration
+
+        Args:
+            duration: fallback used when the payload has no submitTime / finishTime
+
+        Returns:
+            the stored duration, or None if nothing was recorded
+        """
+        task_id = task.get("task_id") or task.get("id")
+        duration = task_duration(task) or duration
+        if not task_id or not duration:
+            return None
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO timings (task_id, mode, model, duration, finished_at) VALUES (?, ?, ?, ?, ?)",
+                (task_id, mode or "", model or "", duration, time.time())
+            )
+        return duration
+
+    def durations(self, mode: str, model: Optional[str] = None, limit: int = WINDOW) -> List[float]:
+        """Most recent durations for a mode (and model)"""
+        if model is None:
+            sql = "SELECT duration FROM timings WHERE mode = ? ORDER BY finished_at DESC LIMIT ?"
+            params = (mode, limit)
+        else:
+            sql = "SELECT duration FROM timings WHERE mode = ? AND model = ? ORDER BY finished_at DESC LIMIT ?"
+            params = (mode, model, limit)
+        with self._lock:
+            return [row[0] for row in self._conn.execute(sql, params)]
+
+    def _samples(self, mode: str, model: str) -> List[float]:
+        samples = self.durations(mode, model)
+        if len(samples) < MIN_SAMPLES:
+            mode_samples = self.durations(mode)
+            if len(mode_samples) >= MIN_SAMPLES:
+                samples = mode_samples
+        return samples
+
+    def estimate(self, mode: str, model: str) -> float:
+        """Predicted duration in seconds (median of recent samples, else a per-mode default)"""
+        samples = self._samples(mode, model)
+        if samples:
+            return statistics.median(samples)
+        return DEFAULT_ETA.get(mode, FALLBACK_ETA)
+
+    def timeout(self, mode: str, model: str, minimum: float = DEFAULT_TIMEOUT) -> float:
+        """Wait limit: three times the 90th percentile duration, never below `minimum`"""
+        samples = self._samples(mode, model)
+        if len(samples) < MIN_SAMPLES:
+            return minimum
+        return max(minimum, 3 * _percentile(samples, 0.9))
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Count, median and p90 per (mode, model)"""
+        with self._lock:
+            kinds = self._conn.execute(
+                "SELECT mode, model, COUNT(*) FROM timings GROUP BY mode, model ORDER BY mode, model"
+            ).fetchall()
+        result = []
+        for mode, model, count in kinds:
+            samples = self.durations(mode, model)
+            result.append({
+                "mode": mode,
+                "model": model,
+                "count": count,
+                "median": statistics.median(samples),
+                "p90": _percentile(samples, 0.9)
+            })
+        return result
+
+    def clear(self) -> int:
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM timings").rowcount
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the local Suno task duration history")
+    parser.add_argument("command", choices=["stats", "clear"], help="stats: durations per mode/model; clear: delete history")
+    args = parser.parse_args()
+
+    history = TaskHistory()
+    if args.command == "clear":
+        print(f"Deleted {history.clear()} record(s)")
+        return
+
+    stats = history.stats()
+    if not stats:
+        print("No task history yet", file=sys.stderr)
+        return
+
+    print(f"{'Mode':<16}{'Model':<18}{'Tasks':>7}{'Median (s)':>12}{'P90 (s)':>10}")
+    print("-" * 63)
+    for s in stats:
+        print(f"{s['mode']:<16}{s['model']:<18}{s['count']:>7}{s['median']:>12.1f}{s['p90']:>10.1f}")
+    print(f"\nHistory: {history.path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,28 +2,50 @@
 """
 Suno Audio Upload Script
 Upload audio files to Suno for voice cloning or custom generation
+
+Files are streamed from disk (no full-file buffering) with the MIME type taken
+from the extension. Directories are expanded to the audio files they contain
+and uploaded concurrently; each result is written to a clip-id manifest so a
+re-run skips stems that were already uploaded.
 """
 
 import os
 import sys
 import json
+import time
+import threading
 import argparse
 import requests
-from typing import Optional, Dict, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Dict, Any, List
 from pathlib import Path
 
-# API Configuration
-BASE_URL = os.environ.get("ALLAPI_BASE_URL", "https://allapi.store/")
-API_KEY = os.environ.get("ALLAPI_KEY", "")
+from suno_client import check_api_key, get_client, guess_mime_type
 
-def check_api_key():
-    """Check if API key is set"""
-    if not API_KEY:
-        print("Error: ALLAPI_KEY environment variable not set", file=sys.stderr)
-        print("Please set it using: export ALLAPI_KEY='your-api-key'", file=sys.stderr)
-        sys.exit(1)
+SUPPORTED_FORMATS = ['.mp3', '.wav', '.m4a', '.mp4', '.mpeg']
+MANIFEST_NAME = "uploads.json"
+DEFAULT_WORKERS = 3
+
+class ProgressPrinter:
+    """Single-line upload progress on stderr, throttled to a few updates per second"""
+
+    def __init__(self, label: str, interval: float = 0.2):
+        self.label = label
+        self.interval = interval
+        self._last = 0.0
+
+    def __call__(self, sent: int, total: int):
+        now = time.time()
+        if sent < total and now - self._last < self.interval:
+            return
+        self._last = now
+        percent = sent * 100 // total if total else 100
+        end = "\n" if sent >= total else ""
+        print(f"\r  {self.label}: {percent:3d}% ({sent / 1024 / 1024:.1f}/{total / 1024 / 1024:.1f} MB)",
+              end=end, file=sys.stderr, flush=True)
 
-def upload_audio(file_path: str, description: Optional[str] = None) -> Dict[str, Any]:
+def upload_audio(file_path: str, description: Optional[str] = None,
+                 progress: bool = True) -> Dict[str, Any]:
     """Upload audio file to Suno"""
     # Check if file exists
     if not os.path.exists(file_path):
@@ -32,31 +54,15 @@ def upload_audio(file_path: str, description: Optional[str] = None) -> Dict[str,
 
     # Get file extension
     file_ext = Path(file_path).suffix.lower()
-    supported_formats = ['.mp3', '.wav', '.m4a', '.mp4', '.mpeg']
 
-    if file_ext not in supported_formats:
+    if file_ext not in SUPPORTED_FORMATS:
         print(f"Warning: File format {file_ext} may not be supported", file=sys.stderr)
-        print(f"Supported formats: {', '.join(supported_formats)}", file=sys.stderr)
-
-    url = f"{BASE_URL}suno/upload"
-    headers = {
-        "Authorization": f"Bearer {API_KEY}"
-    }
+        print(f"Supported formats: {', '.join(SUPPORTED_FORMATS)}", file=sys.stderr)
 
     try:
-        with open(file_path, 'rb') as audio_file:
-            files = {
-                'file': (os.path.basename(file_path), audio_file, 'audio/mpeg')
-            }
-
-            data = {}
-            if description:
-                data['description'] = description
-
-            print(f"Uploading {file_path}...")
-            response = requests.post(url, files=files, data=data, headers=headers)
-            response.raise_for_status()
-            return response.json()
+        print(f"Uploading {file_path} ({guess_mime_type(file_path)})...")
+        callback = ProgressPrinter(os.path.basename(file_path)) if progress else None
+        return get_client().upload(file_path, description, progress=callback)
 
     except requests.exceptions.RequestException as e:
         print(f"Error uploading audio: {e}", file=sys.stderr)
@@ -78,6 +84,78 @@ def format_output(data: Dict[str, Any]) -> str:
     }
     return json.dumps(output, indent=2, ensure_ascii=False)
 
+def clip_id_of(data: Dict[str, Any]) -> Optional[str]:
+    return data.get("id") or data.get("clip_id")
+
+def expand_files(paths: List[str]) -> List[str]:
+    """Files as given; directories become the supported audio files inside them (sorted)"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(str(p) for p in sorted(Path(path).iterdir())
+                         if p.is_file() and p.suffix.lower() in SUPPORTED_FORMATS)
+        else:
+            files.append(path)
+    return files
+
+def load_manifest(path: str) -> Dict[str, Dict[str, Any]]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return {entry["file"]: entry for entry in json.load(f)}
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}
+
+def save_manifest(path: str, entries: Dict[str, Dict[str, Any]]):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(sorted(entries.values(), key=lambda e: e["file"]), f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def upload_many(files: List[str], description: Optional[str], manifest_path: str,
+                workers: int = DEFAULT_WORKERS) -> List[Dict[str, Any]]:
+    """
+    Upload files concurrently and record {file, clip_id, size, status, error} per file
+
+    Files already in the manifest with a clip_id and the same size are skipped.
+    """
+    entries = load_manifest(manifest_path)
+    lock = threading.Lock()
+    todo = []
+    for file_path in files:
+        entry = entries.get(file_path)
+        if entry and entry.get("clip_id") and os.path.exists(file_path) \
+                and entry.get("size") == os.path.getsize(file_path):
+            print(f"= {file_path} (already uploaded: {entry['clip_id']})", file=sys.stderr)
+        else:
+            todo.append(file_path)
+
+    def run(file_path: str) -> Dict[str, Any]:
+        entry: Dict[str, Any] = {"file": file_path, "clip_id": None, "status": "failed", "error": None}
+        try:
+            entry["size"] = os.path.getsize(file_path)
+            result = get_client().upload(file_path, description)
+            entry["clip_id"] = clip_id_of(result)
+            entry["status"] = "uploaded" if entry["clip_id"] else "failed"
+            if not entry["clip_id"]:
+                entry["error"] = f"no clip_id in response: {json.dumps(result, ensure_ascii=False)[:200]}"
+        except (requests.exceptions.RequestException, OSError) as e:
+            entry["error"] = str(e)
+        with lock:
+            entries[file_path] = entry
+            save_manifest(manifest_path, entries)
+        return entry
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(run, file_path) for file_path in todo]
+        for done, future in enumerate(as_completed(futures), 1):
+            entry = future.result()
+            if entry["status"] == "uploaded":
+                print(f"[{done}/{len(todo)}] ✓ {entry['file']} → {entry['clip_id']}", file=sys.stderr)
+            else:
+                print(f"[{done}/{len(todo)}] ✗ {entry['file']}: {entry['error']}", file=sys.stderr)
+
+    return [entries[f] for f in files if f in entries]
+
 def main():
     parser = argparse.ArgumentParser(
         description="Upload audio to Suno for voice cloning or custom generation",
@@ -93,6 +171,9 @@ Examples:
   # Upload multiple files
   %(prog)s voice1.mp3 voice2.wav
 
+  # Upload a directory of stems, 4 at a time, recording clip IDs in stems/uploads.json
+  %(prog)s stems/ --workers 4
+
 Usage Workflow:
   1. Upload your audio: %(prog)s my-voice.mp3
   2. Get clip_id from output
@@ -100,15 +181,35 @@ Usage Workflow:
         """
     )
 
-    parser.add_argument("files", nargs="+", help="Audio file(s) to upload")
+    parser.add_argument("files", nargs="+", help="Audio file(s) or directories to upload")
     parser.add_argument("--description", "-d", help="Description for the audio (optional)")
     parser.add_argument("--json", action="store_true", help="Output raw JSON only")
+    parser.add_argument("--workers", "-w", type=int, default=DEFAULT_WORKERS,
+                       help=f"Concurrent uploads for directories / manifest mode (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--manifest", "-m",
+                       help=f"Clip-id manifest; enables concurrent mode (default for a directory: <dir>/{MANIFEST_NAME})")
 
     args = parser.parse_args()
 
     # Check API key
     check_api_key()
 
+    directories = [p for p in args.files if os.path.isdir(p)]
+    if directories or args.manifest:
+        manifest_path = args.manifest or os.path.join(directories[0], MANIFEST_NAME)
+        files = expand_files(args.files)
+        if not files:
+            print("Error: no audio files found", file=sys.stderr)
+            sys.exit(1)
+        print(f"Uploading {len(files)} file(s) with {args.workers} worker(s)...", file=sys.stderr)
+        entries = upload_many(files, args.description, manifest_path, args.workers)
+        if args.json:
+            print(json.dumps(entries, indent=2, ensure_ascii=False))
+        failed = [e for e in entries if e["status"] != "uploaded"]
+        print(f"\nManifest: {manifest_path} ({len(entries) - len(failed)} uploaded, {len(failed)} failed)",
+              file=sys.stderr)
+        sys.exit(1 if failed else 0)
+
     # Upload each file
     results = []
     for file_path in args.files:
@@ -117,7 +218,7 @@ Usage Workflow:
             print(f"Processing: {file_path}")
             print(f"{'='*60}")
 
-        result = upload_audio(file_path, args.description)
+        result = upload_audio(file_path, args.description, progress=not args.json)
 
         if args.json:
             print(json.dumps(result, indent=2, ensure_ascii=False))
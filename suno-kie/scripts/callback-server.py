@@ -2,58 +2,70 @@
 """
 Kie.ai Callback Server
 Receives task completion notifications from Kie.ai API
+
+One threaded receiver for every suno-kie client: callbacks for any number of
+tasks are stored in the local callback store (callback_store.py), and clients
+wait for their own task ID with GET /tasks/<task_id>/wait.
 """
 
-import os
 import sys
 import json
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from socketserver import TCPServer
-import threading
-import time
-
-PORT = 8080
-
-class CallbackHandler(BaseHTTPRequestHandler):
-    def do_POST(self):
-        content_length = int(self.headers.get('Content-Length', 0))
-        post_data = self.rfile.read(content_length)
-
-        try:
-            data = json.loads(post_data.decode('utf-8'))
-
-            print("\n" + "="*60)
-            print("📬 收到 Callback 通知！")
-            print("="*60)
-            print(json.dumps(data, indent=2, ensure_ascii=False))
-            print("="*60 + "\n")
-
-            # Send response
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps({"status": "received"}).encode())
-
-        except Exception as e:
-            print(f"Error processing callback: {e}", file=sys.stderr)
-            self.send_response(200)
-            self.end_headers()
-
-    def log_message(self, format, *args):
-        # Suppress default logging
-        pass
-
-def start_server():
-    server = TCPServer(("localhost", PORT), CallbackHandler)
-    print(f"🚀 Callback Server 啟動在 http://localhost:{PORT}")
-    print(f"📡 等待 Kie.ai 任務完成通知...")
+import argparse
+
+from callback_store import DEFAULT_PORT, CallbackReceiver, CallbackStore, callback_clips
+
+STATUS_LABELS = {
+    "text": "📝 歌詞生成完成",
+    "first": "🎵 第一首已完成",
+    "complete": "✅ 全部音樂生成完成",
+    "error": "❌ 生成失敗"
+}
+
+def print_event(event, verbose: bool = False):
+    """One line per callback (full payload with --verbose)"""
+    label = STATUS_LABELS.get(event["callback_type"], f"📬 {event['callback_type']}")
+    tenant = f" [{event['tenant']}]" if event["tenant"] else ""
+    clips = callback_clips(event)
+    detail = f" ({len(clips)} 首)" if clips else ""
+    if event["callback_type"] == "error":
+        detail = f" ({event['msg'] or 'Unknown error'})"
+    print(f"{label}{tenant}: {event['task_id']}{detail}", flush=True)
+    if verbose:
+        print(json.dumps(event["payload"], indent=2, ensure_ascii=False), flush=True)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Receive Kie.ai callbacks for many tasks and let clients await them",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s
+  %(prog)s --host 0.0.0.0 --port 8080 --verbose
+
+  # Clients (any process) wait for their own task:
+  curl "http://localhost:8080/tasks/TASK_ID/wait?types=complete,error&timeout=60"
+        """
+    )
+    parser.add_argument("--host", default="localhost", help="Listen address (default: localhost)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Listen port (default: {DEFAULT_PORT})")
+    parser.add_argument("--db", help="Callback database (default: KIE_CALLBACK_DB or ~/.cache/suno-kie/callbacks.db)")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Print every callback payload")
+    args = parser.parse_args()
+
+    store = CallbackStore(args.db)
+    receiver = CallbackReceiver(args.host, args.port, store, on_event=lambda e: print_event(e, args.verbose))
+
+    print(f"🚀 Callback Server 啟動在 {receiver.url}")
+    print(f"📡 等待 Kie.ai 任務完成通知... (POST {receiver.url}/callback)")
+    print(f"💾 Callback 記錄: {store.path}")
     print(f"按 Ctrl+C 停止\n")
 
     try:
-        server.serve_forever()
+        receiver.serve_forever()
     except KeyboardInterrupt:
-        print("\n\n⏹️ Server 已停止")
+        stats = store.stats()
+        print(f"\n\n⏹️ Server 已停止（{stats['tasks']} 個任務，事件: {stats['events']}）")
         sys.exit(0)
 
 if __name__ == "__main__":
-    start_server()
+    main()
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Kie.ai Callback Store
+Persistent callback events and a threaded receiver shared by all suno-kie clients
+
+Every callback Kie.ai posts (text / first / complete / error) is stored as one
+row in a local SQLite database (default ~/.cache/suno-kie/callbacks.db,
+override with KIE_CALLBACK_DB), keyed by task ID. One CallbackReceiver can
+take callbacks for any number of tasks at once; clients wait for their own
+task ID either in-process (receiver.wait) or over HTTP (wait_remote), so a
+single receiver serves every generation process on the machine.
+
+HTTP endpoints:
+    POST /callback[/<tenant>]             store a callback (tenant labels the sender)
+    GET  /health                          {"status": "ok", "instance": <receiver id>}
+    GET  /tasks/<task_id>?since=N         events of a task with id > N
+    GET  /tasks/<task_id>/wait?types=complete,error&timeout=30&since=N
+                                          long-poll until a matching event exists
+
+Usage:
+    from callback_store import CallbackReceiver, wait_remote
+
+    receiver = CallbackReceiver(port=8080).start()
+    event = receiver.wait(task_id, timeout=600)
+
+    event = wait_remote("http://localhost:8080", task_id, timeout=600)
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import uuid
+import sqlite3
+import threading
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "suno-kie", "callbacks.db")
+DEFAULT_PORT = 8080
+
+CALLBACK_TYPES = ("text", "first", "complete", "error")
+FINAL_TYPES = ("complete", "error")
+
+# Longest single long-poll request; clients loop for longer waits
+MAX_LONG_POLL = 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id TEXT NOT NULL,
+    tenant TEXT,
+    callback_type TEXT NOT NULL,
+    code INTEGER,
+    msg TEXT,
+    payload TEXT NOT NULL,
+    received_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_task ON events (task_id, id);
+"""
+
+EventCallback = Callable[[Dict[str, Any]], None]
+
+
+def parse_callback(data: Dict[str, Any]) -> Tuple[Optional[str], str]:
+    """Task ID and callback type of a Kie.ai callback body (failed codes count as 'error')"""
+    task_data = data.get("data") if isinstance(data.get("data"), dict) else {}
+    task_id = task_data.get("task_id") or task_data.get("taskId") or data.get("task_id") or data.get("taskId")
+    callback_type = task_data.get("callbackType") or ""
+    if data.get("code") not in (None, 200) and callback_type != "error":
+        callback_type = "error"
+    return task_id, callback_type or "unknown"
+
+
+def callback_clips(event: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Clip list carried by a stored event"""
+    task_data = event["payload"].get("data") if isinstance(event["payload"].get("data"), dict) else {}
+    clips = task_data.get("data")
+    return [clip for clip in clips if isinstance(clip, dict)] if isinstance(clips, list) else []
+
+
+class CallbackStore:
+    """
+    SQLite log of callback events
+
+    Args:
+        path: database file (default: KIE_CALLBACK_DB or ~/.cache/suno-kie/callbacks.db)
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.environ.get("KIE_CALLBACK_DB") or DEFAULT_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        # WAL lets clients read while the receiver writes; NORMAL sync is durable across process crashes
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    @staticmethod
+    def _event(row: sqlite3.Row) -> Dict[str, Any]:
+        event = dict(row)
+        event["payload"] = json.loads(event["payload"])
+        return event
+
+    def record(self, data: Dict[str, Any], tenant: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Store a callback body, returns the stored event (None when it names no task)"""
+        task_id, callback_type = parse_callback(data)
+        if not task_id:
+            return None
+        code = data.get("code") if isinstance(data.get("code"), int) else None
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO events (task_id, tenant, callback_type, code, msg, payload, received_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (task_id, tenant, callback_type, code, data.get("msg"),
+                 json.dumps(data, ensure_ascii=False), time.time())
+            )
+            row = self._conn.execute("SELECT * FROM events WHERE id = ?", (cursor.lastrowid,)).fetchone()
+        return self._event(row)
+
+    def events(self, task_id: str, since: int = 0,
+               types: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Events of a task in arrival order, optionally after event id `since` and of given types"""
+        sql = "SELECT * FROM events WHERE task_id = ? AND id > ?"
+        params: List[Any] = [task_id, since]
+        types = list(types or [])
+        if types:
+            sql += f" AND callback_type IN ({','.join('?' * len(types))})"
+            params.extend(types)
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY id", params).fetchall()
+        return [self._event(row) for row in rows]
+
+    def latest(self, task_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM events WHERE task_id = ? ORDER BY id DESC LIMIT 1", (task_id,)
+            ).fetchone()
+        return self._event(row) if row else None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            tasks = self._conn.execute("SELECT COUNT(DISTINCT task_id) FROM events").fetchone()[0]
+            by_type = dict(self._conn.execute(
+                "SELECT callback_type, COUNT(*) FROM events GROUP BY callback_type").fetchall())
+        return {"tasks": tasks, "events": by_type}
+
+
+class ReceiverServer(ThreadingHTTPServer):
+    """Threaded HTTP server with a listen backlog deep enough for callback bursts"""
+
+    daemon_threads = True
+    # Default backlog of 5 resets connections when many tasks finish at once
+    request_queue_size = 256
+
+
+class _Handler(BaseHTTPRequestHandler):
+    receiver: "CallbackReceiver"
+
+    def _json(self, obj: Any, status: int = 200):
+        body = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        content_length = int(self.headers.get("Content-Length", 0))
+        post_data = self.rfile.read(content_length)
+
+        if not parts or parts[0] != "callback":
+            return self._json({"error": "not found"}, 404)
+        try:
+            data = json.loads(post_data.decode("utf-8"))
+        except (UnicodeDecodeError, ValueError):
+            # Kie.ai retries on non-2xx; a malformed body would never succeed
+            return self._json({"status": "ignored"})
+
+        tenant = parts[1] if len(parts) > 1 else None
+        event = self.receiver.receive(data, tenant) if isinstance(data, dict) else None
+        self._json({"status": "received" if event else "ignored"})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        query = parse_qs(url.query)
+        try:
+            since = int(query.get("since", ["0"])[0] or 0)
+            timeout = float(query.get("timeout", [MAX_LONG_POLL])[0])
+        except ValueError:
+            since, timeout = -1, -1.0
+        # nan / inf would turn the long poll into a loop that never returns
+        if since < 0 or timeout < 0 or not math.isfinite(timeout):
+            return self._json({"error": "since must be a non-negative integer and timeout a non-negative number"}, 400)
+        timeout = min(timeout, MAX_LONG_POLL)
+
+        if parts == ["health"]:
+            return self._json({"status": "ok", "instance": self.receiver.instance})
+        if len(parts) == 2 and parts[0] == "tasks":
+            return self._json({"events": self.receiver.store.events(parts[1], since)})
+        if len(parts) == 3 and parts[0] == "tasks" and parts[2] == "wait":
+            types = [t for t in query.get("types", [",".join(FINAL_TYPES)])[0].split(",") if t]
+            return self._json({"event": self.receiver.wait(parts[1], types, timeout, since)})
+        self._json({"error": "not found"}, 404)
+
+    def log_message(self, format, *args):
+        # Suppress default logging
+        pass
+
+
+class CallbackReceiver:
+    """
+    Threaded HTTP receiver for Kie.ai callbacks
+
+    Args:
+        host / port: listen address (port 0 picks a free port)
+        store: CallbackStore (default: shared database path)
+        on_event: called with every stored event (from the request thread)
+    """
+
+    def __init__(self, host: str = "localhost", port: int = DEFAULT_PORT,
+                 store: Optional[CallbackStore] = None, on_event: Optional[EventCallback] = None):
+        self.store = store or CallbackStore()
+        self.on_event = on_event
+        # Random per-process ID, so a client can tell whether a public URL reaches this receiver
+        self.instance = uuid.uuid4().hex
+        self._cond = threading.Condition()
+        # Newest event id per task, so woken waiters only re-query their own task when it changed
+        self._latest: Dict[str, int] = {}
+        handler = type("CallbackHandler", (_Handler,), {"receiver": self})
+        self.server = ReceiverServer((host, port), handler)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def receive(self, data: Dict[str, Any], tenant: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Store a callback and wake waiters; returns the stored event"""
+        try:
+            event = self.store.record(data, tenant)
+        except sqlite3.Error as e:
+            print(f"Error storing callback: {e}", file=sys.stderr)
+            return None
+        if event is None:
+            return None
+        # Handler first, so a waiter woken by this event sees its side effects (e.g. queued downloads)
+        if self.on_event:
+            try:
+                self.on_event(event)
+            except Exception as e:
+                print(f"Warning: callback handler failed: {e}", file=sys.stderr)
+        with self._cond:
+            self._latest[event["task_id"]] = event["id"]
+            self._cond.notify_all()
+        return event
+
+    def wait(self, task_id: str, types: Iterable[str] = FINAL_TYPES, timeout: Optional[float] = None,
+             since: int = 0) -> Optional[Dict[str, Any]]:
+        """
+        Block until the task has an event of one of `types` (with id > since)
+
+        Returns:
+            the earliest matching event, or None on timeout
+
+        Raises:
+            ValueError: timeout is nan or infinite (use None to wait forever)
+        """
+        if timeout is not None and not math.isfinite(timeout):
+            raise ValueError(f"timeout must be finite or None, got {timeout}")
+        types = list(types)
+        deadline = None if timeout is None else time.time() + max(0.0, timeout)
+        checked = None
+        with self._cond:
+            while True:
+                latest = self._latest.get(task_id)
+                if checked is None or latest != checked:
+                    checked = latest
+                    events = self.store.events(task_id, since, types)
+                    if events:
+                        return events[0]
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+    def start(self) -> "CallbackReceiver":
+        """Serve in a background thread (returns once the socket is listening)"""
+        self._thread = threading.Thread(target=self.server.serve_forever, name="kie-callback-receiver",
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        with self._cond:
+            self._cond.notify_all()
+
+
+def receiver_reachable(receiver_url: str, timeout: float = 2) -> bool:
+    """True when a callback receiver answers /health"""
+    try:
+        response = requests.get(f"{receiver_url.rstrip('/')}/health", timeout=timeout)
+        return response.ok and response.json().get("status") == "ok"
+    except (requests.exceptions.RequestException, ValueError):
+        return False
+
+
+def receiver_instance(url: str, timeout: float = 5) -> Optional[str]:
+    """Instance ID of the receiver serving url's host (any path, e.g. a callback URL), or None"""
+    parsed = urlparse(url)
+    try:
+        response = requests.get(f"{parsed.scheme}://{parsed.netloc}/health", timeout=timeout)
+        body = response.json() if response.ok else {}
+    except (requests.exceptions.RequestException, ValueError):
+        return None
+    return body.get("instance") if isinstance(body, dict) and body.get("status") == "ok" else None
+
+
+def wait_remote(receiver_url: str, task_id: str, types: Iterable[str] = FINAL_TYPES,
+                timeout: float = 600, since: int = 0,
+                session: Optional[requests.Session] = None) -> Optional[Dict[str, Any]]:
+    """
+    Long-poll a running receiver until the task has a matching event
+
+    Returns:
+        the event, or None on timeout
+
+    Raises:
+        requests.exceptions.RequestException: receiver unreachable
+    """
+    http = session or requests
+    url = f"{receiver_url.rstrip('/')}/tasks/{task_id}/wait"
+    deadline = time.time() + timeout
+    while True:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return None
+        poll = min(remaining, MAX_LONG_POLL)
+        response = http.get(url, params={"types": ",".join(types), "timeout": poll, "since": since},
+                            timeout=poll + 10)
+        response.raise_for_status()
+        event = response.json().get("event")
+        if event:
+            return event
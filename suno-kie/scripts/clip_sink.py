@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Kie.ai Clip Sink
+Download and register clips as soon as their callbacks arrive
+
+Kie.ai sends a `first` callback once the first track can be streamed, and a
+`complete` callback only after every track is finished. ClipSink starts work
+on `first`: it downloads each clip's stream_audio_url and cover image in
+background threads and registers the clip, so a usable track is on disk while
+the rest of the task is still generating. On `complete` it fetches the final
+MP3s (covers already on disk are not fetched again).
+
+Every finished clip is appended to <directory>/clips.jsonl, one line per stage:
+    {"stage": "first" | "complete", "task_id": ..., "clip_id": ..., "files": {...}, "elapsed": ...}
+
+Usage:
+    from clip_sink import ClipSink
+
+    sink = ClipSink("./songs", on_ready=print)
+    sink.handle(first_event)       # returns immediately, downloads in background
+    sink.handle(complete_event)
+    records = sink.close()         # wait for all downloads
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import threading
+import requests
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from callback_store import callback_clips
+
+MANIFEST_NAME = "clips.jsonl"
+DOWNLOAD_WORKERS = 4
+CHUNK_SIZE = 256 * 1024
+# Stream URLs are served while the track renders, so allow a long read
+DOWNLOAD_TIMEOUT = (10, 300)
+
+# What each callback stage downloads: (file kind, clip field, file suffix)
+STAGE_FILES = {
+    "first": [("stream", "stream_audio_url", "-stream.mp3"), ("cover", "image_url", ".jpg")],
+    "complete": [("audio", "audio_url", ".mp3"), ("cover", "image_url", ".jpg")],
+}
+
+ReadyCallback = Callable[[Dict[str, Any]], None]
+
+
+def clip_basename(clip: Dict[str, Any], index: int) -> str:
+    """<title>_<n>_<clip id prefix>, safe for any file system"""
+    title = re.sub(r'[\\/:*?"<>|\s]+', "_", clip.get("title") or "suno").strip("_") or "suno"
+    return f"{title[:60]}_{index}_{(clip.get('id') or '')[:8]}"
+
+
+def download_file(url: str, path: str, session: Optional[requests.Session] = None) -> int:
+    """Download url to path (written to a .part file first), returns bytes written"""
+    session = session or requests.Session()
+    partial = path + ".part"
+    written = 0
+    with session.get(url, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+        response.raise_for_status()
+        with open(partial, "wb") as f:
+            for chunk in response.iter_content(CHUNK_SIZE):
+                f.write(chunk)
+                written += len(chunk)
+    os.replace(partial, path)
+    return written
+
+
+class ClipSink:
+    """
+    Background downloader for the clips in first / complete callbacks
+
+    Args:
+        directory: download directory (created if missing)
+        workers: clips processed in parallel
+        on_ready: called with each manifest record once its files are on disk
+    """
+
+    def __init__(self, directory: str, workers: int = DOWNLOAD_WORKERS,
+                 on_ready: Optional[ReadyCallback] = None):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.manifest = os.path.join(directory, MANIFEST_NAME)
+        self.on_ready = on_ready
+        self.started = time.time()
+        # Seconds from sink creation to the first clip with a playable file
+        self.first_ready: Optional[float] = None
+        self.records: List[Dict[str, Any]] = []
+        self.errors: List[str] = []
+
+        self._lock = threading.Lock()
+        # (clip id, file kind) already claimed by a download
+        self._claimed: Set[Tuple[str, str]] = set()
+        self._futures: List[Future] = []
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="kie-clip-sink")
+        self._session = requests.Session()
+        self._session.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=workers))
+        self._session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=workers))
+
+    def handle(self, event: Dict[str, Any]):
+        """Queue the clips of a first / complete callback (other types are ignored)"""
+        stage = event["callback_type"]
+        if stage not in STAGE_FILES:
+            return
+        for index, clip in enumerate(callback_clips(event), 1):
+            self._futures.append(self._pool.submit(self._process, event["task_id"], clip, index, stage))
+
+    def _claim(self, clip_id: str, kind: str) -> bool:
+        with self._lock:
+            if (clip_id, kind) in self._claimed:
+                return False
+            self._claimed.add((clip_id, kind))
+            return True
+
+    def _process(self, task_id: str, clip: Dict[str, Any], index: int, stage: str):
+        clip_id = clip.get("id") or f"{task_id}-{index}"
+        base = os.path.join(self.directory, clip_basename(clip, index))
+        files = {}
+        for kind, field, suffix in STAGE_FILES[stage]:
+            url = clip.get(field)
+            if not url or not self._claim(clip_id, kind):
+                continue
+            path = base + suffix
+            try:
+                download_file(url, path, self._session)
+                files[kind] = path
+            except (requests.exceptions.RequestException, OSError) as e:
+                with self._lock:
+                    self._claimed.discard((clip_id, kind))
+                    self.errors.append(f"{clip_id} {kind}: {e}")
+                print(f"⚠️  下載失敗 ({clip_id} {kind}): {e}", file=sys.stderr)
+
+        if not files:
+            return
+        record = {"stage": stage, "task_id": task_id, "clip_id": clip_id, "title": clip.get("title"),
+                  "files": files, "elapsed": round(time.time() - self.started, 3), "clip": clip}
+        with self._lock:
+            if self.first_ready is None and ("stream" in files or "audio" in files):
+                self.first_ready = record["elapsed"]
+            self.records.append(record)
+            with open(self.manifest, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        if self.on_ready:
+            self.on_ready(record)
+
+    def close(self) -> List[Dict[str, Any]]:
+        """Wait for every queued download, returns the manifest records written by this sink"""
+        for future in list(self._futures):
+            future.result()
+        self._pool.shutdown(wait=True)
+        return list(self.records)
@@ -13,7 +13,7 @@ import requests
 from typing import Dict, Any
 
 # API Configuration
-BASE_URL = "https://api.kie.ai/api/v1"
+BASE_URL = os.environ.get("KIE_BASE_URL", "https://api.kie.ai/api/v1")
 API_KEY = os.environ.get("KIE_API_KEY", "")
 CALLBACK_URL = os.environ.get("KIE_CALLBACK_URL", "http://localhost:8080/callback")
 
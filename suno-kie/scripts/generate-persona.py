@@ -2,6 +2,10 @@
 """
 Kie.ai Suno Generate Persona Script
 Create a personalized music Persona from generated audio
+
+Created Personas are stored in the local persona registry (persona_registry.py),
+so asking again for the same audio ID returns the stored Persona instead of
+calling the API; --batch creates Personas for many clips concurrently.
 """
 
 import os
@@ -9,10 +13,12 @@ import sys
 import json
 import argparse
 import requests
-from typing import Dict, Any
+from typing import Dict, Any, List
+
+from persona_registry import DEFAULT_CONCURRENCY, PersonaRegistry, normalize_entry
 
 # API Configuration
-BASE_URL = "https://api.kie.ai/api/v1"
+BASE_URL = os.environ.get("KIE_BASE_URL", "https://api.kie.ai/api/v1")
 API_KEY = os.environ.get("KIE_API_KEY", "")
 
 def check_api_key():
@@ -22,8 +28,8 @@ def check_api_key():
         print("Please set it using: export KIE_API_KEY='your-api-key'", file=sys.stderr)
         sys.exit(1)
 
-def generate_persona(task_id: str, audio_id: str, name: str, description: str) -> Dict[str, Any]:
-    """Generate a Persona from audio"""
+def request_persona(task_id: str, audio_id: str, name: str, description: str) -> Dict[str, Any]:
+    """POST /generate-persona, returns the API response (raises RequestException)"""
     url = f"{BASE_URL}/generate-persona"
     headers = {
         "Authorization": f"Bearer {API_KEY}",
@@ -37,21 +43,90 @@ def generate_persona(task_id: str, audio_id: str, name: str, description: str) -
         "description": description
     }
 
+    response = requests.post(url, json=payload, headers=headers, timeout=60)
+    response.raise_for_status()
+    return response.json()
+
+def create_persona(task_id: str, audio_id: str, name: str, description: str) -> str:
+    """Create a Persona and return its ID (raises RuntimeError with the API message on failure)"""
+    try:
+        result = request_persona(task_id, audio_id, name, description)
+    except requests.exceptions.RequestException as e:
+        detail = e.response.text if getattr(e, "response", None) is not None else ""
+        raise RuntimeError(f"{e} {detail}".strip())
+    persona_id = result.get("data", {}).get("personaId") if result.get("code") == 200 else None
+    if not persona_id:
+        raise RuntimeError(result.get("msg") or "No personaId in response")
+    return persona_id
+
+def generate_persona(task_id: str, audio_id: str, name: str, description: str) -> Dict[str, Any]:
+    """Generate a Persona from audio"""
     try:
         print(f"Creating Persona: {name}")
         print(f"Task ID: {task_id}")
         print(f"Audio ID: {audio_id}")
         print()
 
-        response = requests.post(url, json=payload, headers=headers)
-        response.raise_for_status()
-        return response.json()
+        return request_persona(task_id, audio_id, name, description)
     except requests.exceptions.RequestException as e:
         print(f"Error generating persona: {e}", file=sys.stderr)
         if hasattr(e, 'response') and e.response is not None:
             print(f"Response: {e.response.text}", file=sys.stderr)
         sys.exit(1)
 
+def print_hint(msg: str):
+    """Helpful hint for a failed Persona creation"""
+    if 'Persona already exists' in msg:
+        print("\n💡 Hint: Each audio ID can only generate one Persona.", file=sys.stderr)
+        print("   Use a different audio ID or check existing Personas (--list).", file=sys.stderr)
+    elif 'not found' in msg.lower() or 'does not exist' in msg.lower():
+        print("\n💡 Hint: Make sure the task has completed successfully.", file=sys.stderr)
+        print("   Use fetch.py to check task status first.", file=sys.stderr)
+    elif 'model' in msg.lower():
+        print("\n💡 Hint: Persona generation only supports models above v3.5.", file=sys.stderr)
+        print("   v3.5 itself is not supported.", file=sys.stderr)
+
+def load_batch(path: str) -> List[Dict[str, str]]:
+    """Batch entries from a JSON array or JSON lines file ('-' reads stdin)"""
+    if path == "-":
+        text = sys.stdin.read()
+    else:
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+    text = text.strip()
+    if text.startswith("["):
+        items = json.loads(text)
+    else:
+        items = [json.loads(line) for line in text.splitlines() if line.strip()]
+    return [normalize_entry(item) for item in items]
+
+def run_batch(registry: PersonaRegistry, path: str, concurrency: int, as_json: bool):
+    """Ensure a Persona for every batch entry and report the results"""
+    try:
+        entries = load_batch(path)
+    except (OSError, ValueError) as e:
+        print(f"Error: invalid batch file: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"Processing {len(entries)} Persona(s), {concurrency} at a time...", file=sys.stderr)
+    results = registry.ensure_many(entries, create_persona, concurrency)
+
+    if as_json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+    else:
+        icons = {"created": "✓ created ", "existing": "↺ existing", "failed": "✗ failed  "}
+        for result in results:
+            line = f"{icons[result['status']]}  {result['audio_id']}  {result['persona_id'] or '-'}  {result['name']}"
+            if result.get("error"):
+                line += f"  ({result['error']})"
+            print(line)
+        counts = {status: sum(r["status"] == status for r in results) for status in icons}
+        print(f"\n{counts['created']} created, {counts['existing']} reused, {counts['failed']} failed"
+              f" (registry: {registry.path})")
+
+    if any(result["status"] == "failed" for result in results):
+        sys.exit(1)
+
 def main():
     parser = argparse.ArgumentParser(
         description="Generate a music Persona from generated audio",
@@ -66,6 +141,12 @@ Examples:
     --name "Classical Piano" \\
     --description "優雅的古典鋼琴風格，適合抒情歌曲，節奏溫和"
 
+  # Batch: JSON array or JSON lines of {"task_id", "audio_id", "name", "description"}
+  %(prog)s --batch personas.jsonl --concurrency 4
+
+  # Stored Personas (created before are reused, not re-created)
+  %(prog)s --list
+
 Workflow:
   1. Generate music using generate.py
   2. Note the taskId and audioId from the output
@@ -74,14 +155,55 @@ Workflow:
         """
     )
 
-    parser.add_argument("--task-id", required=True, help="Music generation task ID")
-    parser.add_argument("--audio-id", required=True, help="Audio ID from the task")
-    parser.add_argument("--name", required=True, help="Persona name")
-    parser.add_argument("--description", required=True, help="Detailed description of the Persona")
+    parser.add_argument("--task-id", help="Music generation task ID")
+    parser.add_argument("--audio-id", help="Audio ID from the task")
+    parser.add_argument("--name", help="Persona name")
+    parser.add_argument("--description", help="Detailed description of the Persona")
+    parser.add_argument("--batch", metavar="FILE", help="Create Personas for every entry in FILE ('-' = stdin)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                       help=f"Persona creations in flight for --batch (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--list", action="store_true", help="List Personas stored in the registry")
+    parser.add_argument("--force", action="store_true", help="Create even if the registry has a Persona for this audio ID")
+    parser.add_argument("--registry", help="Registry database (default: KIE_PERSONA_DB or ~/.cache/suno-kie/personas.db)")
     parser.add_argument("--json", action="store_true", help="Output raw JSON only")
 
     args = parser.parse_args()
 
+    registry = PersonaRegistry(args.registry)
+
+    if args.list:
+        personas = registry.all()
+        if args.json:
+            print(json.dumps(personas, indent=2, ensure_ascii=False))
+        else:
+            for persona in personas:
+                print(f"{persona['persona_id']}  {persona['name']}  (audio {persona['audio_id']}, task {persona['task_id']})")
+            print(f"\n{len(personas)} Persona(s) in {registry.path}")
+        return
+
+    if args.batch:
+        check_api_key()
+        run_batch(registry, args.batch, args.concurrency, args.json)
+        return
+
+    missing = [flag for flag, value in (("--task-id", args.task_id), ("--audio-id", args.audio_id),
+                                        ("--name", args.name), ("--description", args.description)) if not value]
+    if missing:
+        parser.error(f"the following arguments are required: {', '.join(missing)} (or use --batch / --list)")
+
+    # Reuse the Persona already created from this clip
+    stored = None if args.force else registry.get(args.audio_id)
+    if stored:
+        if args.json:
+            # Same shape as a generate-persona API response
+            data = {"personaId": stored["persona_id"], "name": stored["name"], "description": stored["description"]}
+            print(json.dumps({"code": 200, "msg": "existing", "data": data}, indent=2, ensure_ascii=False))
+        else:
+            print(f"↺ Persona already created from this audio (registry: {registry.path})")
+            print(f"\n   Persona ID: {stored['persona_id']}")
+            print(f"   Name: {stored['name']}")
+        return
+
     # Check API key
     check_api_key()
 
@@ -91,22 +213,12 @@ Workflow:
     # Check result
     if result.get("code") != 200:
         print(f"Error: {result.get('msg')}", file=sys.stderr)
-
-        # Provide helpful error messages
-        msg = result.get('msg', '')
-        if 'Persona already exists' in msg:
-            print("\n💡 Hint: Each audio ID can only generate one Persona.", file=sys.stderr)
-            print("   Use a different audio ID or check existing Personas.", file=sys.stderr)
-        elif 'not found' in msg.lower() or 'does not exist' in msg.lower():
-            print("\n💡 Hint: Make sure the task has completed successfully.", file=sys.stderr)
-            print("   Use fetch.py to check task status first.", file=sys.stderr)
-        elif 'model' in msg.lower():
-            print("\n💡 Hint: Persona generation only supports models above v3.5.", file=sys.stderr)
-            print("   v3.5 itself is not supported.", file=sys.stderr)
-
+        print_hint(result.get('msg', ''))
         sys.exit(1)
 
     persona_id = result.get("data", {}).get("personaId")
+    if persona_id:
+        registry.save(args.task_id, args.audio_id, persona_id, args.name, args.description)
 
     if args.json:
         print(json.dumps(result, indent=2, ensure_ascii=False))
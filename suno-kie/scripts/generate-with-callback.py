@@ -21,25 +21,24 @@ import signal
 import argparse
 import subprocess
 import requests
-import threading
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from socketserver import TCPServer
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional
+
+from callback_store import FINAL_TYPES, CallbackReceiver, callback_clips, receiver_reachable, wait_remote
+from clip_sink import ClipSink
 
 # API Configuration
-BASE_URL = "https://api.kie.ai/api/v1"
+BASE_URL = os.environ.get("KIE_BASE_URL", "https://api.kie.ai/api/v1")
 API_KEY = os.environ.get("KIE_API_KEY", "")
 
 # Global variables
 ngrok_process = None
-callback_received = False
-callback_data = None
-callback_lock = threading.Lock()
 
 PORT = 8080
+# Longest wait for the ngrok agent to report a tunnel
+NGROK_START_TIMEOUT = 15
 
-class CallbackHandler(BaseHTTPRequestHandler):
-    """HTTP Handler for Kie.ai callbacks
+def print_callback(event: Dict[str, Any]):
+    """Print a Kie.ai callback as it arrives
 
     Callback Types (from docs.kie.ai/suno-api):
       - text: Lyrics/text generation completed
@@ -47,93 +46,31 @@ class CallbackHandler(BaseHTTPRequestHandler):
       - complete: All tracks completed (FINAL - has MP3 URLs)
       - error: Generation failed
     """
+    callback_type = event["callback_type"]
 
-    def do_POST(self):
-        global callback_received, callback_data
-
-        content_length = int(self.headers.get('Content-Length', 0))
-        post_data = self.rfile.read(content_length)
+    # Print to stdout with nice formatting
+    print("\n" + "="*60)
+    if callback_type == "complete":
+        print("✅ 收到 Callback：全部音樂生成完成！")
+    elif callback_type == "first":
+        print("🎵 收到 Callback：第一首已完成（等待第二首）...")
+    elif callback_type == "text":
+        print("📝 收到 Callback：歌詞生成完成（等待音頻生成）...")
+    elif callback_type == "error":
+        print("❌ 收到 Callback：生成失敗")
+    else:
+        print(f"📬 收到 Callback：{callback_type}")
+    print("="*60)
+    print(json.dumps(event["payload"], indent=2, ensure_ascii=False))
+    print("="*60 + "\n")
 
-        try:
-            data = json.loads(post_data.decode('utf-8'))
-
-            # Check callback type
-            task_data = data.get("data", {})
-            callback_type = task_data.get("callbackType", "")
-
-            # Print to stdout with nice formatting
-            print("\n" + "="*60)
-            if callback_type == "complete":
-                print("✅ 收到 Callback：全部音樂生成完成！")
-            elif callback_type == "first":
-                print("🎵 收到 Callback：第一首已完成（等待第二首）...")
-            elif callback_type == "text":
-                print("📝 收到 Callback：歌詞生成完成（等待音頻生成）...")
-            elif callback_type == "error":
-                print("❌ 收到 Callback：生成失敗")
-            else:
-                print(f"📬 收到 Callback：{callback_type}")
-            print("="*60)
-            print(json.dumps(data, indent=2, ensure_ascii=False))
-            print("="*60 + "\n")
-
-            # Only mark as complete when callbackType is "complete" or "error"
-            if callback_type in ["complete", "error"]:
-                with callback_lock:
-                    callback_data = data
-                    callback_received = True
-
-                if callback_type == "complete" and data.get("code") == 200:
-                    task_id = task_data.get("task_id")
-                    clips = task_data.get("data", [])
-
-                    print(f"✓ 任務完成: {task_id}")
-                    print(f"✓ 生成了 {len(clips)} 首音樂\n")
-
-                    for i, clip in enumerate(clips, 1):
-                        print(f"【音樂 {i}】")
-                        print(f"  ID: {clip.get('id')}")
-                        print(f"  標題: {clip.get('title')}")
-                        print(f"  風格: {clip.get('tags')}")
-                        if clip.get('duration'):
-                            duration = clip.get('duration')
-                            if isinstance(duration, (int, float)):
-                                print(f"  時長: {duration} 秒")
-
-                        # IMPORTANT: audio_url is the MP3 download URL!
-                        if clip.get('audio_url'):
-                            print(f"  📥 MP3 下載 URL: {clip.get('audio_url')}")
-                        if clip.get('stream_audio_url'):
-                            print(f"  🎵 串流 URL: {clip.get('stream_audio_url')}")
-                        if clip.get('image_url'):
-                            print(f"  🖼️  圖片 URL: {clip.get('image_url')}")
-                        print()
-                elif callback_type == "error":
-                    print("❌ 生成失敗")
-                    error_msg = data.get("msg", "Unknown error")
-                    print(f"錯誤訊息: {error_msg}")
-            else:
-                # Continue waiting for other callback types
-                status_map = {
-                    "text": "歌詞已生成，等待音樂生成...",
-                    "first": "第一首已完成，等待第二首..."
-                }
-                print(f"⏳ {status_map.get(callback_type, '繼續等待...')}\n")
-
-            # Send response
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps({"status": "received"}).encode())
-
-        except Exception as e:
-            print(f"Error processing callback: {e}", file=sys.stderr)
-            self.send_response(200)
-            self.end_headers()
-
-    def log_message(self, format, *args):
-        # Suppress default logging
-        pass
+    if callback_type not in FINAL_TYPES:
+        # Continue waiting for other callback types
+        status_map = {
+            "text": "歌詞已生成，等待音樂生成...",
+            "first": "第一首已完成，等待第二首..."
+        }
+        print(f"⏳ {status_map.get(callback_type, '繼續等待...')}\n")
 
 def check_ngrok_installed() -> bool:
     """Check if ngrok is installed"""
@@ -173,24 +110,15 @@ def check_api_key():
         print("Please set it using: export KIE_API_KEY='your-api-key'", file=sys.stderr)
         sys.exit(1)
 
-def start_callback_server(port: int = 8080):
-    """Start callback server in background thread"""
+def start_callback_server(port: int = 8080, verbose: bool = True) -> CallbackReceiver:
+    """Start the callback receiver in a background thread (listening once this returns)"""
     global PORT
     PORT = port
 
     print(f"🚀 啟動 Callback Server (localhost:{port})...")
-
-    # Start server in background thread
-    def run_server():
-        server = TCPServer(("localhost", PORT), CallbackHandler)
-        server.serve_forever()
-
-    server_thread = threading.Thread(target=run_server, daemon=True)
-    server_thread.start()
-    time.sleep(1)  # Wait for server to start
-
+    receiver = CallbackReceiver("localhost", port, on_event=print_callback if verbose else None).start()
     print("✓ Callback Server 運行中")
-    return server_thread
+    return receiver
 
 def start_ngrok_tunnel(port: int = 8080) -> tuple[subprocess.Popen, str]:
     """Start ngrok tunnel and return process and public URL"""
@@ -204,37 +132,43 @@ def start_ngrok_tunnel(port: int = 8080) -> tuple[subprocess.Popen, str]:
         text=True
     )
 
-    time.sleep(3)  # Wait for ngrok to start
-
-    # Get ngrok public URL from API
-    try:
-        response = requests.get("http://localhost:4040/api/tunnels", timeout=5)
-        response.raise_for_status()
-        tunnels = response.json().get("tunnels", [])
-
+    # Poll the ngrok agent API until the tunnel is up instead of sleeping a fixed time
+    tunnels = []
+    last_error: Optional[Exception] = None
+    deadline = time.time() + NGROK_START_TIMEOUT
+    while time.time() < deadline and not tunnels:
+        if ngrok_process.poll() is not None:
+            break
+        try:
+            response = requests.get("http://localhost:4040/api/tunnels", timeout=2)
+            response.raise_for_status()
+            tunnels = response.json().get("tunnels", [])
+        except (requests.exceptions.RequestException, ValueError) as e:
+            last_error = e
         if not tunnels:
-            print("❌ 無法取得 Ngrok URL", file=sys.stderr)
-            ngrok_process.terminate()
-            sys.exit(1)
-
-        public_url = tunnels[0].get("public_url")
-        if not public_url:
-            print("❌ Ngrok URL 格式錯誤", file=sys.stderr)
-            ngrok_process.terminate()
-            sys.exit(1)
+            time.sleep(0.2)
 
-        # Add /callback path
-        callback_url = f"{public_url}/callback"
-        print(f"✓ Ngrok Tunnel 已建立: {public_url}")
-        print(f"✓ Callback URL: {callback_url}")
-
-        return ngrok_process, callback_url
+    if not tunnels:
+        if last_error:
+            print(f"❌ 無法連接 Ngrok API: {last_error}", file=sys.stderr)
+        else:
+            print("❌ 無法取得 Ngrok URL", file=sys.stderr)
+        ngrok_process.terminate()
+        sys.exit(1)
 
-    except requests.exceptions.RequestException as e:
-        print(f"❌ 無法連接 Ngrok API: {e}", file=sys.stderr)
+    public_url = tunnels[0].get("public_url")
+    if not public_url:
+        print("❌ Ngrok URL 格式錯誤", file=sys.stderr)
         ngrok_process.terminate()
         sys.exit(1)
 
+    # Add /callback path
+    callback_url = f"{public_url}/callback"
+    print(f"✓ Ngrok Tunnel 已建立: {public_url}")
+    print(f"✓ Callback URL: {callback_url}")
+
+    return ngrok_process, callback_url
+
 def verify_callback_server(callback_url: str) -> bool:
     """Verify callback server is ready to receive requests"""
     print(f"🔍 驗證 Callback Server...")
@@ -329,6 +263,12 @@ def cleanup(signum=None, frame=None):
     print("✓ 清理完成")
     sys.exit(0)
 
+def print_clip_ready(record: Dict[str, Any]):
+    """Print a clip whose files were just downloaded by the clip sink"""
+    label = "🎧 串流版已就緒" if record["stage"] == "first" else "📥 完整版已下載"
+    files = ", ".join(os.path.basename(path) for path in record["files"].values())
+    print(f"{label} ({record['elapsed']:.1f}s): {record['clip_id']} → {files}", flush=True)
+
 def main():
     # Set up signal handlers for cleanup
     signal.signal(signal.SIGINT, cleanup)
@@ -349,6 +289,13 @@ Examples:
 
   # Non-custom mode
   %(prog)s --prompt "A rock song" --custom-mode false
+
+  # Early streaming: first track on disk as soon as it can be streamed
+  %(prog)s --prompt "Test" --style "pop" --title "Demo" --download ./songs
+
+  # Loopback against the local mock (no ngrok, no network)
+  KIE_BASE_URL=http://localhost:8765/api/v1 %(prog)s --loopback --port 0 \
+    --prompt "Test" --style "pop" --title "CI"
         """
     )
 
@@ -369,12 +316,33 @@ Examples:
     parser.add_argument("--audio-weight", type=float, help="Audio feature weight (0-1)")
     parser.add_argument("--persona-id", help="Persona ID to apply (Kie.ai exclusive)")
 
+    # Shared receiver (callback-server.py) instead of a per-process server + ngrok
+    parser.add_argument("--receiver", metavar="URL",
+                       help="Use a running callback-server.py (e.g. http://localhost:8080) instead of starting one")
+    parser.add_argument("--callback-url",
+                       help="Public callback URL for --receiver (default: KIE_CALLBACK_URL or <receiver>/callback)")
+    parser.add_argument("--timeout", type=int, default=600, help="Seconds to wait for the final callback (default: 600)")
+    parser.add_argument("--loopback", action="store_true",
+                       help="No ngrok: callbacks go to localhost (for a local Kie.ai mock via KIE_BASE_URL, or CI)")
+    parser.add_argument("--port", type=int, default=PORT, help=f"Callback server port (default: {PORT}, 0 = any free port)")
+    parser.add_argument("--download", metavar="DIR",
+                       help="Early streaming: download stream audio + cover as soon as the first callback arrives, "
+                            "final MP3s on complete; clips are registered in DIR/clips.jsonl")
+
     args = parser.parse_args()
 
     # Check prerequisites
     check_api_key()
 
-    if not check_ngrok_installed():
+    if args.loopback and args.receiver:
+        parser.error("--loopback and --receiver cannot be combined")
+
+    if args.receiver:
+        if not receiver_reachable(args.receiver):
+            print(f"❌ 無法連接 Callback Server: {args.receiver}", file=sys.stderr)
+            print("   請先啟動: callback-server.py --port 8080", file=sys.stderr)
+            sys.exit(1)
+    elif not args.loopback and not check_ngrok_installed():
         install_ngrok_instructions()
         sys.exit(1)
 
@@ -388,13 +356,25 @@ Examples:
     print("🚀 啟動服務階段")
     print("="*60)
 
-    callback_thread = start_callback_server()
-    ngrok_process, callback_url = start_ngrok_tunnel()
+    receiver = None
+    if args.receiver:
+        callback_url = (args.callback_url or os.environ.get("KIE_CALLBACK_URL")
+                        or f"{args.receiver.rstrip('/')}/callback")
+        print(f"✓ 使用共用 Callback Server: {args.receiver}")
+        print(f"✓ Callback URL: {callback_url}")
+    elif args.loopback:
+        receiver = start_callback_server(args.port)
+        callback_url = f"{receiver.url}/callback"
+        print(f"✓ Loopback 模式（不使用 Ngrok）: {callback_url}")
+        print(f"✓ Kie.ai API: {BASE_URL}")
+    else:
+        receiver = start_callback_server(args.port)
+        ngrok_process, callback_url = start_ngrok_tunnel(receiver.server.server_address[1])
 
-    # Verify callback server is ready
-    if not verify_callback_server(callback_url):
-        print("❌ Callback Server 驗證失敗", file=sys.stderr)
-        cleanup()
+        # Verify callback server is ready
+        if not verify_callback_server(callback_url):
+            print("❌ Callback Server 驗證失敗", file=sys.stderr)
+            cleanup()
 
     print("="*60)
     print("✓ 所有服務已準備就緒")
@@ -428,90 +408,98 @@ Examples:
     print(f"\n📡 等待 Callback 通知...")
     print(f"   (按 Ctrl+C 提前結束)\n")
 
-    # Wait for callback
-    try:
-        start_time = time.time()
-        timeout = 600  # 10 minutes timeout
-
-        while True:
-            # Check timeout
-            if time.time() - start_time > timeout:
-                print(f"\n⏰ 等待超時 ({timeout} 秒)")
-                print(f"   可以前往 https://kie.ai/logs 手動查看結果")
-                print(f"   任務 ID: {task_id}")
-                cleanup()
-
-            # Check if callback received
-            with callback_lock:
-                if callback_received and callback_data:
-                    # Extract clips from callback data
-                    task_data = callback_data.get('data', {})
-                    callback_type = task_data.get('callbackType', '')
-
-                    # Stop on complete or error
-                    if callback_type == 'complete':
-                        task_id_final = task_data.get('task_id')
-                        clips = task_data.get('data', [])
-
-                        if clips:
-                            print("\n" + "="*60)
-                            print("✅ 全部生成完成！")
-                            print("="*60)
-                            print(f"任務 ID: {task_id_final}")
-                            print(f"生成了 {len(clips)} 首音樂\n")
-
-                            # Display music URLs
-                            for i, clip in enumerate(clips, 1):
-                                print(f"【音樂 {i}】")
-                                print(f"  ID: {clip.get('id')}")
-                                print(f"  標題: {clip.get('title')}")
-                                print(f"  風格: {clip.get('tags')}")
-                                if clip.get('duration'):
-                                    print(f"  時長: {clip.get('duration')} 秒")
-
-                                # Show URLs
-                                if clip.get('audio_url'):
-                                    print(f"  📥 MP3 URL: {clip.get('audio_url')}")
-                                if clip.get('stream_audio_url'):
-                                    print(f"  🎵 音樂 URL: {clip.get('stream_audio_url')}")
-                                if clip.get('image_url'):
-                                    print(f"  🖼️  圖片 URL: {clip.get('image_url')}")
-                                print()
-
-                            print("="*60)
-                            print("💡 提示: 使用 pix2-upload skill 上傳這些檔案")
-                            print("="*60)
-
-                            # Stop services after displaying results
-                            print("\n⏹️ 停止服務...")
-                            if ngrok_process:
-                                ngrok_process.terminate()
-                            print("✓ Ngrok + Callback Server 已停止")
-
-                            print("\n✅ 所有工作完成！")
-                            return
-
-                    elif callback_type == 'error':
-                        print("\n" + "="*60)
-                        print("❌ 生成失敗")
-                        print("="*60)
-                        print("請檢查任務參數或前往 https://kie.ai/logs 查看詳細信息")
-
-                        # Stop services on error
-                        print("\n⏹️ 停止服務...")
-                        if ngrok_process:
-                            ngrok_process.terminate()
-                        print("✓ Ngrok + Callback Server 已停止")
-                        return
-
-                    else:
-                        # Reset flag to wait for complete callback
-                        callback_received = False
-
-            time.sleep(1)
+    # With --download, clips are handed to the sink from the first callback on
+    sink = ClipSink(args.download, on_ready=print_clip_ready) if args.download else None
+    wait_types = ("first",) + FINAL_TYPES if sink else FINAL_TYPES
 
+    # Wait for this task's final callback (other tasks' callbacks are stored but not ours to handle)
+    deadline = time.time() + args.timeout
+    since = 0
+    event = None
+    try:
+        while time.time() < deadline:
+            remaining = deadline - time.time()
+            if receiver is not None:
+                event = receiver.wait(task_id, wait_types, remaining, since)
+            else:
+                event = wait_remote(args.receiver, task_id, wait_types, remaining, since)
+            if event is None or event["callback_type"] in FINAL_TYPES:
+                break
+            since = event["id"]
+            sink.handle(event)
+            event = None
     except KeyboardInterrupt:
         cleanup()
+    except requests.exceptions.RequestException as e:
+        print(f"❌ Callback Server 連線失敗: {e}", file=sys.stderr)
+        cleanup()
+
+    if event is None:
+        print(f"\n⏰ 等待超時 ({args.timeout} 秒)")
+        print(f"   可以前往 https://kie.ai/logs 手動查看結果")
+        print(f"   任務 ID: {task_id}")
+        cleanup()
+
+    if event["callback_type"] == "complete":
+        clips = callback_clips(event)
+
+        print("\n" + "="*60)
+        print("✅ 全部生成完成！")
+        print("="*60)
+        print(f"任務 ID: {event['task_id']}")
+        print(f"生成了 {len(clips)} 首音樂\n")
+
+        # Display music URLs
+        for i, clip in enumerate(clips, 1):
+            print(f"【音樂 {i}】")
+            print(f"  ID: {clip.get('id')}")
+            print(f"  標題: {clip.get('title')}")
+            print(f"  風格: {clip.get('tags')}")
+            if clip.get('duration'):
+                print(f"  時長: {clip.get('duration')} 秒")
+
+            # IMPORTANT: audio_url is the MP3 download URL!
+            if clip.get('audio_url'):
+                print(f"  📥 MP3 URL: {clip.get('audio_url')}")
+            if clip.get('stream_audio_url'):
+                print(f"  🎵 音樂 URL: {clip.get('stream_audio_url')}")
+            if clip.get('image_url'):
+                print(f"  🖼️  圖片 URL: {clip.get('image_url')}")
+            print()
+
+        print("="*60)
+        print("💡 提示: 使用 pix2-upload skill 上傳這些檔案")
+        print("="*60)
+
+    else:
+        print("\n" + "="*60)
+        print("❌ 生成失敗")
+        print("="*60)
+        print(f"錯誤訊息: {event['msg'] or 'Unknown error'}")
+        print("請檢查任務參數或前往 https://kie.ai/logs 查看詳細信息")
+
+    if sink is not None:
+        if event["callback_type"] == "complete":
+            sink.handle(event)
+        print("\n⏳ 等待下載完成...")
+        records = sink.close()
+        print(f"✓ 已下載 {sum(len(r['files']) for r in records)} 個檔案到 {args.download}"
+              f"（記錄: {sink.manifest}）")
+        if sink.first_ready is not None:
+            print(f"⚡ 第一首可用時間: {sink.first_ready:.1f} 秒（全部完成: {time.time() - sink.started:.1f} 秒）")
+
+    # Stop services after displaying results
+    print("\n⏹️ 停止服務...")
+    if ngrok_process:
+        ngrok_process.terminate()
+    if receiver is not None:
+        receiver.stop()
+        print("✓ Ngrok + Callback Server 已停止" if ngrok_process else "✓ Callback Server 已停止")
+
+    if event["callback_type"] == "complete":
+        print("\n✅ 所有工作完成！")
+    else:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
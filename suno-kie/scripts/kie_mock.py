@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Kie.ai Mock Server
+Local stand-in for the Kie.ai Suno API that replays realistic callback sequences
+
+Every submitted task posts the same callbacks as the real service to its
+callBackUrl — text, then first, then complete (or error for prompts that
+contain "FAIL") — after configurable delays, and GET /generate reports the
+matching status. Audio, stream and image URLs point back at the mock, so the
+whole callback pipeline (receiver, waiters, downloads) runs with no network
+and no ngrok.
+
+Endpoints (under /api/v1):
+    POST /generate, /generate/add-vocals, /generate/upload-cover   submit a task
+    GET  /generate?taskId=...                                      task record
+    POST /generate-persona                                         create a persona
+    GET  /files/<name>                                             fake audio / image bytes
+
+Usage:
+    python3 kie_mock.py serve --port 8765
+    KIE_BASE_URL=http://localhost:8765/api/v1 python3 generate-with-callback.py --loopback ...
+
+    # Load test: N simulated tasks through a local callback receiver
+    python3 kie_mock.py loadtest --tasks 2000 --concurrency 200
+"""
+
+import sys
+import json
+import time
+import heapq
+import uuid
+import random
+import argparse
+import statistics
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlparse
+from typing import Any, Dict, List, Optional, Tuple
+
+from callback_store import FINAL_TYPES, CallbackReceiver, CallbackStore, ReceiverServer
+
+# Seconds after submission at which each callback is sent
+DEFAULT_DELAYS = {"text": 1.0, "first": 2.0, "complete": 3.0}
+# Delivery attempts per callback (Kie.ai retries callbacks that fail)
+CALLBACK_ATTEMPTS = 3
+FAKE_FILE = bytes(range(256)) * 64
+
+
+class KieMock:
+    """
+    In-process mock of the Kie.ai Suno API
+
+    Args:
+        host / port: listen address (port 0 picks a free port)
+        delays: seconds after submission for the text / first / complete callbacks
+        jitter: random ± fraction applied to each delay
+        workers: threads delivering callbacks
+    """
+
+    def __init__(self, host: str = "localhost", port: int = 0, delays: Optional[Dict[str, float]] = None,
+                 jitter: float = 0.2, workers: int = 16):
+        self.delays = dict(DEFAULT_DELAYS, **(delays or {}))
+        self.jitter = jitter
+        self.tasks: Dict[str, Dict[str, Any]] = {}
+        self.personas: Dict[str, Dict[str, Any]] = {}
+        self.callbacks_sent = 0
+        self.callback_errors = 0
+
+        self._lock = threading.Lock()
+        self._queue: List[Tuple[float, int, str, str]] = []
+        self._cond = threading.Condition(self._lock)
+        self._seq = 0
+        self._running = False
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="kie-mock-callback")
+        self._session = requests.Session()
+        self._session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=workers))
+
+        handler = type("KieMockHandler", (_Handler,), {"mock": self})
+        self.server = ReceiverServer((host, port), handler)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def base_url(self) -> str:
+        """Value for KIE_BASE_URL"""
+        return f"{self.url}/api/v1"
+
+    def start(self) -> "KieMock":
+        self._running = True
+        threading.Thread(target=self.server.serve_forever, name="kie-mock-http", daemon=True).start()
+        threading.Thread(target=self._scheduler, name="kie-mock-scheduler", daemon=True).start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self.server.shutdown()
+        self.server.server_close()
+        self._pool.shutdown(wait=False)
+
+    # Tasks
+
+    def submit(self, params: Dict[str, Any], kind: str) -> str:
+        task_id = uuid.uuid4().hex
+        now = time.time()
+        failing = "FAIL" in str(params.get("prompt", ""))
+        steps = ["text", "error"] if failing else ["text", "first", "complete"]
+        with self._cond:
+            self.tasks[task_id] = {"params": params, "kind": kind, "submitted": now, "status": "queued",
+                                   "clips": self._clips(task_id, params), "sent": []}
+            for step in steps:
+                delay = self.delays["first" if step == "error" else step]
+                delay *= 1 + random.uniform(-self.jitter, self.jitter)
+                self._seq += 1
+                heapq.heappush(self._queue, (now + delay, self._seq, task_id, step))
+            self._cond.notify_all()
+        return task_id
+
+    def _clips(self, task_id: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [{
+            "id": f"{task_id[:8]}-{n}",
+            "title": params.get("title") or "Mock Song",
+            "tags": params.get("style") or "",
+            "duration": 120.0 + n,
+            "audio_url": f"{self.url}/files/{task_id}-{n}.mp3",
+            "stream_audio_url": f"{self.url}/files/{task_id}-{n}-stream.mp3",
+            "image_url": f"{self.url}/files/{task_id}-{n}.jpg"
+        } for n in range(2)]
+
+    def record(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Task record as returned by GET /generate"""
+        with self._lock:
+            task = self.tasks.get(task_id)
+            if task is None:
+                return None
+            clips = task["clips"] if task["status"] == "complete" else \
+                task["clips"][:1] if "first" in task["sent"] else []
+            return {"taskId": task_id, "status": task["status"], "clips": clips,
+                    "audioIds": [clip["id"] for clip in clips]}
+
+    def _scheduler(self):
+        while True:
+            with self._cond:
+                while self._running and (not self._queue or self._queue[0][0] > time.time()):
+                    self._cond.wait(self._queue[0][0] - time.time() if self._queue else None)
+                if not self._running:
+                    return
+                _, _, task_id, step = heapq.heappop(self._queue)
+                task = self.tasks[task_id]
+                task["sent"].append(step)
+                task["status"] = {"text": "text_generated", "first": "processing",
+                                  "complete": "complete", "error": "failed"}[step]
+            self._pool.submit(self._deliver, task_id, task, step)
+
+    def _deliver(self, task_id: str, task: Dict[str, Any], step: str):
+        url = task["params"].get("callBackUrl")
+        if not url:
+            return
+        if step == "error":
+            body = {"code": 500, "msg": "Mock generation failed",
+                    "data": {"callbackType": "error", "task_id": task_id, "data": None}}
+        else:
+            clips = {"text": [], "first": task["clips"][:1], "complete": task["clips"]}[step]
+            body = {"code": 200, "msg": "All generated successfully." if step == "complete" else "success",
+                    "data": {"callbackType": step, "task_id": task_id, "data": clips}}
+        for attempt in range(CALLBACK_ATTEMPTS):
+            try:
+                self._session.post(url, json=body, timeout=10).raise_for_status()
+                with self._lock:
+                    self.callbacks_sent += 1
+                return
+            except requests.exceptions.RequestException:
+                time.sleep(0.5 * (attempt + 1))
+        with self._lock:
+            self.callback_errors += 1
+
+
+class _Handler(BaseHTTPRequestHandler):
+    mock: KieMock
+    protocol_version = "HTTP/1.1"
+
+    def _json(self, obj: Any, status: int = 200):
+        body = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        content_length = int(self.headers.get("Content-Length", 0))
+        try:
+            params = json.loads(self.rfile.read(content_length) or b"{}")
+        except ValueError:
+            return self._json({"code": 400, "msg": "invalid JSON"}, 400)
+
+        if path in ("/api/v1/generate", "/api/v1/generate/add-vocals", "/api/v1/generate/upload-cover"):
+            task_id = self.mock.submit(params, path.rsplit("/", 1)[-1])
+            return self._json({"code": 200, "msg": "success", "data": {"taskId": task_id}})
+        if path == "/api/v1/generate-persona":
+            persona_id = f"persona_{uuid.uuid4().hex[:12]}"
+            with self.mock._lock:
+                self.mock.personas[persona_id] = params
+            return self._json({"code": 200, "msg": "success",
+                               "data": {"personaId": persona_id, "name": params.get("name"),
+                                        "description": params.get("description")}})
+        self._json({"code": 404, "msg": "not found"}, 404)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/api/v1/generate":
+            task_id = parse_qs(url.query).get("taskId", [""])[0]
+            record = self.mock.record(task_id)
+            if record is None:
+                return self._json({"code": 404, "msg": "task not found"})
+            return self._json({"code": 200, "msg": "success", "data": record})
+        if url.path.startswith("/files/"):
+            content_type = "image/jpeg" if url.path.endswith(".jpg") else "audio/mpeg"
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(FAKE_FILE)))
+            self.end_headers()
+            self.wfile.write(FAKE_FILE)
+            return
+        self._json({"code": 404, "msg": "not found"}, 404)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def loadtest(tasks: int, concurrency: int, delays: Dict[str, float]) -> Dict[str, Any]:
+    """Submit `tasks` generations to a mock and wait for every final callback on one receiver"""
+
+    mock = KieMock(delays=delays, workers=min(64, concurrency)).start()
+    store = CallbackStore(":memory:")
+    receiver = CallbackReceiver("localhost", 0, store).start()
+    session = requests.Session()
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=concurrency))
+    callback_url = f"{receiver.url}/callback"
+
+    def run(n: int) -> float:
+        started = time.time()
+        response = session.post(f"{mock.base_url}/generate", timeout=30,
+                                json={"prompt": f"song {n}", "customMode": False, "model": "V4_5",
+                                      "callBackUrl": callback_url})
+        task_id = response.json()["data"]["taskId"]
+        event = receiver.wait(task_id, FINAL_TYPES, timeout=120)
+        if event is None:
+            raise TimeoutError(task_id)
+        return time.time() - started
+
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(run, range(tasks)))
+    elapsed = time.time() - started
+
+    stats = store.stats()
+    receiver.stop()
+    mock.stop()
+    ordered = sorted(latencies)
+    return {
+        "tasks": tasks,
+        "elapsed": elapsed,
+        "tasks_per_second": tasks / elapsed,
+        "callbacks": mock.callbacks_sent,
+        "callback_errors": mock.callback_errors,
+        "stored_events": stats["events"],
+        "latency_median": statistics.median(ordered),
+        "latency_p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "expected_latency": delays["complete"]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Local Kie.ai mock server with realistic callback sequences",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s serve --port 8765
+  KIE_BASE_URL=http://localhost:8765/api/v1 generate-with-callback.py --loopback --prompt "..." --style pop --title T
+
+  %(prog)s loadtest --tasks 2000 --concurrency 200 --complete-delay 2
+        """
+    )
+    parser.add_argument("command", choices=["serve", "loadtest"], help="serve: run the mock; loadtest: simulate many tasks")
+    parser.add_argument("--host", default="localhost", help="Listen address (default: localhost)")
+    parser.add_argument("--port", type=int, default=8765, help="Listen port for serve (default: 8765)")
+    parser.add_argument("--text-delay", type=float, help="Seconds until the text callback (default: 1/3 of complete)")
+    parser.add_argument("--first-delay", type=float, help="Seconds until the first callback (default: 2/3 of complete)")
+    parser.add_argument("--complete-delay", type=float, default=DEFAULT_DELAYS["complete"], help="Seconds until the complete callback")
+    parser.add_argument("--tasks", type=int, default=1000, help="Simulated tasks for loadtest (default: 1000)")
+    parser.add_argument("--concurrency", type=int, default=100, help="Tasks in flight for loadtest (default: 100)")
+    args = parser.parse_args()
+
+    # Unset steps keep the real service's proportions: text, then first, well before complete
+    text_delay = args.text_delay if args.text_delay is not None else args.complete_delay / 3
+    first_delay = args.first_delay if args.first_delay is not None else args.complete_delay * 2 / 3
+    delays = {"text": text_delay, "first": first_delay, "complete": args.complete_delay}
+
+    if args.command == "loadtest":
+        print(f"Simulating {args.tasks} task(s), {args.concurrency} in flight...", file=sys.stderr)
+        print(json.dumps(loadtest(args.tasks, args.concurrency, delays), indent=2))
+        return
+
+    mock = KieMock(args.host, args.port, delays)
+    print(f"🧪 Kie.ai Mock Server: {mock.url}")
+    print(f"   export KIE_BASE_URL={mock.base_url}")
+    print(f"   Callback 順序: text {text_delay:g}s → first {first_delay:g}s → complete {args.complete_delay:g}s")
+    print(f"按 Ctrl+C 停止\n")
+    mock.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        mock.stop()
+        print(f"\n⏹️ Mock 已停止（{len(mock.tasks)} 個任務，{mock.callbacks_sent} 個 callback）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Kie.ai Persona Registry
+Local record of created Personas, keyed by the clip they were made from
+
+Kie.ai allows one Persona per audio ID and has no endpoint to look one up, so
+a Persona ID that is only printed is lost. The registry stores every created
+Persona in SQLite (default ~/.cache/suno-kie/personas.db, override with
+KIE_PERSONA_DB) and ensure() / ensure_many() return the stored Persona for a
+clip instead of creating it again. ensure_many() creates missing Personas
+with bounded concurrency; duplicate clips in one batch are created once.
+
+Usage:
+    from persona_registry import PersonaRegistry
+
+    registry = PersonaRegistry()
+    results = registry.ensure_many(entries, create_persona, concurrency=4)
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "suno-kie", "personas.db")
+DEFAULT_CONCURRENCY = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS personas (
+    audio_id TEXT PRIMARY KEY,
+    task_id TEXT NOT NULL,
+    persona_id TEXT NOT NULL,
+    name TEXT,
+    description TEXT,
+    created_at REAL NOT NULL
+);
+"""
+
+# create(task_id, audio_id, name, description) -> persona ID; raises on failure
+CreatePersona = Callable[[str, str, str, str], str]
+
+
+def normalize_entry(entry: Dict[str, Any]) -> Dict[str, str]:
+    """Batch entry with task_id / audio_id / name / description (camelCase keys accepted)"""
+    if not isinstance(entry, dict):
+        raise ValueError(f"entry must be a JSON object: {entry!r}")
+    task_id = entry.get("task_id") or entry.get("taskId")
+    audio_id = entry.get("audio_id") or entry.get("audioId")
+    name = entry.get("name")
+    if not (task_id and audio_id and name):
+        raise ValueError(f"entry needs task_id, audio_id and name: {entry}")
+    return {"task_id": str(task_id), "audio_id": str(audio_id), "name": str(name),
+            "description": str(entry.get("description") or name)}
+
+
+class PersonaRegistry:
+    """
+    SQLite registry of Personas by source audio ID
+
+    Args:
+        path: database file (default: KIE_PERSONA_DB or ~/.cache/suno-kie/personas.db)
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.environ.get("KIE_PERSONA_DB") or DEFAULT_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        # One in-flight creation per audio ID, so concurrent requests for a clip share it
+        self._creating: Dict[str, threading.Lock] = {}
+        self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def get(self, audio_id: str) -> Optional[Dict[str, Any]]:
+        """Stored Persona for a clip, or None"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM personas WHERE audio_id = ?", (audio_id,)).fetchone()
+        return dict(row) if row else None
+
+    def save(self, task_id: str, audio_id: str, persona_id: str, name: str = "",
+             description: str = "") -> Dict[str, Any]:
+        """Store (or replace) the Persona of a clip"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO personas (audio_id, task_id, persona_id, name, description, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (audio_id, task_id, persona_id, name, description, time.time())
+            )
+        return self.get(audio_id)
+
+    def all(self) -> List[Dict[str, Any]]:
+        """Every stored Persona, newest first"""
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM personas ORDER BY created_at DESC").fetchall()
+        return [dict(row) for row in rows]
+
+    def ensure(self, entry: Dict[str, Any], create: CreatePersona) -> Dict[str, Any]:
+        """
+        Persona for one entry, created only when the clip has none yet
+
+        Returns:
+            {"status": "existing" | "created" | "failed", "audio_id", "persona_id", "name", "error"?}
+        """
+        entry = normalize_entry(entry)
+        audio_id = entry["audio_id"]
+        with self._lock:
+            creating = self._creating.setdefault(audio_id, threading.Lock())
+
+        with creating:
+            stored = self.get(audio_id)
+            if stored:
+                return {"status": "existing", "audio_id": audio_id, "persona_id": stored["persona_id"],
+                        "name": stored["name"]}
+            try:
+                persona_id = create(entry["task_id"], audio_id, entry["name"], entry["description"])
+            except Exception as e:
+                return {"status": "failed", "audio_id": audio_id, "persona_id": None,
+                        "name": entry["name"], "error": str(e)}
+            self.save(entry["task_id"], audio_id, persona_id, entry["name"], entry["description"])
+            return {"status": "created", "audio_id": audio_id, "persona_id": persona_id, "name": entry["name"]}
+
+    def ensure_many(self, entries: Iterable[Dict[str, Any]], create: CreatePersona,
+                    concurrency: int = DEFAULT_CONCURRENCY) -> List[Dict[str, Any]]:
+        """ensure() every entry with at most `concurrency` creations in flight; results in input order"""
+        entries = list(entries)
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            return list(pool.map(lambda entry: self.ensure(entry, create), entries))
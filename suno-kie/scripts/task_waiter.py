@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Kie.ai Task Waiter
+Wait for a task by callback when a receiver is running, by polling otherwise
+
+generate.py, add-vocals.py and upload-cover.py submit tasks with a callBackUrl.
+When that URL reaches the callback receiver (callback-server.py) being
+watched, the waiter long-polls the receiver for the task's final callback and
+sends no requests to Kie.ai at all. Only when a task's callbacks are overdue —
+no event for CALLBACK_GRACE seconds — does it start polling GET /generate,
+while still accepting a late callback. When the callBackUrl does not reach
+the receiver (no receiver, a localhost URL Kie.ai cannot call, or a URL
+served by another host) it polls right away, exactly as before.
+
+Receiver URL: KIE_CALLBACK_RECEIVER (default http://localhost:8080).
+
+Usage:
+    from task_waiter import wait_for_completion
+
+    task = wait_for_completion(task_id, fetch_task, params.get("callBackUrl"))
+"""
+
+import os
+import sys
+import time
+import ipaddress
+import requests
+from urllib.parse import urlparse
+from typing import Any, Callable, Dict, Optional
+
+from callback_store import CALLBACK_TYPES, FINAL_TYPES, callback_clips, receiver_instance
+
+RECEIVER_URL = os.environ.get("KIE_CALLBACK_RECEIVER", "http://localhost:8080")
+# Kie.ai API the tasks were submitted to (a local mock can call back to localhost)
+API_URL = os.environ.get("KIE_BASE_URL", "https://api.kie.ai/api/v1")
+# Seconds without any callback event before the task is polled directly
+CALLBACK_GRACE = 120
+POLL_INTERVAL = 5
+
+FetchTask = Callable[[str], Dict[str, Any]]
+StatusCallback = Callable[[str], None]
+
+
+def _is_loopback(url: str) -> bool:
+    host = urlparse(url).hostname or ""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def callback_routes(callback_url: Optional[str], receiver_url: str, api_url: str = API_URL) -> bool:
+    """True when callbacks posted to callback_url by the API end up in the receiver at receiver_url"""
+    if not callback_url or not receiver_url:
+        return False
+    # Kie.ai cannot call a loopback URL; only a local mock API can
+    if _is_loopback(callback_url) and not _is_loopback(api_url):
+        return False
+    receiver = receiver_instance(receiver_url)
+    return receiver is not None and receiver_instance(callback_url) == receiver
+
+
+def _task_from_event(task_id: str, event: Dict[str, Any], fetch_task: FetchTask) -> Dict[str, Any]:
+    """Task record for a final callback (one GET /generate for the usual record shape)"""
+    if event["callback_type"] == "error":
+        return {"taskId": task_id, "status": "failed", "error": event.get("msg") or "Unknown error"}
+    task = fetch_task(task_id)
+    if task.get("status") == "complete":
+        return task
+    clips = callback_clips(event)
+    return {"taskId": task_id, "status": "complete", "clips": clips,
+            "audioIds": [clip.get("id") for clip in clips if clip.get("id")]}
+
+
+def wait_for_task(task_id: str, fetch_task: FetchTask, timeout: float = 300,
+                  interval: float = POLL_INTERVAL, receiver_url: Optional[str] = None,
+                  grace: float = CALLBACK_GRACE, on_status: Optional[StatusCallback] = None,
+                  callback_url: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Wait until the task is complete or failed
+
+    Args:
+        fetch_task: the calling script's GET /generate function (returns the task record)
+        receiver_url: callback receiver to use (default: KIE_CALLBACK_RECEIVER); '' disables callbacks
+        callback_url: the task's callBackUrl; callbacks are only awaited when it reaches the receiver
+        grace: seconds without callbacks before falling back to polling
+        on_status: called with each status / callback type seen
+
+    Returns:
+        the task record; status 'complete' or 'failed' ('error' holds the callback message)
+
+    Raises:
+        TimeoutError: no final status within timeout seconds
+    """
+    receiver_url = RECEIVER_URL if receiver_url is None else receiver_url
+    use_callbacks = callback_routes(callback_url, receiver_url)
+    session = requests.Session() if use_callbacks else None
+
+    started = time.time()
+    deadline = started + timeout
+    since = 0
+    # With a receiver the first poll waits for the callback grace period
+    next_poll = started + grace if use_callbacks else started
+
+    while True:
+        now = time.time()
+        if now >= deadline:
+            break
+
+        wait = min(next_poll, deadline) - now
+        if use_callbacks and wait > 0:
+            # Block on the receiver until the next poll is due (or any callback for this task arrives)
+            try:
+                response = session.get(
+                    f"{receiver_url.rstrip('/')}/tasks/{task_id}/wait",
+                    params={"types": ",".join(CALLBACK_TYPES), "since": since, "timeout": wait},
+                    timeout=wait + 10
+                )
+                response.raise_for_status()
+                event = response.json().get("event")
+            except (requests.exceptions.RequestException, ValueError) as e:
+                print(f"\nWarning: callback receiver unavailable ({e}), polling instead", file=sys.stderr)
+                use_callbacks = False
+                continue
+
+            if event:
+                since = event["id"]
+                if on_status:
+                    on_status(event["callback_type"])
+                if event["callback_type"] in FINAL_TYPES:
+                    return _task_from_event(task_id, event, fetch_task)
+                # The task is alive and pushing; give it another grace period
+                next_poll = max(next_poll, time.time() + grace)
+            continue
+
+        if wait > 0:
+            time.sleep(wait)
+
+        # Callbacks overdue (or no receiver): ask Kie.ai directly
+        task = fetch_task(task_id)
+        status = task.get("status", "")
+        if on_status:
+            on_status(status)
+        if status in ("complete", "failed"):
+            return task
+        next_poll = time.time() + interval
+
+    raise TimeoutError(f"Timeout waiting for task {task_id}")
+
+
+def wait_for_completion(task_id: str, fetch_task: FetchTask, callback_url: Optional[str] = None,
+                        interval: float = POLL_INTERVAL, timeout: float = 300) -> Dict[str, Any]:
+    """wait_for_task with the scripts' progress output; exits with status 1 on timeout or failure"""
+    print(f"Waiting for task {task_id} to complete...")
+
+    try:
+        task = wait_for_task(task_id, fetch_task, timeout, interval, callback_url=callback_url,
+                             on_status=lambda status: print(f"Status: {status}...", end="\r", flush=True))
+    except TimeoutError:
+        print(f"\nTimeout waiting for task {task_id}", file=sys.stderr)
+        print(f"Use fetch.py to check status later", file=sys.stderr)
+        sys.exit(1)
+
+    if task.get("status") == "failed":
+        print(f"\n✗ Task failed{': ' + task['error'] if task.get('error') else ''}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"\n✓ Task completed successfully!")
+    return task
@@ -6,14 +6,15 @@ Upload audio and transform it into a new style while keeping the melody
 
 import os
 import sys
-import time
 import json
 import argparse
 import requests
 from typing import Dict, Any
 
+from task_waiter import wait_for_completion
+
 # API Configuration
-BASE_URL = "https://api.kie.ai/api/v1"
+BASE_URL = os.environ.get("KIE_BASE_URL", "https://api.kie.ai/api/v1")
 API_KEY = os.environ.get("KIE_API_KEY", "")
 CALLBACK_URL = os.environ.get("KIE_CALLBACK_URL", "")
 
@@ -65,34 +66,6 @@ def fetch_task(task_id: str) -> Dict[str, Any]:
         print(f"Error fetching task: {e}", file=sys.stderr)
         sys.exit(1)
 
-def wait_for_completion(task_id: str, interval: int = 5, timeout: int = 300) -> Dict[str, Any]:
-    """Wait for task completion with polling"""
-    start_time = time.time()
-
-    print(f"Waiting for task {task_id} to complete...")
-
-    while True:
-        if time.time() - start_time > timeout:
-            print(f"\nTimeout waiting for task {task_id}", file=sys.stderr)
-            print(f"Use fetch.py to check status later", file=sys.stderr)
-            sys.exit(1)
-
-        task = fetch_task(task_id)
-        status = task.get("status", "")
-
-        print(f"Status: {status}...", end="\r", flush=True)
-
-        if status == "complete":
-            print(f"\n✓ Task completed successfully!")
-            return task
-        elif status == "failed":
-            print(f"\n✗ Task failed", file=sys.stderr)
-            sys.exit(1)
-        elif status in ["queued", "processing", "text_generated"]:
-            time.sleep(interval)
-        else:
-            time.sleep(interval)
-
 def build_params(args) -> Dict[str, Any]:
     """Build API parameters from arguments"""
     params = {
@@ -221,7 +194,7 @@ Note:
         return
 
     # Poll for completion
-    task = wait_for_completion(task_id)
+    task = wait_for_completion(task_id, fetch_task, params.get("callBackUrl"))
 
     # Extract important info
     audio_ids = task.get("audioIds", [])